@@ -1,34 +1,20 @@
-import math
+from collections import Counter
+
+from similarity import cosine_similarity, euclidean_distance, jaccard_similarity, overlap_coefficient
+from similarity_matrix import similarity_matrix
 
 S1 = "The man saw a car in the park"
 S2 = "I saw the man park the car"
 
-def euclidean_distance(v1, v2):
-    squared_sum = sum((v1[i] - v2[i])**2 for i in range(len(v1)))
-    return math.sqrt(squared_sum)
-
-def cosine_similarity(v1, v2):
-    dot_product = sum(v1[i] * v2[i] for i in range(len(v1)))
-    norm_v1 = math.sqrt(sum(x**2 for x in v1))
-    norm_v2 = math.sqrt(sum(x**2 for x in v2))
-    return dot_product / (norm_v1 * norm_v2)
-
-def jaccard_similarity(s1, s2):
-    intersection = s1 & s2
-    union = s1 | s2
-    return len(intersection) / len(union)
-
-def overlap_coefficient(s1, s2):
-    intersection = s1 & s2
-    return len(intersection) / min(len(s1), len(s2))
-
 s1_tokens = S1.lower().split()
 s2_tokens = S2.lower().split()
 
 vocab = sorted(set(s1_tokens + s2_tokens))
 
-v1 = [s1_tokens.count(word) for word in vocab]
-v2 = [s2_tokens.count(word) for word in vocab]
+s1_counts = Counter(s1_tokens)
+s2_counts = Counter(s2_tokens)
+v1 = [s1_counts[word] for word in vocab]
+v2 = [s2_counts[word] for word in vocab]
 
 set1 = set(s1_tokens)
 set2 = set(s2_tokens)
@@ -60,4 +46,11 @@ print(f"c) Jaccard similarity: {jac_sim:.4f}")
 print()
 
 ovr_coef = overlap_coefficient(set1, set2)
-print(f"d) Overlap coefficient: {ovr_coef:.4f}")
\ No newline at end of file
+print(f"d) Overlap coefficient: {ovr_coef:.4f}")
+print()
+
+# The same metrics for every pair of a list of texts at once, from a sparse
+# document-term matrix (see similarity_matrix.py)
+for metric in ("euclidean", "cosine", "jaccard", "overlap"):
+    print(f"{metric} matrix:")
+    print(similarity_matrix([S1, S2], metric=metric).round(4))
@@ -1,149 +1,81 @@
-from nltk.corpus import wordnet as wn
-
-def check_synonym(word1, word2):
-    for synset in wn.synsets(word1):
-        for lemma in synset.lemmas():
-            if lemma.name().lower() == word2.lower():
-                return True
-    return False
-
-
-def check_hypernym(word1, word2):
-    for synset in wn.synsets(word1):
-        for hyper in synset.hypernyms():
-            for lemma in hyper.lemmas():
-                if lemma.name().lower() == word2.lower():
-                    return True
-    return False
-
-
-def check_hyponym(word1, word2):
-    for synset in wn.synsets(word1):
-        for hypo in synset.hyponyms():
-            for lemma in hypo.lemmas():
-                if lemma.name().lower() == word2.lower():
-                    return True
-    return False
-
-
-def check_antonym(word1, word2):
-    for synset in wn.synsets(word1):
-        for lemma in synset.lemmas():
-            for ant in lemma.antonyms():
-                if ant.name().lower() == word2.lower():
-                    return True
-    return False
-
-
-def calculate_similarity(word1, word2):
-    synsets1 = wn.synsets(word1)
-    synsets2 = wn.synsets(word2)
-
-    if not synsets1 or not synsets2:
-        return 0.0
-
-    max_similarity = 0.0
-    for s1 in synsets1:
-        for s2 in synsets2:
-            sim = s1.path_similarity(s2)
-            if sim and sim > max_similarity:
-                max_similarity = sim
-
-    return max_similarity
-
-def get_feedback(similarity):
-    if similarity >= 0.9:
-        return "🔥 Extremely good connection"
-    elif similarity >= 0.7:
-        return "🎯 Very good connection!"
-    elif similarity >= 0.5:
-        return "👍 Good connection!"
-    elif similarity >= 0.3:
-        return "🤔 Some connection"
-    elif similarity >= 0.1:
-        return "😐 Weak connection"
-    else:
-        return "❌ Very distant"
-
-
-def calculate_points(similarity, relations):
-    base_points = int(similarity * 100) - 25
-
-    bonus = 0
-    if relations['synonym']:
-        bonus += 50
-    if relations['hypernym']:
-        bonus += 30
-    if relations['hyponym']:
-        bonus += 30
-    if relations['antonym']:
-        bonus += 20
-
-    return base_points + bonus
-
-
-def play_game():
-    print("=" * 60)
-    print("WORD ASSOCIATION GAME")
-    print("=" * 60)
-    print("\nGuess words related to the target word!")
-    print("Type 'quit' to exit or 'new' for a new word.\n")
-
-    target_word = input("Enter the target word: ").strip().lower()
-
-    if not wn.synsets(target_word):
-        print(f"Word '{target_word}' not found in WordNet. Try another word.")
-        return
-
-    print(f"\nTarget word: {target_word.upper()}")
-    print("Start guessing related words!\n")
-
-    total_score = 0
-    guesses = 0
-    guessed_words = set()
+from word_game import GameEngine
+from wordnet_neighbourhood import DEFAULT_DISTANCE
 
+
+# distance=None scores every guess when it is made; otherwise the words
+# within `distance` hypernym/hyponym hops of the target are scored up front
+# and give the hints (see word_game.GameEngine)
+def play_game(distance=DEFAULT_DISTANCE):
+    engine = GameEngine(distance)
+
+    while True:
+        print("=" * 60)
+        print("WORD ASSOCIATION GAME")
+        print("=" * 60)
+        print("\nGuess words related to the target word!")
+        print("Type 'quit' to exit, 'new' for a new word or 'hint' for a hint.\n")
+
+        target_word = input("Enter the target word: ").strip().lower()
+
+        try:
+            session = engine.start(target_word)
+        except ValueError:
+            print(f"Word '{target_word}' not found in WordNet. Try another word.")
+            return
+
+        print(f"\nTarget word: {target_word.upper()}")
+        print("Start guessing related words!\n")
+
+        if not play_round(session):
+            return
+
+
+def play_round(session):
+    """Plays guesses on `session` until 'quit' (returns False) or 'new'
+    (returns True)."""
     while True:
         guess = input("Your guess: ").strip().lower()
 
         if guess == 'quit':
-            print(f"\nGame Over! Final Score: {total_score} points from {guesses} guesses")
-            break
+            print(f"\nGame Over! Final Score: {session.total_score} points from {session.guesses} guesses")
+            return False
 
         if guess == 'new':
-            print(f"\nFinal Score for '{target_word}': {total_score} points from {guesses} guesses\n")
-            play_game()
-            return
+            print(f"\nFinal Score for '{session.target}': {session.total_score} points "
+                  f"from {session.guesses} guesses\n")
+            return True
+
+        if guess == 'hint':
+            if session.neighbourhood is None:
+                print("Hints are off for this game.\n")
+                continue
+            hints = session.hints()
+            if hints:
+                print(f"Try: {', '.join(hints)}\n")
+            else:
+                print("No related words left to guess!\n")
+            continue
+
+        result = session.guess(guess)
 
-        if guess == target_word:
+        if result['status'] == 'same':
             print("That's the target word itself! Try something related.\n")
             continue
 
-        if not wn.synsets(guess):
+        if result['status'] in ('empty', 'unknown'):
             print(f"Word '{guess}' not found in WordNet. Try another word.\n")
             continue
 
-        if guess in guessed_words:
+        if result['status'] == 'repeated':
             print(f"Word '{guess}' is already guessed. Try another word.\n")
             continue
 
-        guessed_words.add(guess)
-
-        guesses += 1
-
-        similarity = calculate_similarity(target_word, guess)
-
-        relations = {
-            'synonym': check_synonym(target_word, guess),
-            'hypernym': check_hypernym(target_word, guess),
-            'hyponym': check_hyponym(target_word, guess),
-            'antonym': check_antonym(target_word, guess)
-        }
-
-        points = calculate_points(similarity, relations)
-        total_score += points
+        similarity = result['similarity']
+        relations = result['relations']
+        points = result['points']
 
         print(f"\n  Similarity Score: {similarity:.3f}")
-        print(f"  {get_feedback(similarity)}")
+        print(f"  {result['feedback']}")
 
         relation_found = False
         if relations['synonym']:
@@ -168,6 +100,6 @@ def play_game():
             print(f"  Points lost: {points}")
         else:
             print(f"  You did not lose or gain any points!")
-        print(f"  Total Score: {total_score}\n")
+        print(f"  Total Score: {result['total_score']}\n")
 
-play_game()
\ No newline at end of file
+play_game()
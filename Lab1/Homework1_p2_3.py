@@ -1,112 +1,52 @@
+import queue
+import threading
 import tkinter as tk
 from tkinter import messagebox, scrolledtext
-from nltk.corpus import wordnet as wn
 
+from word_game import GameEngine, warm_up
+from wordnet_neighbourhood import DEFAULT_DISTANCE
 
-# ============================================
-# WORDNET FUNCTIONS
-# ============================================
 
-def check_synonym(word1, word2):
-    for synset in wn.synsets(word1):
-        for lemma in synset.lemmas():
-            if lemma.name().lower() == word2.lower():
-                return True
-    return False
-
-
-def check_hypernym(word1, word2):
-    for synset in wn.synsets(word1):
-        for hyper in synset.hypernyms():
-            for lemma in hyper.lemmas():
-                if lemma.name().lower() == word2.lower():
-                    return True
-    return False
-
-
-def check_hyponym(word1, word2):
-    for synset in wn.synsets(word1):
-        for hypo in synset.hyponyms():
-            for lemma in hypo.lemmas():
-                if lemma.name().lower() == word2.lower():
-                    return True
-    return False
-
-
-def check_antonym(word1, word2):
-    for synset in wn.synsets(word1):
-        for lemma in synset.lemmas():
-            for ant in lemma.antonyms():
-                if ant.name().lower() == word2.lower():
-                    return True
-    return False
-
-
-def calculate_similarity(word1, word2):
-    synsets1 = wn.synsets(word1)
-    synsets2 = wn.synsets(word2)
-
-    if not synsets1 or not synsets2:
-        return 0.0
-
-    max_similarity = 0.0
-    for s1 in synsets1:
-        for s2 in synsets2:
-            sim = s1.path_similarity(s2)
-            if sim and sim > max_similarity:
-                max_similarity = sim
-
-    return max_similarity
-
-
-def get_feedback(similarity):
-    if similarity >= 0.9:
-        return "🔥 Extremely good connection"
-    elif similarity >= 0.7:
-        return "🎯 Very good connection!"
-    elif similarity >= 0.5:
-        return "👍 Good connection!"
-    elif similarity >= 0.3:
-        return "🤔 Some connection"
-    elif similarity >= 0.1:
-        return "😐 Weak connection"
-    else:
-        return "❌ Very distant"
-
-
-def calculate_points(similarity, relations):
-    base_points = int(similarity * 100) - 25
-
-    bonus = 0
-    if relations['synonym']:
-        bonus += 50
-    if relations['hypernym']:
-        bonus += 30
-    if relations['hyponym']:
-        bonus += 30
-    if relations['antonym']:
-        bonus += 20
-
-    return base_points + bonus
+def start_session(engine, target):
+    # On the worker thread: the session, or None if `target` is not a word
+    try:
+        return engine.start(target)
+    except ValueError:
+        return None
 
 
 # ============================================
 # GUI CLASS
 # ============================================
 
+# How often the main thread picks up results of the worker, in milliseconds;
+# under one frame at 60 Hz
+POLL_MS = 15
+
+
 class WordAssociationGame:
-    def __init__(self, root):
+    # Game state and scoring live in a word_game.GameSession; `distance` is
+    # passed to the GameEngine.
+    # WordNet work runs on one worker thread; its results come back through
+    # a queue the main thread polls with root.after, so the window never
+    # waits on WordNet
+    def __init__(self, root, distance=DEFAULT_DISTANCE):
         self.root = root
         self.root.title("Word Association Game")
         self.root.geometry("700x600")
         self.root.configure(bg="#1a1a1a")
 
-        self.target_word = None
-        self.total_score = 0
-        self.guesses = 0
-        self.guessed_words = set()
+        self.engine = GameEngine(distance)
+        self.session = None
+        self.busy = False
+
+        self.jobs = queue.Queue()
+        self.results = queue.Queue()
+        threading.Thread(target=self.work, daemon=True).start()
 
         self.create_widgets()
+        self.run_in_background("Loading WordNet...", warm_up, (), lambda result: None)
+        self.root.after(POLL_MS, self.poll_results)
 
     def create_widgets(self):
         # Title
@@ -150,6 +90,10 @@ class WordAssociationGame:
                                     font=("Arial", 14, "bold"), bg="#2d2d2d", fg="#ff8c00")
         self.score_label.pack(pady=10)
 
+        self.status_label = tk.Label(self.root, text="", font=("Arial", 10, "italic"),
+                                     bg="#1a1a1a", fg="#cccccc")
+        self.status_label.pack()
+
         # Guess Frame
         guess_frame = tk.Frame(self.root, bg="#1a1a1a")
         guess_frame.pack(pady=10)
@@ -196,46 +140,99 @@ class WordAssociationGame:
                                       cursor="hand2", activebackground="#ffa500")
         self.new_word_btn.grid(row=0, column=0, padx=5)
 
+        self.hint_btn = tk.Button(button_frame, text="Hint",
+                                  command=self.show_hint,
+                                  font=("Arial", 11),
+                                  bg="#ff8c00", fg="#000000",
+                                  padx=15, pady=5, state=tk.DISABLED,
+                                  cursor="hand2", activebackground="#ffa500")
+        self.hint_btn.grid(row=0, column=1, padx=5)
+
         self.quit_btn = tk.Button(button_frame, text="Quit Game",
                                   command=self.quit_game,
                                   font=("Arial", 11),
                                   bg="#cc5500", fg="#ffffff",
                                   padx=15, pady=5, cursor="hand2",
                                   activebackground="#dd6600")
-        self.quit_btn.grid(row=0, column=1, padx=5)
+        self.quit_btn.grid(row=0, column=2, padx=5)
+
+    def work(self):
+        while True:
+            function, args, callback = self.jobs.get()
+            try:
+                self.results.put((callback, function(*args), None))
+            except Exception as error:
+                self.results.put((callback, None, error))
+
+    def run_in_background(self, message, function, args, callback):
+        """Runs function(*args) on the worker and callback(result) on the
+        main thread, with the window busy in between."""
+        self.set_busy(True, message)
+        self.jobs.put((function, args, callback))
+
+    def poll_results(self):
+        try:
+            while True:
+                callback, result, error = self.results.get_nowait()
+                self.set_busy(False)
+                if error is not None:
+                    messagebox.showerror("Error", str(error))
+                else:
+                    callback(result)
+        except queue.Empty:
+            pass
+        self.root.after(POLL_MS, self.poll_results)
+
+    def set_busy(self, busy, message=""):
+        self.busy = busy
+        self.status_label.config(text=message)
+        self.root.config(cursor="watch" if busy else "")
+        self.update_buttons()
+
+    def update_buttons(self):
+        playing = tk.NORMAL if self.session and not self.busy else tk.DISABLED
+        self.guess_entry.config(state=playing)
+        self.submit_btn.config(state=playing)
+        if self.session is None or self.session.neighbourhood is None:
+            self.hint_btn.config(state=tk.DISABLED)
+        else:
+            self.hint_btn.config(state=playing)
+        self.start_btn.config(state=tk.NORMAL if not self.session and not self.busy else tk.DISABLED)
 
     def start_game(self):
+        if self.busy:
+            return
+
         target = self.target_entry.get().strip().lower()
 
         if not target:
             messagebox.showwarning("Input Required", "Please enter a target word!")
             return
 
-        if not wn.synsets(target):
+        self.run_in_background(f"Preparing '{target}'...", start_session, (self.engine, target),
+                               lambda session: self.begin_game(target, session))
+
+    def begin_game(self, target, session):
+        if session is None:
             messagebox.showerror("Invalid Word",
                                  f"'{target}' not found in WordNet. Try another word.")
             return
 
-        self.target_word = target
-        self.total_score = 0
-        self.guesses = 0
-        self.guessed_words = set()
+        self.session = session
 
         self.target_entry.config(state=tk.DISABLED)
-        self.start_btn.config(state=tk.DISABLED)
-        self.guess_entry.config(state=tk.NORMAL)
-        self.submit_btn.config(state=tk.NORMAL)
         self.new_word_btn.config(state=tk.NORMAL)
+        self.set_busy(False)
 
         self.update_score()
-        self.add_feedback(f"🎯 TARGET WORD: {self.target_word.upper()}\n")
+        self.add_feedback(f"🎯 TARGET WORD: {self.session.target.upper()}\n")
         self.add_feedback("=" * 60 + "\n")
         self.add_feedback("Start guessing related words!\n\n")
 
         self.guess_entry.focus()
 
     def submit_guess(self):
-        if not self.target_word:
+        if not self.session or self.busy:
             return
 
         guess = self.guess_entry.get().strip().lower()
@@ -244,38 +241,39 @@ class WordAssociationGame:
         if not guess:
             return
 
-        if guess == self.target_word:
+        session = self.session
+        self.run_in_background("Scoring...", session.guess, (guess,),
+                               lambda result: self.show_result(session, result))
+
+    def show_result(self, session, result):
+        # The player may have moved on to a new word in the meantime
+        if session is not self.session:
+            return
+
+        guess = result['word']
+
+        if result['status'] == 'same':
             messagebox.showinfo("Same Word",
                                 "That's the target word itself! Try something related.")
             return
 
-        if not wn.synsets(guess):
+        if result['status'] == 'unknown':
             messagebox.showwarning("Invalid Word",
                                    f"'{guess}' not found in WordNet. Try another word.")
             return
 
-        if guess in self.guessed_words:
+        if result['status'] == 'repeated':
             messagebox.showinfo("Already Guessed",
                                 f"'{guess}' already guessed. Try another word.")
             return
 
-        self.guessed_words.add(guess)
-        self.guesses += 1
-
-        # Calculate
-        similarity = calculate_similarity(self.target_word, guess)
-        relations = {
-            'synonym': check_synonym(self.target_word, guess),
-            'hypernym': check_hypernym(self.target_word, guess),
-            'hyponym': check_hyponym(self.target_word, guess),
-            'antonym': check_antonym(self.target_word, guess)
-        }
-        points = calculate_points(similarity, relations)
-        self.total_score += points
+        similarity = result['similarity']
+        relations = result['relations']
+        points = result['points']
 
         # Display feedback
-        self.add_feedback(f"Guess #{self.guesses}: {guess.upper()}\n", bold=True)
-        self.add_feedback(f"  Similarity: {similarity:.3f} - {get_feedback(similarity)}\n")
+        self.add_feedback(f"Guess #{result['guesses']}: {guess.upper()}\n", bold=True)
+        self.add_feedback(f"  Similarity: {similarity:.3f} - {result['feedback']}\n")
 
         if relations['synonym']:
             self.add_feedback("  ✓ SYNONYM (+50 bonus)\n", color="green")
@@ -319,27 +317,34 @@ class WordAssociationGame:
         self.feedback_text.see(tk.END)
         self.feedback_text.config(state=tk.DISABLED)
 
+    def show_hint(self):
+        if self.session is None or self.busy:
+            return
+
+        hints = self.session.hints()
+        if hints:
+            self.add_feedback(f"💡 Hint: try {', '.join(hints)}\n\n", color="blue")
+        else:
+            self.add_feedback("💡 No related words left to guess!\n\n", color="blue")
+
     def update_score(self):
-        self.score_label.config(text=f"Score: {self.total_score} | Guesses: {self.guesses}")
+        total_score, guesses = (self.session.total_score, self.session.guesses) if self.session else (0, 0)
+        self.score_label.config(text=f"Score: {total_score} | Guesses: {guesses}")
 
     def new_word(self):
+        total_score = self.session.total_score if self.session else 0
         if messagebox.askyesno("New Word",
-                               f"Start a new game?\nCurrent score: {self.total_score}"):
+                               f"Start a new game?\nCurrent score: {total_score}"):
             self.target_entry.config(state=tk.NORMAL)
             self.target_entry.delete(0, tk.END)
-            self.start_btn.config(state=tk.NORMAL)
-            self.guess_entry.config(state=tk.DISABLED)
-            self.submit_btn.config(state=tk.DISABLED)
             self.new_word_btn.config(state=tk.DISABLED)
 
             self.feedback_text.config(state=tk.NORMAL)
             self.feedback_text.delete(1.0, tk.END)
             self.feedback_text.config(state=tk.DISABLED)
 
-            self.target_word = None
-            self.total_score = 0
-            self.guesses = 0
-            self.guessed_words = set()
+            self.session = None
+            self.update_buttons()
             self.update_score()
 
     def quit_game(self):
@@ -0,0 +1,71 @@
+import asyncio
+import json
+import random
+import time
+
+import numpy as np
+
+from benchmark_wordnet import TARGETS, make_guesses
+from word_game_server import GameServer
+
+# Targets on a single CPU core, with the clients in the same process
+SESSIONS = 2000  # concurrent connections
+THINK_S = 2.0  # mean time a player takes between guesses
+GUESSES_TARGET = 1500  # guesses per second with no think time
+P99_TARGET_MS = 100  # guess latency with think time
+
+
+async def client(port, target, guesses, latencies, think, rng):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+
+    async def send(line):
+        writer.write(line.encode('utf-8') + b'\n')
+        await writer.drain()
+        return json.loads(await reader.readline())
+
+    await send(f"start {target}")
+    for guess in guesses:
+        await asyncio.sleep(rng.expovariate(1 / think) if think else 0)
+        start = time.perf_counter()
+        await send(f"guess {guess}")
+        latencies.append(time.perf_counter() - start)
+    await send("quit")
+    writer.close()
+
+
+async def load_test(sessions=SESSIONS, guesses_per_session=10, think=THINK_S, seed=0):
+    """Runs the server and `sessions` concurrent clients in one event loop,
+    as a local stand-in for players over the network. Players wait `think`
+    seconds between guesses on average; think=0 measures peak throughput,
+    where latency is mostly time spent queueing."""
+    server = await GameServer().start(port=0)
+    port = server.sockets[0].getsockname()[1]
+    rng = random.Random(seed)
+    guesses = [guess for target, guess in make_guesses(sessions * guesses_per_session, seed)]
+    latencies = []
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(port, rng.choice(TARGETS), guesses[i::sessions], latencies, think,
+                                  random.Random(rng.random()))
+                           for i in range(sessions)))
+    elapsed = time.perf_counter() - start
+    server.close()
+    await server.wait_closed()
+
+    latencies = np.array(latencies) * 1000
+    return len(latencies) / elapsed, np.percentile(latencies, 50), np.percentile(latencies, 99)
+
+
+def benchmark_server(sessions=SESSIONS):
+    rate, p50, p99 = asyncio.run(load_test(sessions, think=0))
+    print(f"server throughput:    {rate:10.0f} guesses/s over {sessions} sessions (p99 {p99:.0f} ms queueing, "
+          f"target {GUESSES_TARGET}: {'ok' if rate >= GUESSES_TARGET else 'MISSED'})")
+    rate, p50, p99 = asyncio.run(load_test(sessions))
+    print(f"server latency:       {p99:10.1f} ms p99 over {sessions} sessions thinking {THINK_S} s "
+          f"(p50 {p50:.1f} ms, {rate:.0f} guesses/s, "
+          f"target {P99_TARGET_MS} ms: {'ok' if p99 <= P99_TARGET_MS else 'MISSED'})")
+    return rate, p99
+
+
+if __name__ == "__main__":
+    benchmark_server()
@@ -0,0 +1,153 @@
+import random
+import time
+
+import numpy as np
+
+from similarity_index import CosineIndex
+from similarity_lsh import MinHashLSH
+from similarity_matrix import METRICS, document_term_matrix, duplicate_groups, similar_pairs, similarity_matrix
+
+# Throughput targets on a single CPU core
+MATRIX_TARGET = 1e6  # pairs per second for the full N x N matrices
+DEDUPE_TARGET_S = 60  # similar_pairs over 1M short texts
+LSH_RECALL_TARGET = 0.95
+SEARCH_TARGET = 100  # top-10 queries per second over 1M texts
+
+WORDS = ("the man saw a car in park i it is was for on with as his they at be this from have "
+         "or by one had not but what all were when we there can an your which their said if do "
+         "will each about how up out them then she many some so these would other into has more").split()
+
+
+def make_texts(count, seed=0, vocabulary_size=200000):
+    # Common words plus a long tail, so texts rarely share everything
+    rng = random.Random(seed)
+    tail = [f"w{i}" for i in range(vocabulary_size)]
+    texts = []
+    for _ in range(count):
+        words = [rng.choice(WORDS) if rng.random() < 0.5 else rng.choice(tail)
+                 for _ in range(rng.randint(3, 12))]
+        texts.append(' '.join(words))
+    return texts
+
+
+def make_near_duplicates(count, seed=0, copies=0.2, edits=2):
+    """Texts of which a share are copies of earlier ones with a few words
+    replaced, so there are pairs at every similarity."""
+    rng = random.Random(seed)
+    texts = make_texts(count, seed)
+    for i in range(1, count):
+        if rng.random() < copies:
+            words = texts[rng.randrange(i)].split()
+            for _ in range(rng.randint(0, edits)):
+                words[rng.randrange(len(words))] = f"x{rng.randrange(10**6)}"
+            texts[i] = ' '.join(words)
+    return texts
+
+
+def python_pairs(texts, metric):
+    """The loop over two texts at a time, as Homework1_p1 does it."""
+    tokens = [text.lower().split() for text in texts]
+    for a in tokens:
+        for b in tokens:
+            if metric in ('jaccard', 'overlap'):
+                s1, s2 = set(a), set(b)
+                len(s1 & s2) / (len(s1 | s2) if metric == 'jaccard' else min(len(s1), len(s2)))
+            else:
+                vocab = sorted(set(a + b))
+                v1 = [a.count(word) for word in vocab]
+                v2 = [b.count(word) for word in vocab]
+                sum((x - y) ** 2 for x, y in zip(v1, v2))
+
+
+def benchmark_matrix(count=2000, python_count=200):
+    texts = make_texts(count)
+    for metric in METRICS:
+        start = time.perf_counter()
+        python_pairs(texts[:python_count], metric)
+        python_rate = python_count ** 2 / (time.perf_counter() - start)
+        start = time.perf_counter()
+        similarity_matrix(texts, metric=metric)
+        rate = count ** 2 / (time.perf_counter() - start)
+        print(f"{metric + ' matrix:':22}{rate:10.3g} pairs/s (python {python_rate:.3g} pairs/s, "
+              f"target {MATRIX_TARGET:.0e}: {'ok' if rate >= MATRIX_TARGET else 'MISSED'})")
+
+
+def benchmark_dedupe(count=1000000, threshold=0.8):
+    texts = make_texts(count, seed=1)
+    # Near-duplicates: every 100th text repeats an earlier one with a word more
+    for i in range(100, count, 100):
+        texts[i] = texts[i - 50] + " again"
+
+    start = time.perf_counter()
+    matrix, vocabulary = document_term_matrix(texts)
+    build = time.perf_counter() - start
+    rows, cols, values = similar_pairs(matrix, 'jaccard', threshold)
+    elapsed = time.perf_counter() - start
+    print(f"similar_pairs:        {elapsed:10.1f} s for {count} texts ({build:.1f} s building the matrix, "
+          f"{len(rows)} pairs, target {DEDUPE_TARGET_S} s: {'ok' if elapsed <= DEDUPE_TARGET_S else 'MISSED'})")
+
+    start = time.perf_counter()
+    labels = duplicate_groups(texts[:100000], threshold=threshold)
+    print(f"duplicate_groups:     {time.perf_counter() - start:10.1f} s for 100000 texts "
+          f"({len(np.unique(labels))} groups)")
+    return elapsed
+
+
+def benchmark_lsh(count=50000, threshold=0.7, num_perm=128):
+    texts = make_near_duplicates(count, seed=2)
+    start = time.perf_counter()
+    matrix, vocabulary = document_term_matrix(texts)
+    rows, cols, values = similar_pairs(matrix, 'jaccard', threshold)
+    exact_time = time.perf_counter() - start
+    exact = set(zip(rows.tolist(), cols.tolist()))
+
+    start = time.perf_counter()
+    index = MinHashLSH(threshold, num_perm)
+    for begin in range(0, count, 10000):
+        index.add_many(texts[begin:begin + 10000])
+    build_time = time.perf_counter() - start
+    candidates = index.candidate_pairs()
+    found = {(i, j) for i, j, score in index.similar_pairs()}
+    start = time.perf_counter()
+    index.query_many(texts[:5000])
+    query_rate = 5000 / (time.perf_counter() - start)
+
+    recall = len(found & exact) / max(len(exact), 1)
+    precision = len(found & exact) / max(len(found), 1)
+    candidate_precision = len(candidates & exact) / max(len(candidates), 1)
+    print(f"lsh recall:           {recall:10.3f} of {len(exact)} pairs with Jaccard >= {threshold} "
+          f"(target {LSH_RECALL_TARGET}: {'ok' if recall >= LSH_RECALL_TARGET else 'MISSED'})")
+    print(f"lsh precision:        {precision:10.3f} after the exact check, "
+          f"{candidate_precision:.3f} of {len(candidates)} candidates")
+    print(f"lsh build:            {build_time:10.1f} s for {count} texts ({index.bands} bands of {index.rows} rows, "
+          f"exact similar_pairs {exact_time:.1f} s), {query_rate:.0f} queries/s")
+    return recall
+
+
+def benchmark_search(count=1000000, queries=1000, k=10):
+    texts = make_texts(count, seed=3)
+    start = time.perf_counter()
+    index = CosineIndex()
+    for begin in range(0, count, 100000):
+        index.add_many(texts[begin:begin + 100000])
+    index.compact()
+    build_time = time.perf_counter() - start
+    query_texts = make_near_duplicates(queries, seed=4)
+
+    start = time.perf_counter()
+    index.search_many(query_texts, k)
+    rate = queries / (time.perf_counter() - start)
+    start = time.perf_counter()
+    index.search_many(query_texts[:100], k, dense=True)
+    dense_rate = 100 / (time.perf_counter() - start)
+    print(f"cosine search:        {rate:10.0f} queries/s over {count} texts "
+          f"(dense {dense_rate:.0f} queries/s, built in {build_time:.1f} s, "
+          f"target {SEARCH_TARGET}: {'ok' if rate >= SEARCH_TARGET else 'MISSED'})")
+    return rate
+
+
+if __name__ == "__main__":
+    benchmark_matrix()
+    benchmark_lsh()
+    benchmark_search()
+    benchmark_dedupe()
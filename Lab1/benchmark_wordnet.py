@@ -0,0 +1,171 @@
+import io
+import json
+import random
+import time
+
+import numpy as np
+from nltk.corpus import wordnet as wn
+
+from word_game import score_guess
+from wordnet_explore import explore_words, write_jsonl
+from wordnet_index import RELATIONS, relation_index
+from wordnet_neighbourhood import TargetNeighbourhood
+from wordnet_similarity import path_similarity
+
+# Targets on a single CPU core
+RELATIONS_TARGET = 100000  # relation checks (all four) per second
+SIMILARITY_TARGET_MS = 1.0  # mean calculate_similarity latency per guess
+EXPLORE_TARGET_S = 60  # batch exploration of 100k words
+
+TARGETS = ("dog car house run set light play tree water music book food king game line "
+           "good cold bank head time").split()
+
+
+def walk_relations(word1, word2):
+    """The four check_* functions as the game first wrote them, walking
+    wn.synsets(word1) once per relation."""
+    relations = {}
+    for relation in RELATIONS:
+        found = False
+        for synset in wn.synsets(word1):
+            if relation == 'synonym':
+                names = [lemma.name() for lemma in synset.lemmas()]
+            elif relation == 'hypernym':
+                names = [lemma.name() for hyper in synset.hypernyms() for lemma in hyper.lemmas()]
+            elif relation == 'hyponym':
+                names = [lemma.name() for hypo in synset.hyponyms() for lemma in hypo.lemmas()]
+            else:
+                names = [ant.name() for lemma in synset.lemmas() for ant in lemma.antonyms()]
+            if any(name.lower() == word2.lower() for name in names):
+                found = True
+                break
+        relations[relation] = found
+    return relations
+
+
+def walk_similarity(word1, word2):
+    """calculate_similarity() as the game first wrote it."""
+    max_similarity = 0.0
+    for s1 in wn.synsets(word1):
+        for s2 in wn.synsets(word2):
+            sim = s1.path_similarity(s2)
+            if sim and sim > max_similarity:
+                max_similarity = sim
+    return max_similarity
+
+
+def walk_explore(word):
+    """The seven wn.synsets(word) lookups of explore_word as first written."""
+    synsets = wn.synsets(word)
+    synonyms = {lemma.name() for s in wn.synsets(word) for lemma in s.lemmas()} - {word}
+    antonyms = {ant.name() for s in wn.synsets(word) for lemma in s.lemmas() for ant in lemma.antonyms()}
+    hypernyms = {lemma.name() for s in wn.synsets(word) for h in s.hypernyms() for lemma in h.lemmas()}
+    hyponyms = {lemma.name() for s in wn.synsets(word) for h in s.hyponyms() for lemma in h.lemmas()}
+    meronyms = {lemma.name() for s in wn.synsets(word)
+                for m in s.part_meronyms() + s.substance_meronyms() + s.member_meronyms() for lemma in m.lemmas()}
+    definitions = [f"{s.name()}: {s.definition()}" for s in wn.synsets(word)]
+    return {'word': word, 'synsets': len(synsets), 'definitions': definitions, 'synonyms': sorted(synonyms),
+            'antonyms': sorted(antonyms), 'hypernyms': sorted(hypernyms), 'hyponyms': sorted(hyponyms),
+            'meronyms': sorted(meronyms)}
+
+
+def make_guesses(count, seed=0):
+    """(target, guess) pairs where about half the guesses are related."""
+    rng = random.Random(seed)
+    vocabulary = sorted(wn._lemma_pos_offset_map)
+    pairs = []
+    for _ in range(count):
+        target = rng.choice(TARGETS)
+        synset = rng.choice(wn.synsets(target))
+        related = [lemma.name() for s in [synset] + synset.hypernyms() + synset.hyponyms() for lemma in s.lemmas()]
+        guess = rng.choice(related) if rng.random() < 0.5 else rng.choice(vocabulary)
+        pairs.append((target, guess))
+    return pairs
+
+
+def benchmark_relations(count=20000):
+    start = time.perf_counter()
+    index = relation_index()
+    load_time = time.perf_counter() - start
+    pairs = make_guesses(count)
+
+    start = time.perf_counter()
+    expected = [walk_relations(target, guess) for target, guess in pairs[:count // 10]]
+    walk_rate = (count // 10) / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    results = [index.check_all(target, guess) for target, guess in pairs]
+    rate = count / (time.perf_counter() - start)
+
+    mismatches = sum(a != b for a, b in zip(expected, results))
+    print(f"relation checks:      {rate:10.0f} guesses/s (walking synsets {walk_rate:.0f} guesses/s, "
+          f"index loaded in {load_time:.2f} s, {mismatches} mismatches, "
+          f"target {RELATIONS_TARGET}: {'ok' if rate >= RELATIONS_TARGET else 'MISSED'})")
+    return rate
+
+
+def latencies(function, pairs):
+    times = []
+    results = []
+    for target, guess in pairs:
+        start = time.perf_counter()
+        results.append(function(target, guess))
+        times.append(time.perf_counter() - start)
+    return np.array(times) * 1000, results
+
+
+def benchmark_similarity(count=2000):
+    engine = path_similarity()
+    pairs = make_guesses(count, seed=1)
+
+    walk_times, expected = latencies(walk_similarity, pairs[:count // 10])
+    times, results = latencies(engine.similarity, pairs)
+    mismatches = sum(a != b for a, b in zip(expected, results))
+    mean = times.mean()
+    print(f"path similarity:      {mean:10.3f} ms/guess (p99 {np.percentile(times, 99):.3f} ms, "
+          f"walking synsets {walk_times.mean():.1f} ms/guess, {mismatches} mismatches, "
+          f"target {SIMILARITY_TARGET_MS} ms: {'ok' if mean <= SIMILARITY_TARGET_MS else 'MISSED'})")
+    return mean
+
+
+def benchmark_neighbourhood(count=20000):
+    pairs = make_guesses(count, seed=2)
+    start = time.perf_counter()
+    neighbourhoods = {target: TargetNeighbourhood(target, score_guess) for target in TARGETS}
+    build_time = (time.perf_counter() - start) / len(TARGETS)
+    hits = sum(guess.lower() in neighbourhoods[target] for target, guess in pairs)
+
+    start = time.perf_counter()
+    for target, guess in pairs:
+        neighbourhoods[target].score(guess.lower())
+    rate = count / (time.perf_counter() - start)
+    sizes = [len(neighbourhood) for neighbourhood in neighbourhoods.values()]
+    print(f"target neighbourhood: {rate:10.0f} guesses/s ({hits / count:.0%} precomputed, "
+          f"{build_time:.2f} s and {np.mean(sizes):.0f} words per target)")
+    return rate
+
+
+def benchmark_explore(count=100000, workers=None):
+    words = sorted(wn._lemma_pos_offset_map)[:count]
+    sample = words[::count // 2000]
+    start = time.perf_counter()
+    expected = [walk_explore(word) for word in sample]
+    walk_rate = len(sample) / (time.perf_counter() - start)
+
+    output = io.StringIO()
+    start = time.perf_counter()
+    write_jsonl(explore_words(iter(words), workers), output)
+    elapsed = time.perf_counter() - start
+    records = {record['word']: record for record in map(json.loads, output.getvalue().splitlines())}
+    mismatches = sum(records[record['word']] != record for record in expected)
+    print(f"batch explore:        {elapsed:10.1f} s for {count} words ({count / elapsed:.0f} words/s, "
+          f"one word at a time {walk_rate:.0f} words/s, {mismatches} mismatches, "
+          f"target {EXPLORE_TARGET_S} s: {'ok' if elapsed <= EXPLORE_TARGET_S else 'MISSED'})")
+    return elapsed
+
+
+if __name__ == "__main__":
+    benchmark_relations()
+    benchmark_similarity()
+    benchmark_neighbourhood()
+    benchmark_explore()
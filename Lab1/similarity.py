@@ -0,0 +1,24 @@
+import math
+
+
+def euclidean_distance(v1, v2):
+    squared_sum = sum((v1[i] - v2[i])**2 for i in range(len(v1)))
+    return math.sqrt(squared_sum)
+
+
+def cosine_similarity(v1, v2):
+    dot_product = sum(v1[i] * v2[i] for i in range(len(v1)))
+    norm_v1 = math.sqrt(sum(x**2 for x in v1))
+    norm_v2 = math.sqrt(sum(x**2 for x in v2))
+    return dot_product / (norm_v1 * norm_v2)
+
+
+def jaccard_similarity(s1, s2):
+    intersection = s1 & s2
+    union = s1 | s2
+    return len(intersection) / len(union)
+
+
+def overlap_coefficient(s1, s2):
+    intersection = s1 & s2
+    return len(intersection) / min(len(s1), len(s2))
@@ -0,0 +1,204 @@
+import json
+from collections import Counter
+
+import numpy as np
+from scipy import sparse
+
+from similarity_matrix import BLOCK_MB, ENTRY_BYTES, row_blocks, tokenize
+
+
+def normalized_rows(texts, vocabulary, add=True):
+    """L2-normalized count vectors of `texts` as a sparse matrix over
+    `vocabulary`. With add=False unknown words are left out of the matrix
+    but still count in the norm, as they would in cosine_similarity."""
+    indptr = [0]
+    indices = []
+    data = []
+    for text in texts:
+        counts = Counter(tokenize(text))
+        norm = sum(count * count for count in counts.values()) ** 0.5
+        for word, count in counts.items():
+            column = vocabulary.setdefault(word, len(vocabulary)) if add else vocabulary.get(word)
+            if column is not None:
+                indices.append(column)
+                data.append(count / norm)
+        indptr.append(len(indices))
+    return sparse.csr_matrix((np.array(data, dtype=np.float64), np.array(indices, dtype=np.int64), indptr),
+                             shape=(len(indptr) - 1, len(vocabulary)))
+
+
+def top_k_rows(scores, k, offset=0):
+    """The (ids, scores) of the k best columns of every row of a sparse
+    score matrix, best first, with ids shifted by `offset`."""
+    results = []
+    for row in range(scores.shape[0]):
+        values = scores.data[scores.indptr[row]:scores.indptr[row + 1]]
+        columns = scores.indices[scores.indptr[row]:scores.indptr[row + 1]]
+        if len(values) > k:
+            best = np.argpartition(-values, k - 1)[:k]
+            values, columns = values[best], columns[best]
+        order = np.lexsort((columns, -values))
+        results.append((columns[order] + offset, values[order]))
+    return results
+
+
+def merge_top_k(parts, k):
+    ids = np.concatenate([ids for ids, scores in parts])
+    scores = np.concatenate([scores for ids, scores in parts])
+    order = np.lexsort((ids, -scores))[:k]
+    return ids[order], scores[order]
+
+
+class Segment:
+    """An immutable block of documents with its inverted index, a
+    term -> documents sparse matrix."""
+
+    def __init__(self, start, rows):
+        self.start = start
+        self.rows = rows.tocsr()
+        self.postings = self.rows.T.tocsr()
+
+    def __len__(self):
+        return self.rows.shape[0]
+
+    def scores(self, queries):
+        # Term-at-a-time accumulation over the postings of the query words;
+        # words added to the vocabulary after this segment match nothing here
+        return queries[:, :self.postings.shape[0]] @ self.postings
+
+
+class CosineIndex:
+    """Top-k cosine search over the count vectors of texts.
+
+    Documents are stored L2-normalized, so cosine similarity is a dot
+    product. Queries only visit the postings of their own words, and only
+    documents sharing a word with the query get a score (documents with no
+    shared word have cosine 0 and are never returned). New texts go to a
+    small segment of their own; segments are merged as they grow, like in
+    a log-structured index, so inserts never rebuild the whole index.
+    """
+
+    def __init__(self):
+        self.vocabulary = {}
+        self.keys = []
+        self.segments = []
+        self.pending = []
+
+    def __len__(self):
+        return len(self.keys)
+
+    def add_many(self, texts, keys=None):
+        """Adds texts under `keys` (their positions in the index by default).
+        Keys are str or int, which save() writes as JSON and load() gets
+        back unchanged."""
+        texts = list(texts)
+        if keys is None:
+            keys = range(len(self.keys), len(self.keys) + len(texts))
+        else:
+            keys = list(keys)
+            for key in keys:
+                if not isinstance(key, (str, int)):
+                    raise ValueError(f"Key {key!r} is a {type(key).__name__}, expected a str or int")
+            if len(keys) != len(texts):
+                raise ValueError(f"Got {len(keys)} keys for {len(texts)} texts")
+        self.keys.extend(keys)
+        self.pending.extend(texts)
+
+    def add(self, text, key=None):
+        self.add_many([text], None if key is None else [key])
+
+    def flush(self):
+        if not self.pending:
+            return
+        start = len(self.keys) - len(self.pending)
+        self.segments.append(Segment(start, normalized_rows(self.pending, self.vocabulary)))
+        self.pending = []
+        # Keep segment sizes decreasing geometrically, so each document is
+        # merged O(log n) times
+        while len(self.segments) > 1 and len(self.segments[-2]) <= 2 * len(self.segments[-1]):
+            right = self.segments.pop()
+            left = self.segments.pop()
+            self.segments.append(Segment(left.start, self.stack([left.rows, right.rows])))
+
+    def stack(self, matrices):
+        width = len(self.vocabulary)
+        resized = []
+        for matrix in matrices:
+            matrix = matrix.copy()
+            matrix.resize(matrix.shape[0], width)
+            resized.append(matrix)
+        return sparse.vstack(resized, format='csr')
+
+    def compact(self):
+        """Merges every segment into one."""
+        self.flush()
+        if len(self.segments) > 1:
+            self.segments = [Segment(0, self.stack([segment.rows for segment in self.segments]))]
+
+    def search_many(self, texts, k=10, dense=False, block_mb=BLOCK_MB):
+        """For every text, the (key, cosine) of its k most similar stored
+        texts, most similar first.
+
+        dense=True scores the queries against dense blocks of documents,
+        restricted to the words of the queries, with a matrix multiply
+        instead of the postings. That pays off for large batches of queries
+        over a small vocabulary, which share words with most documents.
+        """
+        self.flush()
+        queries = normalized_rows(texts, self.vocabulary, add=False)
+        parts = [[] for _ in range(queries.shape[0])]
+        for segment in self.segments:
+            if dense:
+                results = self.dense_top_k(queries, segment, k, block_mb)
+            else:
+                results = top_k_rows(segment.scores(queries).tocsr(), k, segment.start)
+            for part, result in zip(parts, results):
+                part.append(result)
+        results = []
+        for part in parts:
+            ids, scores = merge_top_k(part, k) if part else (np.empty(0, dtype=np.int64), np.empty(0))
+            results.append([(self.keys[i], float(score)) for i, score in zip(ids, scores) if score > 0])
+        return results
+
+    def search(self, text, k=10, dense=False):
+        return self.search_many([text], k, dense)[0]
+
+    def dense_top_k(self, queries, segment, k, block_mb):
+        # Only the columns of words in some query can score
+        queries = queries[:, :segment.rows.shape[1]].tocsc()
+        columns = np.flatnonzero(np.diff(queries.indptr))
+        dense_queries = queries[:, columns].toarray().T
+        rows = segment.rows[:, columns]
+        budget = block_mb * 2**20 / ENTRY_BYTES
+        parts = [[] for _ in range(queries.shape[0])]
+        for start, stop in row_blocks(np.full(len(segment), len(columns) + queries.shape[0]), budget):
+            scores = (rows[start:stop].toarray() @ dense_queries).T
+            if scores.shape[1] > k:
+                best = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            else:
+                best = np.broadcast_to(np.arange(scores.shape[1]), scores.shape)
+            for part, ids, values in zip(parts, best, np.take_along_axis(scores, best, axis=1)):
+                part.append((ids + segment.start + start, values))
+        return [merge_top_k(part, k) for part in parts]
+
+    def save(self, path):
+        """Writes the index as one compacted segment to an .npz file."""
+        self.compact()
+        rows = self.stack([segment.rows for segment in self.segments]) if self.segments else \
+            sparse.csr_matrix((0, len(self.vocabulary)))
+        with open(path, 'wb') as f:
+            np.savez(f, data=rows.data, indices=rows.indices, indptr=rows.indptr,
+                     vocabulary=np.array('\n'.join(self.vocabulary)), keys=np.array(json.dumps(self.keys)))
+
+    @classmethod
+    def load(cls, path):
+        index = cls()
+        with np.load(path) as saved:
+            words = str(saved['vocabulary'])
+            index.vocabulary = {word: i for i, word in enumerate(words.split('\n'))} if words else {}
+            index.keys = json.loads(str(saved['keys']))
+            rows = sparse.csr_matrix((saved['data'], saved['indices'], saved['indptr']),
+                                     shape=(len(saved['indptr']) - 1, len(index.vocabulary)))
+        if rows.shape[0]:
+            index.segments = [Segment(0, rows)]
+        return index
@@ -0,0 +1,178 @@
+import zlib
+from collections import defaultdict
+
+import numpy as np
+
+from similarity import jaccard_similarity, overlap_coefficient
+from similarity_matrix import tokenize
+
+# Hashes are (a * x + b) mod PRIME over 32-bit token hashes reduced mod
+# PRIME, so every product fits in 64 bits
+PRIME = (1 << 31) - 1
+# Token hashes taken per step in signatures(), bounding the num_perm x
+# tokens matrix of hash values
+HASH_BLOCK = 1 << 14
+
+SET_METRICS = {
+    'jaccard': jaccard_similarity,
+    'overlap': overlap_coefficient,
+}
+
+_token_hashes = {}
+
+
+def token_hash(token):
+    """A 32-bit hash of `token` that is the same in every process."""
+    value = _token_hashes.get(token)
+    if value is None:
+        value = _token_hashes[token] = zlib.crc32(token.encode('utf-8')) % PRIME
+    return value
+
+
+def permutations(num_perm, seed=1):
+    """The (a, b) coefficients of `num_perm` hash functions."""
+    rng = np.random.default_rng(seed)
+    return (rng.integers(1, PRIME, num_perm, dtype=np.uint64),
+            rng.integers(0, PRIME, num_perm, dtype=np.uint64))
+
+
+def signatures(token_sets, perms):
+    """The MinHash signature of every set of tokens, as rows of a uint32
+    array. An empty set gets PRIME in every position."""
+    a, b = perms
+    lengths = np.array([len(tokens) for tokens in token_sets], dtype=np.int64)
+    hashes = np.fromiter((token_hash(token) for tokens in token_sets for token in tokens),
+                         dtype=np.uint64, count=int(lengths.sum()))
+    result = np.full((len(token_sets), len(a)), PRIME, dtype=np.uint32)
+    starts = np.concatenate([[0], np.cumsum(lengths)])
+    # Whole sets per step, so each minimum is taken within one step
+    row = 0
+    while row < len(token_sets):
+        stop = max(int(np.searchsorted(starts, starts[row] + HASH_BLOCK, side='right')) - 1, row + 1)
+        stop = min(stop, len(token_sets))
+        rows = np.flatnonzero(lengths[row:stop]) + row
+        if len(rows):
+            values = (a[:, None] * hashes[None, starts[row]:starts[stop]] + b[:, None]) % np.uint64(PRIME)
+            result[rows] = np.minimum.reduceat(values, starts[rows] - starts[row], axis=1).T
+        row = stop
+    return result
+
+
+def integrate(values, start, stop):
+    # Trapezoidal rule over the last axis, for evenly spaced points
+    steps = values.shape[-1] - 1
+    return (values.sum(axis=-1) - (values[..., 0] + values[..., -1]) / 2) * (stop - start) / steps
+
+
+def optimal_bands(threshold, num_perm, false_positive_weight=0.2, steps=1000):
+    """The (bands, rows) with bands * rows <= num_perm that minimise the
+    weighted areas of false positives below and false negatives above
+    `threshold` on the S-curve 1 - (1 - s^rows)^bands. False positives
+    weigh less by default, as queries check candidates exactly anyway."""
+    shapes = np.array([(bands, rows) for bands in range(1, num_perm + 1)
+                       for rows in range(1, num_perm // bands + 1)], dtype=np.float64)
+    bands, rows = shapes[:, :1], shapes[:, 1:]
+    below = np.linspace(0, threshold, steps + 1)
+    above = np.linspace(threshold, 1, steps + 1)
+    false_positives = integrate(1 - (1 - below ** rows) ** bands, 0, threshold)
+    false_negatives = integrate((1 - above ** rows) ** bands, threshold, 1)
+    best = np.argmin(false_positive_weight * false_positives + (1 - false_positive_weight) * false_negatives)
+    return int(shapes[best, 0]), int(shapes[best, 1])
+
+
+class MinHashLSH:
+    """Banded LSH over MinHash signatures of the word sets of texts.
+
+    Texts whose signatures agree on all rows of any band are candidates;
+    their Jaccard similarity is about `threshold` or more with high
+    probability. Queries check candidates exactly with `metric` ('jaccard'
+    or 'overlap', as in similarity.py), so results never hold pairs below
+    the threshold but can miss a few above it. Texts can be added at any
+    time. Empty texts are stored but never returned, as both metrics are
+    undefined for them.
+    """
+
+    def __init__(self, threshold=0.8, num_perm=128, metric='jaccard', seed=1, false_positive_weight=0.2):
+        if metric not in SET_METRICS:
+            raise ValueError(f"Unknown metric '{metric}', expected one of {sorted(SET_METRICS)}")
+        self.threshold = threshold
+        self.metric = metric
+        self.similarity = SET_METRICS[metric]
+        self.perms = permutations(num_perm, seed)
+        self.bands, self.rows = optimal_bands(threshold, num_perm, false_positive_weight)
+        self.buckets = [defaultdict(list) for _ in range(self.bands)]
+        self.keys = []
+        self.sets = []
+
+    def __len__(self):
+        return len(self.keys)
+
+    def band_keys(self, signature):
+        data = signature.tobytes()
+        width = self.rows * signature.itemsize
+        return [data[band * width:(band + 1) * width] for band in range(self.bands)]
+
+    def add_many(self, texts, keys=None):
+        """Adds texts under `keys` (their positions in the index by default)."""
+        token_sets = [frozenset(tokenize(text)) for text in texts]
+        keys = range(len(self.keys), len(self.keys) + len(token_sets)) if keys is None else list(keys)
+        if len(keys) != len(token_sets):
+            raise ValueError(f"Got {len(keys)} keys for {len(token_sets)} texts")
+        for key, tokens, signature in zip(keys, token_sets, signatures(token_sets, self.perms)):
+            item = len(self.keys)
+            self.keys.append(key)
+            self.sets.append(tokens)
+            if tokens:
+                for bucket, band_key in zip(self.buckets, self.band_keys(signature)):
+                    bucket[band_key].append(item)
+
+    def add(self, text, key=None):
+        self.add_many([text], None if key is None else [key])
+
+    def candidates(self, tokens, signature):
+        found = set()
+        if tokens:
+            for bucket, band_key in zip(self.buckets, self.band_keys(signature)):
+                found.update(bucket.get(band_key, ()))
+        return found
+
+    def query_many(self, texts, threshold=None):
+        """For every text, the (key, similarity) of the stored texts at least
+        `threshold` similar to it, most similar first."""
+        threshold = self.threshold if threshold is None else threshold
+        token_sets = [frozenset(tokenize(text)) for text in texts]
+        results = []
+        for tokens, signature in zip(token_sets, signatures(token_sets, self.perms)):
+            matches = []
+            for item in self.candidates(tokens, signature):
+                score = self.similarity(tokens, self.sets[item])
+                if score >= threshold:
+                    matches.append((score, item))
+            matches.sort(key=lambda match: (-match[0], match[1]))
+            results.append([(self.keys[item], score) for score, item in matches])
+        return results
+
+    def query(self, text, threshold=None):
+        return self.query_many([text], threshold)[0]
+
+    def candidate_pairs(self):
+        """Every pair of stored items i < j sharing a bucket."""
+        pairs = set()
+        for bucket in self.buckets:
+            for items in bucket.values():
+                for x in range(len(items)):
+                    for y in range(x + 1, len(items)):
+                        pairs.add((items[x], items[y]))
+        return pairs
+
+    def similar_pairs(self, threshold=None):
+        """(key, key, similarity) of every stored pair at least `threshold`
+        similar, as similarity_matrix.similar_pairs() finds them exactly,
+        short of the pairs LSH misses."""
+        threshold = self.threshold if threshold is None else threshold
+        result = []
+        for i, j in sorted(self.candidate_pairs()):
+            score = self.similarity(self.sets[i], self.sets[j])
+            if score >= threshold:
+                result.append((self.keys[i], self.keys[j], score))
+        return result
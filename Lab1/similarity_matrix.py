@@ -0,0 +1,232 @@
+import numpy as np
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
+
+# Memory for one block of results, as rows * columns * ENTRY_BYTES
+BLOCK_MB = 64
+ENTRY_BYTES = 24
+
+
+def tokenize(text):
+    return text.lower().split()
+
+
+def document_term_matrix(texts, vocabulary=None):
+    """The sparse count matrix of `texts` (one row per text) and the
+    word -> column vocabulary. New words are added to `vocabulary`, so
+    matrices built with the same one line up (see align)."""
+    vocabulary = {} if vocabulary is None else vocabulary
+    indptr = [0]
+    indices = []
+    for text in texts:
+        indices += [vocabulary.setdefault(word, len(vocabulary)) for word in tokenize(text)]
+        indptr.append(len(indices))
+    matrix = sparse.csr_matrix((np.ones(len(indices)), np.array(indices, dtype=np.int64), indptr),
+                               shape=(len(indptr) - 1, len(vocabulary)))
+    matrix.sum_duplicates()
+    return matrix, vocabulary
+
+
+def align(matrix, vocabulary):
+    """`matrix` widened to every column of `vocabulary`."""
+    matrix = matrix.copy()
+    matrix.resize(matrix.shape[0], len(vocabulary))
+    return matrix
+
+
+# The metrics work elementwise on dot products (or intersection sizes) and
+# the matching row and column statistics, broadcasting like any ufunc
+def euclidean(products, row_norms, col_norms):
+    return np.sqrt(np.maximum(row_norms + col_norms - 2 * products, 0))
+
+
+def cosine(products, row_norms, col_norms):
+    return products / (np.sqrt(row_norms) * np.sqrt(col_norms))
+
+
+def jaccard(products, row_sizes, col_sizes):
+    return products / (row_sizes + col_sizes - products)
+
+
+def overlap(products, row_sizes, col_sizes):
+    return products / np.minimum(row_sizes, col_sizes)
+
+
+# name -> (operands, function of the products and the row/column statistics).
+# 'counts' compares count vectors through their dot products and squared
+# norms; 'sets' compares word sets through intersection and set sizes.
+METRICS = {
+    'euclidean': ('counts', euclidean),
+    'cosine': ('counts', cosine),
+    'jaccard': ('sets', jaccard),
+    'overlap': ('sets', overlap),
+}
+DISTANCES = {'euclidean'}
+
+
+def get_metric(name):
+    if name not in METRICS:
+        raise ValueError(f"Unknown metric '{name}', expected one of {sorted(METRICS)}")
+    return METRICS[name]
+
+
+def operands(matrix, kind):
+    """The matrix a metric multiplies and its per-row statistic."""
+    if kind == 'sets':
+        binary = matrix.copy()
+        binary.data[:] = 1
+        return binary, np.diff(binary.indptr).astype(np.float64)
+    return matrix, np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel()
+
+
+def row_blocks(costs, budget):
+    """(start, stop) ranges of rows whose costs add up to about `budget`,
+    with at least one row each."""
+    ends = np.cumsum(costs)
+    start = 0
+    while start < len(costs):
+        done = ends[start - 1] if start else 0
+        stop = max(int(np.searchsorted(ends, done + budget, side='right')), start + 1)
+        yield start, stop
+        start = stop
+
+
+def similarity_blocks(matrix, others=None, metric='cosine', block_mb=BLOCK_MB):
+    """Yields (start, block) where block is the dense similarity (distance for
+    euclidean) of rows start.. of `matrix` to every row of `others`, or of
+    `matrix` itself. Undefined values, like the cosine of an empty text, are
+    NaN. Blocks hold about `block_mb` MB."""
+    kind, function = get_metric(metric)
+    left, left_stats = operands(matrix, kind)
+    right, right_stats = (left, left_stats) if others is None else operands(others, kind)
+    right_t = right.T.tocsr()
+    budget = block_mb * 2**20 / ENTRY_BYTES
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for start, stop in row_blocks(np.full(left.shape[0], right.shape[0]), budget):
+            products = (left[start:stop] @ right_t).toarray()
+            yield start, function(products, left_stats[start:stop, None], right_stats[None, :])
+
+
+def similarity_matrix(texts, others=None, metric='cosine', block_mb=BLOCK_MB):
+    """The len(texts) x len(others) matrix of `metric` between every pair of
+    texts, or texts x texts without `others`."""
+    matrix, vocabulary = document_term_matrix(texts)
+    if others is not None:
+        others, vocabulary = document_term_matrix(others, vocabulary)
+        matrix = align(matrix, vocabulary)
+    blocks = [block for start, block in similarity_blocks(matrix, others, metric, block_mb)]
+    columns = matrix.shape[0] if others is None else others.shape[0]
+    return np.vstack(blocks) if blocks else np.empty((0, columns))
+
+
+def prefix_matrix(matrix, shares, bound):
+    """`matrix` with each row cut to its rarest words: a word is kept while
+    the `shares` (one per stored entry) of it and the words after it add up
+    to at least `bound`, so the words dropped from a row add up to less."""
+    document_frequency = np.diff(matrix.tocsc().indptr)
+    rarity = np.empty(matrix.shape[1], dtype=np.int64)
+    rarity[np.argsort(document_frequency, kind='stable')] = np.arange(matrix.shape[1])
+    sizes = np.diff(matrix.indptr)
+    row_ids = np.repeat(np.arange(matrix.shape[0]), sizes)
+    order = np.lexsort((rarity[matrix.indices], row_ids))
+    sorted_shares = shares[order]
+    # Shares of the words before each one in its row, then from it on
+    before = np.append(np.cumsum(sorted_shares) - sorted_shares, sorted_shares.sum())
+    before = before[:-1] - np.repeat(before[matrix.indptr[:-1]], sizes)
+    rest = np.repeat(np.add.reduceat(np.append(shares, 0), matrix.indptr[:-1]), sizes) - before
+    # A hair of slack, as keeping more is always safe
+    keep = np.sort(order[rest >= bound - 1e-9])
+    kept_rows = np.bincount(row_ids[keep], minlength=matrix.shape[0])
+    return sparse.csr_matrix((matrix.data[keep], matrix.indices[keep], np.append(0, np.cumsum(kept_rows))),
+                             shape=matrix.shape)
+
+
+def candidate_matrix(left, stats, metric, threshold):
+    """`left` cut to the words a pair must share to reach `threshold`.
+
+    Jaccard keeps the rarest words of each row until the rest are fewer
+    than threshold * |x|, cosine until the rest of the unit vector is
+    shorter than the threshold. If two such prefixes share no word, every
+    shared word is in the rest of the row whose prefix ends first in the
+    rarity order, which bounds the similarity below the threshold (prefix
+    filtering). Overlap has no such bound and keeps every word.
+    """
+    sizes = np.diff(left.indptr)
+    if metric == 'jaccard':
+        return prefix_matrix(left, np.repeat(1 / np.maximum(sizes, 1), sizes), threshold)
+    if metric == 'cosine':
+        shares = left.data ** 2 / np.repeat(np.where(stats > 0, stats, 1), sizes)
+        return prefix_matrix(left, shares, threshold ** 2)
+    return left
+
+
+def similar_pairs(matrix, metric='jaccard', threshold=0.5, block_mb=BLOCK_MB):
+    """(rows, cols, values) of every pair of rows i < j of `matrix` with a
+    similarity of at least `threshold` (a euclidean distance of at most).
+
+    For the similarity metrics and a positive threshold, texts sharing no
+    word can never qualify, so each block is a sparse product that only
+    holds the pairs sharing a word (among their rarest ones, see
+    candidate_matrix), and its size is bounded from the document
+    frequencies of those words. Candidates are then checked exactly. Euclidean distances
+    and thresholds <= 0 go through dense blocks.
+    """
+    kind, function = get_metric(metric)
+    if metric in DISTANCES or threshold <= 0:
+        return _dense_pairs(matrix, metric, threshold, block_mb)
+
+    left, stats = operands(matrix, kind)
+    probe = candidate_matrix(left, stats, metric, threshold)
+    transposed = probe.T.tocsr()
+    # Upper bound of the pairs each row takes part in: the number of rows
+    # holding each of its words, added up
+    document_frequency = np.diff(transposed.indptr)
+    costs = np.add.reduceat(np.append(document_frequency[probe.indices], 0), probe.indptr[:-1])
+    costs[np.diff(probe.indptr) == 0] = 0
+    budget = block_mb * 2**20 / ENTRY_BYTES
+    rows, cols, values = [], [], []
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for start, stop in row_blocks(costs, budget):
+            products = (probe[start:stop] @ transposed).tocoo()
+            i = products.row + start
+            upper = products.col > i
+            i, j, p = i[upper], products.col[upper], products.data[upper]
+            if probe is not left:
+                p = np.asarray(left[i].multiply(left[j]).sum(axis=1)).ravel()
+            scores = function(p, stats[i], stats[j])
+            keep = scores >= threshold
+            rows.append(i[keep])
+            cols.append(j[keep])
+            values.append(scores[keep])
+    return _concatenate(rows, cols, values)
+
+
+def _dense_pairs(matrix, metric, threshold, block_mb):
+    rows, cols, values = [], [], []
+    for start, block in similarity_blocks(matrix, None, metric, block_mb):
+        if metric in DISTANCES:
+            keep = block <= threshold
+        else:
+            keep = block >= threshold
+        keep &= np.arange(block.shape[1])[None, :] > np.arange(start, start + len(block))[:, None]
+        i, j = np.nonzero(keep)
+        rows.append(i + start)
+        cols.append(j)
+        values.append(block[i, j])
+    return _concatenate(rows, cols, values)
+
+
+def _concatenate(rows, cols, values):
+    if not rows:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0)
+    return np.concatenate(rows), np.concatenate(cols), np.concatenate(values)
+
+
+def duplicate_groups(texts, metric='jaccard', threshold=0.8, block_mb=BLOCK_MB):
+    """A cluster label per text: texts linked by a chain of pairs at least
+    `threshold` similar share a label."""
+    matrix, vocabulary = document_term_matrix(texts)
+    rows, cols, values = similar_pairs(matrix, metric, threshold, block_mb)
+    graph = sparse.coo_matrix((np.ones(len(rows)), (rows, cols)), shape=(matrix.shape[0],) * 2)
+    components, labels = connected_components(graph, directed=False)
+    return labels
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+from similarity_index import CosineIndex
+
+TEXTS = ["the cat sat on the mat", "a dog sat on a log", "the cat and the dog", "birds fly south"]
+
+
+def test_save_load_round_trips_keys(tmp_path):
+    index = CosineIndex()
+    index.add_many(TEXTS[:2], keys=['cat', 7])
+    index.add_many(TEXTS[2:])
+    path = tmp_path / 'index.npz'
+    index.save(path)
+
+    loaded = CosineIndex.load(path)
+    assert loaded.keys == ['cat', 7, 2, 3]
+    for text in TEXTS + ["the cat", "no shared words"]:
+        assert loaded.search(text) == index.search(text)
+
+
+@pytest.mark.parametrize('key', [('cat', 1), np.int64(1), None, 1.5])
+def test_other_keys_are_rejected_before_adding(key):
+    index = CosineIndex()
+    index.add_many(TEXTS[:2], keys=['cat', 'dog'])
+    with pytest.raises(ValueError):
+        index.add_many(TEXTS[2:], keys=['ok', key])
+    assert index.keys == ['cat', 'dog']
+    assert len(index) == 2 and not index.segments and len(index.pending) == 2
+
+
+@pytest.mark.parametrize('keys', [['x'], ['x', 'y', 'z']])
+def test_key_count_must_match_texts(keys):
+    index = CosineIndex()
+    index.add_many(TEXTS[:2], keys=['cat', 'dog'])
+    with pytest.raises(ValueError):
+        index.add_many(TEXTS[2:], keys=keys)
+    assert index.keys == ['cat', 'dog'] and len(index.pending) == 2
+    index.add(TEXTS[3], 'birds')
+    assert index.search("birds fly")[0][0] == 'birds'
@@ -0,0 +1,16 @@
+import pytest
+
+from similarity_lsh import MinHashLSH
+
+TEXTS = ["the cat sat on the mat", "a dog sat on a log", "birds fly south for the winter"]
+
+
+@pytest.mark.parametrize('keys', [['x'], ['x', 'y', 'z']])
+def test_key_count_must_match_texts(keys):
+    index = MinHashLSH(threshold=0.5)
+    index.add(TEXTS[0], 'cat')
+    with pytest.raises(ValueError):
+        index.add_many(TEXTS[1:], keys=keys)
+    assert index.keys == ['cat'] and len(index.sets) == 1
+    index.add_many(TEXTS[1:], keys=iter(['dog', 'birds']))
+    assert index.query(TEXTS[2]) == [('birds', 1.0)]
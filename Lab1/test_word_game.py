@@ -0,0 +1,63 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+import word_game
+from word_game import GameEngine
+
+
+@pytest.fixture
+def builds(monkeypatch):
+    """Stands in for TargetNeighbourhood: records each build and blocks
+    builds of 'slow' until the event is set."""
+    builds = SimpleNamespace(targets=[], release=threading.Event())
+
+    def build(target, score, distance):
+        builds.targets.append(target)
+        if target == 'slow':
+            assert builds.release.wait(5)
+        if target == 'broken':
+            raise RuntimeError("build failed")
+        return ('neighbourhood', target)
+
+    monkeypatch.setattr(word_game, 'TargetNeighbourhood', build)
+    return builds
+
+
+def test_other_targets_do_not_wait_for_a_build(builds):
+    engine = GameEngine()
+    assert engine.neighbourhood('dog') == ('neighbourhood', 'dog')
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(engine.neighbourhood('slow')))
+               for _ in range(4)]
+    for thread in threads:
+        thread.start()
+
+    # 'slow' is still building: a cached and a new target are both served
+    assert engine.neighbourhood('dog') == ('neighbourhood', 'dog')
+    assert engine.neighbourhood('cat') == ('neighbourhood', 'cat')
+    assert not results
+
+    builds.release.set()
+    for thread in threads:
+        thread.join(5)
+    assert results == [('neighbourhood', 'slow')] * 4
+    assert sorted(builds.targets) == ['cat', 'dog', 'slow']
+
+
+def test_neighbourhood_cache_is_bounded(builds):
+    engine = GameEngine(cache_size=2)
+    for target in ['a', 'b', 'a', 'c', 'a', 'b']:
+        engine.neighbourhood(target)
+    # 'b' was the least recently used when 'c' came in
+    assert builds.targets == ['a', 'b', 'c', 'b']
+    assert list(engine.neighbourhoods) == ['a', 'b']
+
+
+def test_failed_build_is_retried(builds):
+    engine = GameEngine()
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            engine.neighbourhood('broken')
+    assert builds.targets == ['broken', 'broken']
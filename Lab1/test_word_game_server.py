@@ -0,0 +1,57 @@
+import asyncio
+import gc
+import json
+
+from word_game import GameEngine
+from word_game_server import GameServer
+
+NO_GAME = {'status': 'error', 'message': "No game started, send 'start <word>' first"}
+
+
+async def send(port, *lines):
+    """The JSON replies to `lines` until the server closes the connection."""
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    for line in lines:
+        writer.write(line)
+    await writer.drain()
+    writer.write_eof()
+    output = await asyncio.wait_for(reader.read(), 5)
+    replies = [json.loads(line) for line in output.splitlines()]
+    writer.close()
+    return replies
+
+
+def run_server(*connections):
+    """Sends each tuple of lines on its own connection, one after another;
+    returns the replies and the errors the event loop reported."""
+    errors = []
+
+    async def main():
+        asyncio.get_running_loop().set_exception_handler(lambda loop, context: errors.append(context))
+        game_server = GameServer(GameEngine(distance=None), workers=1)
+        server = await asyncio.start_server(game_server.connection, '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        replies = [await send(port, *lines) for lines in connections]
+        server.close()
+        await server.wait_closed()
+        assert game_server.sessions == 0
+        # Handler tasks that died with an exception report it when freed
+        gc.collect()
+        return replies
+
+    return asyncio.run(main()), errors
+
+
+def test_invalid_utf8_gets_an_error_reply():
+    replies, errors = run_server((b'guess \xff\xfe\n', b'hint\n'))
+    assert replies == [[{'status': 'error', 'message': "Commands must be UTF-8 text"}, NO_GAME]]
+    assert not errors
+
+
+def test_line_over_the_limit_gets_an_error_reply():
+    long_line = b'guess ' + b'x' * (1 << 17) + b'\n'
+    replies, errors = run_server((long_line, b'hint\n'), (b'hint\n', long_line[:-1]))
+    # The rest of the long line is not read as commands
+    too_long = {'status': 'error', 'message': "Line too long"}
+    assert replies == [[too_long, NO_GAME], [NO_GAME, too_long]]
+    assert not errors
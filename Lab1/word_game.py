@@ -0,0 +1,205 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from wordnet_index import relation_index
+from wordnet_neighbourhood import DEFAULT_DISTANCE, TargetNeighbourhood
+from wordnet_similarity import path_similarity
+
+# Targets whose scored neighbourhoods are kept, shared by all sessions
+NEIGHBOURHOOD_CACHE = 256
+
+
+# ============================================
+# WORDNET FUNCTIONS
+# ============================================
+
+# The relations come from a precomputed index (see wordnet_index.py), so
+# each check is a set lookup instead of a walk over wn.synsets(word1)
+def check_synonym(word1, word2):
+    return relation_index().has('synonym', word1, word2)
+
+
+def check_hypernym(word1, word2):
+    return relation_index().has('hypernym', word1, word2)
+
+
+def check_hyponym(word1, word2):
+    return relation_index().has('hyponym', word1, word2)
+
+
+def check_antonym(word1, word2):
+    return relation_index().has('antonym', word1, word2)
+
+
+# The best path similarity over all pairs of synsets, from cached hypernym
+# closures (see wordnet_similarity.py) instead of one graph walk per pair
+def calculate_similarity(word1, word2):
+    return path_similarity().similarity(word1, word2)
+
+
+def get_feedback(similarity):
+    if similarity >= 0.9:
+        return "🔥 Extremely good connection"
+    elif similarity >= 0.7:
+        return "🎯 Very good connection!"
+    elif similarity >= 0.5:
+        return "👍 Good connection!"
+    elif similarity >= 0.3:
+        return "🤔 Some connection"
+    elif similarity >= 0.1:
+        return "😐 Weak connection"
+    else:
+        return "❌ Very distant"
+
+
+def calculate_points(similarity, relations):
+    base_points = int(similarity * 100) - 25
+
+    bonus = 0
+    if relations['synonym']:
+        bonus += 50
+    if relations['hypernym']:
+        bonus += 30
+    if relations['hyponym']:
+        bonus += 30
+    if relations['antonym']:
+        bonus += 20
+
+    return base_points + bonus
+
+
+def score_guess(target_word, guess):
+    similarity = calculate_similarity(target_word, guess)
+    relations = {
+        'synonym': check_synonym(target_word, guess),
+        'hypernym': check_hypernym(target_word, guess),
+        'hyponym': check_hyponym(target_word, guess),
+        'antonym': check_antonym(target_word, guess)
+    }
+    return similarity, relations, calculate_points(similarity, relations)
+
+
+def warm_up():
+    """Loads the relation index and the similarity engine, which would
+    otherwise happen on the first guess."""
+    calculate_similarity('dog', 'cat')
+    check_synonym('dog', 'cat')
+
+
+# ============================================
+# GAME STATE
+# ============================================
+
+class GameSession:
+    """One player's game on one target word. Front-ends only display what
+    guess() returns."""
+
+    def __init__(self, engine, target, neighbourhood):
+        self.engine = engine
+        self.target = target
+        self.neighbourhood = neighbourhood
+        self.total_score = 0
+        self.guesses = 0
+        self.guessed_words = set()
+
+    def guess(self, word):
+        """The outcome of guessing `word` as a dict. Its 'status' is 'empty',
+        'same' (the target itself), 'unknown' (not in WordNet), 'repeated'
+        or 'scored'; scored guesses also carry 'similarity', 'feedback',
+        'relations' and 'points'. Only scored guesses change the score."""
+        word = word.strip().lower()
+        result = {'word': word}
+        if not word:
+            result['status'] = 'empty'
+        elif word == self.target:
+            result['status'] = 'same'
+        elif not self.engine.known(word, self.neighbourhood):
+            result['status'] = 'unknown'
+        elif word in self.guessed_words:
+            result['status'] = 'repeated'
+        else:
+            if self.neighbourhood is None:
+                similarity, relations, points = score_guess(self.target, word)
+            else:
+                similarity, relations, points = self.neighbourhood.score(word)
+            self.guessed_words.add(word)
+            self.guesses += 1
+            self.total_score += points
+            result.update(status='scored', similarity=similarity, feedback=get_feedback(similarity),
+                          relations=relations, points=points)
+        result.update(total_score=self.total_score, guesses=self.guesses)
+        return result
+
+    def precomputed(self, word):
+        """Whether guess(word) is a lookup in the target's neighbourhood."""
+        return self.neighbourhood is not None and word.strip().lower() in self.neighbourhood
+
+    def hints(self, count=3):
+        """The best scoring related words not guessed yet; empty when the
+        engine does not precompute neighbourhoods."""
+        if self.neighbourhood is None:
+            return []
+        return self.neighbourhood.hints(self.guessed_words, count)
+
+
+class GameEngine:
+    """Starts game sessions. Every session of a process shares the relation
+    index and similarity caches, and sessions on the same target share its
+    scored neighbourhood, so the engine can serve many players at once.
+
+    distance=None scores every guess when it is made; otherwise the words
+    within `distance` hypernym/hyponym hops of the target are scored when
+    the first game on it starts, and give the hints.
+    """
+
+    def __init__(self, distance=DEFAULT_DISTANCE, cache_size=NEIGHBOURHOOD_CACHE):
+        self.distance = distance
+        self.cache_size = cache_size
+        # target -> Future of its neighbourhood, least recently used first
+        self.neighbourhoods = OrderedDict()
+        # Guards self.neighbourhoods only, never held during a build
+        self.lock = threading.Lock()
+
+    def neighbourhood(self, target):
+        """The scored neighbourhood of `target`, built once: other threads
+        asking for the same target wait for that build, and threads asking
+        for other targets never wait for it."""
+        if self.distance is None:
+            return None
+        future = self.neighbourhoods.get(target)
+        if future is not None and future.done():
+            try:
+                self.neighbourhoods.move_to_end(target)
+            except KeyError:
+                pass  # evicted by another thread meanwhile
+            return future.result()
+
+        with self.lock:
+            future = self.neighbourhoods.get(target)
+            build = future is None
+            if build:
+                future = self.neighbourhoods[target] = Future()
+                while len(self.neighbourhoods) > self.cache_size:
+                    self.neighbourhoods.popitem(last=False)
+        if build:
+            try:
+                future.set_result(TargetNeighbourhood(target, score_guess, self.distance))
+            except BaseException as error:
+                # Not cached, so the next game on the target tries again
+                with self.lock:
+                    if self.neighbourhoods.get(target) is future:
+                        del self.neighbourhoods[target]
+                future.set_exception(error)
+        return future.result()
+
+    def known(self, word, neighbourhood=None):
+        """Whether wn.synsets(word) is non-empty."""
+        return (neighbourhood is not None and word in neighbourhood) or relation_index().known(word)
+
+    def start(self, target):
+        """A new GameSession on `target`."""
+        target = target.strip().lower()
+        if not self.known(target):
+            raise ValueError(f"Word '{target}' not found in WordNet")
+        return GameSession(self, target, self.neighbourhood(target))
@@ -0,0 +1,125 @@
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from word_game import GameEngine, warm_up
+
+HOST = '127.0.0.1'
+PORT = 8765
+# Threads scoring guesses; sessions share the index and caches, so threads
+# rather than processes
+WORKERS = 4
+
+
+async def read_line(reader):
+    """The next line from an asyncio stream, b'' at its end. A line over the
+    stream limit is read to its end and dropped, then raises ValueError, so
+    the next line is still the next command."""
+    too_long = False
+    while True:
+        try:
+            line = await reader.readuntil(b'\n')
+        except asyncio.IncompleteReadError as error:
+            line = error.partial
+        except asyncio.LimitOverrunError as error:
+            await reader.readexactly(error.consumed)
+            too_long = True
+            continue
+        if too_long:
+            raise ValueError("Line too long")
+        return line
+
+
+class GameServer:
+    """The word association game over TCP, one session per connection.
+
+    Clients send one command per line and get one JSON object per line:
+
+        start <word>    starts a game on <word>
+        guess <word>    GameSession.guess(<word>)
+        hint            the best related words not guessed yet
+        quit            the final score, then the connection closes
+
+    WordNet work runs on a thread pool, so the event loop only moves lines
+    and thousands of connections can be open at once.
+    """
+
+    def __init__(self, engine=None, workers=WORKERS):
+        self.engine = GameEngine() if engine is None else engine
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.sessions = 0
+
+    async def run(self, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, function, *args)
+
+    async def handle(self, command, argument, session):
+        """(response, session) for one command."""
+        if command == 'start':
+            try:
+                session = await self.run(self.engine.start, argument)
+            except ValueError as error:
+                return {'status': 'error', 'message': str(error)}, session
+            return {'status': 'started', 'target': session.target}, session
+        if command in ('guess', 'hint', 'quit') and session is None:
+            return {'status': 'error', 'message': "No game started, send 'start <word>' first"}, session
+        if command == 'guess':
+            # Precomputed guesses are a dict lookup, cheaper than a hop to
+            # the thread pool
+            if session.precomputed(argument):
+                return session.guess(argument), session
+            return await self.run(session.guess, argument), session
+        if command == 'hint':
+            return {'status': 'hints', 'hints': await self.run(session.hints)}, session
+        if command == 'quit':
+            return {'status': 'over', 'total_score': session.total_score, 'guesses': session.guesses}, session
+        return {'status': 'error', 'message': f"Unknown command '{command}', "
+                                              f"expected one of ['guess', 'hint', 'quit', 'start']"}, session
+
+    async def reply(self, writer, response):
+        writer.write(json.dumps(response).encode('utf-8') + b'\n')
+        await writer.drain()
+
+    async def connection(self, reader, writer):
+        self.sessions += 1
+        session = None
+        try:
+            while True:
+                try:
+                    line = await read_line(reader)
+                    if not line:
+                        break
+                    command, _, argument = line.decode('utf-8').strip().partition(' ')
+                except UnicodeDecodeError:
+                    command, response = None, {'status': 'error', 'message': "Commands must be UTF-8 text"}
+                except ValueError as error:
+                    command, response = None, {'status': 'error', 'message': str(error)}
+                else:
+                    command = command.lower()
+                    response, session = await self.handle(command, argument, session)
+                await self.reply(writer, response)
+                if command == 'quit' and session is not None:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            self.sessions -= 1
+            writer.close()
+
+    async def start(self, host=HOST, port=PORT):
+        """Warms the engine up and starts listening; returns the asyncio
+        server (port=0 picks a free port)."""
+        await self.run(warm_up)
+        # The default backlog of 100 drops connections when thousands of
+        # clients connect at once
+        return await asyncio.start_server(self.connection, host, port, backlog=4096)
+
+
+async def serve(host=HOST, port=PORT):
+    server = await GameServer().start(host, port)
+    print(f"Word association game on {host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    asyncio.run(serve())
@@ -0,0 +1,127 @@
+import json
+import os
+import sys
+from collections import deque
+from functools import lru_cache
+
+from nltk.corpus import wordnet as wn
+
+# The relation sets of a record, in the order explore_word prints them
+RELATIONS = ('synonyms', 'antonyms', 'hypernyms', 'hyponyms', 'meronyms')
+# Words sent to a worker at a time
+CHUNK_SIZE = 256
+
+
+def lemma_names(synsets):
+    return {lemma.name() for synset in synsets for lemma in synset.lemmas()}
+
+
+@lru_cache(maxsize=1 << 16)
+def related_names(synset):
+    """The related lemma names of one synset. Words share synsets (every
+    lemma of a synset has it), so each is walked once per process."""
+    return {
+        'synonyms': lemma_names([synset]),
+        'antonyms': {ant.name() for lemma in synset.lemmas() for ant in lemma.antonyms()},
+        'hypernyms': lemma_names(synset.hypernyms()),
+        'hyponyms': lemma_names(synset.hyponyms()),
+        # Part (has parts), substance (made of) and member (has members)
+        'meronyms': lemma_names(synset.part_meronyms() + synset.substance_meronyms() +
+                                synset.member_meronyms()),
+    }
+
+
+def word_relations(word):
+    """Everything explore_word shows for `word` as one JSON-ready dict,
+    from a single wn.synsets(word) lookup: the synset count, the
+    definitions and the sorted synonyms, antonyms, hypernyms, hyponyms
+    and meronyms."""
+    synsets = wn.synsets(word)
+    record = {
+        'word': word,
+        'synsets': len(synsets),
+        'definitions': [f"{synset.name()}: {synset.definition()}" for synset in synsets],
+    }
+    for relation in RELATIONS:
+        names = set()
+        for synset in synsets:
+            names |= related_names(synset)[relation]
+        if relation == 'synonyms':
+            names.discard(word)
+        record[relation] = sorted(names)
+    return record
+
+
+def relations_chunk(words):
+    return [word_relations(word) for word in words]
+
+
+def chunks(words, size):
+    chunk = []
+    for word in words:
+        chunk.append(word)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def explore_words(words, workers=None, chunk_size=CHUNK_SIZE):
+    """Yields word_relations() of every word, in input order, from a pool
+    of `workers` processes (one per CPU by default). `words` can be any
+    iterable, such as the lines of a file; at most 2 * workers chunks are
+    in flight, so it is never fully held in memory."""
+    workers = workers or os.cpu_count() or 1
+    # Loaded before the pool starts, so forked workers inherit the corpus
+    # instead of each loading it again
+    wn.ensure_loaded()
+    if workers == 1:
+        for chunk in chunks(words, chunk_size):
+            yield from relations_chunk(chunk)
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for chunk in chunks(words, chunk_size):
+            pending.append(executor.submit(relations_chunk, chunk))
+            if len(pending) >= 2 * workers:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def write_jsonl(records, f):
+    """Writes one JSON object per line as they come; returns the count."""
+    count = 0
+    for record in records:
+        f.write(json.dumps(record, ensure_ascii=False) + '\n')
+        count += 1
+    return count
+
+
+def read_words(path):
+    """The non-empty lines of a word list file, stripped."""
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            word = line.strip()
+            if word:
+                yield word
+
+
+def explore_file(path, output_path, workers=None):
+    """Writes word_relations() of every word in the file at `path` to
+    `output_path` as JSON Lines; returns the number of words."""
+    with open(output_path, 'w', encoding='utf-8') as f:
+        return write_jsonl(explore_words(read_words(path), workers), f)
+
+
+if __name__ == "__main__":
+    # python wordnet_explore.py words.txt [output.jsonl], one word per line;
+    # without an output file the records go to stdout
+    if len(sys.argv) > 2:
+        explore_file(sys.argv[1], sys.argv[2])
+    else:
+        write_jsonl(explore_words(read_words(sys.argv[1])), sys.stdout)
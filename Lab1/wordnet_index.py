@@ -0,0 +1,238 @@
+import json
+import os
+import tempfile
+from functools import lru_cache
+from itertools import chain
+
+import numpy as np
+
+DEFAULT_CACHE = os.path.join(os.path.expanduser('~'), '.cache', 'dl4nlp', 'wordnet_relations.npz')
+# Bumped whenever the cache layout changes, so stale caches get rebuilt
+CACHE_VERSION = 2
+
+RELATIONS = ('synonym', 'hypernym', 'hyponym', 'antonym')
+# The parts of speech wn.synsets() looks words up in; adjective satellites
+# are indexed under 'a'
+POS_LIST = ('n', 'v', 'a', 'r')
+
+
+def synset_relations(synset):
+    """The lowercase lemma names each check_* function of the game compares
+    against, for one synset."""
+    return {
+        'synonym': {lemma.name().lower() for lemma in synset.lemmas()},
+        'hypernym': {lemma.name().lower() for hyper in synset.hypernyms() for lemma in hyper.lemmas()},
+        'hyponym': {lemma.name().lower() for hypo in synset.hyponyms() for lemma in hypo.lemmas()},
+        'antonym': {ant.name().lower() for lemma in synset.lemmas() for ant in lemma.antonyms()},
+    }
+
+
+def csr_arrays(lengths, ids):
+    """(offsets, ids) arrays for rows of `lengths` IDs each, row i owning
+    ids[offsets[i]:offsets[i + 1]]."""
+    return np.concatenate([[0], np.cumsum(lengths, dtype=np.int64)]), np.array(ids, dtype=np.int32)
+
+
+class RelationIndex:
+    """The four word relations of the association game as sets of lemma IDs.
+
+    Every (lemma, part of speech) entry of WordNet's index maps to the
+    union of synset_relations() over its synsets, so check_synonym(w1, w2)
+    is "is w2 in the synonym set of one of w1's entries". Words are resolved
+    to entries with WordNet's own morphology (exception lists, then suffix
+    rules), stored alongside, so the index answers exactly like walking
+    wn.synsets(w1) and never needs WordNet once built.
+
+    It also numbers every synset and keeps, per synset, its part of speech,
+    WordNet offset and is-a parents (hypernyms and instance hypernyms), and
+    per entry its synsets in WordNet's order, for wordnet_similarity.
+    """
+
+    def __init__(self, lemmas, entries, relations, exceptions, substitutions, synsets):
+        self.lemmas = lemmas
+        self.lemma_ids = {lemma: i for i, lemma in enumerate(lemmas)}
+        # (form, pos) -> entry number
+        self.entries = {entry: i for i, entry in enumerate(entries)}
+        self.entry_forms = [form for form, pos in entries]
+        # relation -> (offsets, ids), entry i owning ids[offsets[i]:offsets[i + 1]]
+        self.relations = relations
+        self.exceptions = exceptions
+        self.substitutions = substitutions
+        # name -> array: 'pos' (uint8 character codes), 'offset', the
+        # parents CSR 'parent_offsets'/'parent_ids' and the entry -> synset
+        # CSR 'entry_offsets'/'entry_ids'
+        self.synsets = synsets
+        self.word_entries = lru_cache(maxsize=1 << 16)(self._word_entries)
+        self.related = lru_cache(maxsize=1 << 12)(self._related)
+
+    @classmethod
+    def build(cls):
+        from nltk.corpus import wordnet as wn
+
+        lemmas = {}
+        entries = []
+        ids = {relation: [] for relation in RELATIONS}
+        lengths = {relation: [] for relation in RELATIONS}
+        by_synset = {}
+        numbers = {}
+        entry_ids = []
+        entry_lengths = []
+        for form in sorted(wn._lemma_pos_offset_map):
+            for pos in POS_LIST:
+                offsets = wn._lemma_pos_offset_map[form].get(pos)
+                if not offsets:
+                    continue
+                entries.append((form, pos))
+                names = {relation: set() for relation in RELATIONS}
+                for offset in offsets:
+                    if (pos, offset) not in by_synset:
+                        by_synset[pos, offset] = synset_relations(wn.synset_from_pos_and_offset(pos, offset))
+                    for relation, related in by_synset[pos, offset].items():
+                        names[relation] |= related
+                    entry_ids.append(numbers.setdefault((pos, offset), len(numbers)))
+                entry_lengths.append(len(offsets))
+                for relation in RELATIONS:
+                    related = sorted(lemmas.setdefault(name, len(lemmas)) for name in names[relation])
+                    ids[relation] += related
+                    lengths[relation].append(len(related))
+        relations = {relation: csr_arrays(lengths[relation], ids[relation]) for relation in RELATIONS}
+
+        parent_ids = []
+        parent_lengths = []
+        for pos, offset in numbers:
+            synset = wn.synset_from_pos_and_offset(pos, offset)
+            parents = synset.hypernyms() + synset.instance_hypernyms()
+            # Satellites are numbered under 'a', like in the lemma index
+            parent_ids += [numbers['a' if p.pos() == 's' else p.pos(), p.offset()] for p in parents]
+            parent_lengths.append(len(parents))
+        synsets = {
+            'pos': np.frombuffer(''.join(pos for pos, offset in numbers).encode('ascii'), dtype=np.uint8),
+            'offset': np.array([offset for pos, offset in numbers], dtype=np.int64),
+        }
+        synsets['parent_offsets'], synsets['parent_ids'] = csr_arrays(parent_lengths, parent_ids)
+        synsets['entry_offsets'], synsets['entry_ids'] = csr_arrays(entry_lengths, entry_ids)
+
+        exceptions = {pos: dict(wn._exception_map[pos]) for pos in POS_LIST}
+        substitutions = {pos: list(wn.MORPHOLOGICAL_SUBSTITUTIONS[pos]) for pos in POS_LIST}
+        return cls(list(lemmas), entries, relations, exceptions, substitutions, synsets)
+
+    def save(self, path):
+        directory = os.path.dirname(path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        arrays = {}
+        for relation, (offsets, ids) in self.relations.items():
+            arrays[relation + '_offsets'] = offsets
+            arrays[relation + '_ids'] = ids
+        for name, array in self.synsets.items():
+            arrays['synset_' + name] = array
+        # Written next to the final file and renamed, so readers never see
+        # half a cache
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            np.savez(f, version=np.array(CACHE_VERSION), lemmas=np.array('\n'.join(self.lemmas)),
+                     entries=np.array('\n'.join(f"{form} {pos}" for form, pos in self.entries)),
+                     morphology=np.array(json.dumps([self.exceptions, self.substitutions])), **arrays)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """The index saved at `path`, or None if it was saved by an older
+        version of this module."""
+        with np.load(path) as saved:
+            if 'version' not in saved or int(saved['version']) != CACHE_VERSION:
+                return None
+            lemmas = str(saved['lemmas']).split('\n')
+            entries = [tuple(line.rsplit(' ', 1)) for line in str(saved['entries']).split('\n')]
+            exceptions, substitutions = json.loads(str(saved['morphology']))
+            relations = {relation: (saved[relation + '_offsets'], saved[relation + '_ids'])
+                         for relation in RELATIONS}
+            synsets = {name[len('synset_'):]: saved[name] for name in saved.files if name.startswith('synset_')}
+        substitutions = {pos: [tuple(rule) for rule in rules] for pos, rules in substitutions.items()}
+        return cls(lemmas, entries, relations, exceptions, substitutions, synsets)
+
+    def forms(self, word, pos):
+        # As WordNetCorpusReader._morphy: the exception list, else one pass
+        # of suffix rules, then keep the forms WordNet has for `pos`
+        if word in self.exceptions[pos]:
+            candidates = self.exceptions[pos][word]
+        else:
+            candidates = [word[:-len(old)] + new for old, new in self.substitutions[pos] if word.endswith(old)]
+        return [form for form in dict.fromkeys([word] + candidates) if (form, pos) in self.entries]
+
+    def _word_entries(self, word):
+        word = word.lower()
+        return tuple(self.entries[form, pos] for pos in POS_LIST for form in self.forms(word, pos))
+
+    def word_synsets(self, word):
+        """The synset numbers of wn.synsets(word), in the same order."""
+        offsets, ids = self.synsets['entry_offsets'], self.synsets['entry_ids']
+        return [i for entry in self.word_entries(word) for i in ids[offsets[entry]:offsets[entry + 1]].tolist()]
+
+    def synset_number(self, pos, offset):
+        """The number of the synset at `offset` in the data file of `pos`."""
+        if not hasattr(self, '_numbers'):
+            keys = zip(self.synsets['pos'].tobytes().decode('ascii'), self.synsets['offset'].tolist())
+            self._numbers = {key: i for i, key in enumerate(keys)}
+        return self._numbers['a' if pos == 's' else pos, offset]
+
+    def inverse(self, name):
+        # The (offsets, ids) of the synset -> rows relation of one of the
+        # CSR arrays in self.synsets, built on first use
+        if not hasattr(self, '_inverse'):
+            self._inverse = {}
+        if name not in self._inverse:
+            offsets, ids = self.synsets[name + '_offsets'], self.synsets[name + '_ids']
+            rows = np.repeat(np.arange(len(offsets) - 1, dtype=np.int32), np.diff(offsets))
+            order = np.argsort(ids, kind='stable')
+            counts = np.bincount(ids, minlength=len(self.synsets['offset']))
+            self._inverse[name] = csr_arrays(counts, rows[order])
+        return self._inverse[name]
+
+    def children(self, synset):
+        """The synsets whose hypernym or instance hypernym `synset` is."""
+        offsets, ids = self.inverse('parent')
+        return ids[offsets[synset]:offsets[synset + 1]].tolist()
+
+    def parents(self, synset):
+        offsets, ids = self.synsets['parent_offsets'], self.synsets['parent_ids']
+        return ids[offsets[synset]:offsets[synset + 1]].tolist()
+
+    def synset_forms(self, synset):
+        """The lowercase lemma names of `synset`, as WordNet's index lists them."""
+        offsets, ids = self.inverse('entry')
+        return [self.entry_forms[entry] for entry in ids[offsets[synset]:offsets[synset + 1]].tolist()]
+
+    def known(self, word):
+        """Whether wn.synsets(word) is non-empty."""
+        return bool(self.word_entries(word))
+
+    def _related(self, word, relation):
+        offsets, ids = self.relations[relation]
+        return frozenset(chain.from_iterable(ids[offsets[entry]:offsets[entry + 1]].tolist()
+                                             for entry in self.word_entries(word)))
+
+    def has(self, relation, word1, word2):
+        """Whether `word2` is a `relation` of `word1`, as check_<relation>()."""
+        lemma = self.lemma_ids.get(word2.lower())
+        return lemma is not None and lemma in self.related(word1, relation)
+
+    def check_all(self, word1, word2):
+        """The relations dict the game passes to calculate_points()."""
+        return {relation: self.has(relation, word1, word2) for relation in RELATIONS}
+
+
+_index = None
+
+
+def relation_index(path=DEFAULT_CACHE):
+    """The process-wide RelationIndex, loaded from `path` or built from
+    WordNet (about 20 seconds) and saved there on first use."""
+    global _index
+    if _index is None:
+        if path is not None and os.path.exists(path):
+            _index = RelationIndex.load(path)
+        if _index is None:
+            _index = RelationIndex.build()
+            if path is not None:
+                _index.save(path)
+    return _index
@@ -0,0 +1,71 @@
+from wordnet_index import RELATIONS, relation_index
+
+# Hypernym/hyponym hops from the target's synsets scored at game start
+DEFAULT_DISTANCE = 2
+# Words scored at most, so very general targets ('entity') start quickly
+MAX_WORDS = 5000
+
+
+class TargetNeighbourhood:
+    """The scored guesses around a target word, computed at game start.
+
+    Every lemma of the synsets within `distance` hypernym/hyponym hops of
+    the target's synsets, and every word with one of the four relations to
+    it, is scored once with `score(target, word)`, which returns
+    (similarity, relations, points) as the game shows them. Guesses in the
+    table are then a dict lookup; any other word is scored on the spot with
+    the same function, so the results never differ.
+    """
+
+    def __init__(self, target, score, distance=DEFAULT_DISTANCE, max_words=MAX_WORDS):
+        self.target = target
+        self.score_function = score
+        self.scores = {}
+        for word in self.words(distance, max_words):
+            self.scores[word] = score(target, word)
+
+    def words(self, distance, max_words):
+        index = relation_index()
+        words = {}
+        for relation in RELATIONS:
+            for lemma in sorted(index.related(self.target, relation)):
+                words[index.lemmas[lemma]] = None
+        seen = set(index.word_synsets(self.target))
+        frontier = list(seen)
+        for _ in range(distance + 1):
+            for synset in frontier:
+                for form in index.synset_forms(synset):
+                    words[form] = None
+            if len(words) >= max_words:
+                break
+            following = []
+            for synset in frontier:
+                for neighbour in index.parents(synset) + index.children(synset):
+                    if neighbour not in seen:
+                        seen.add(neighbour)
+                        following.append(neighbour)
+            frontier = following
+        words.pop(self.target, None)
+        return list(words)[:max_words]
+
+    def __len__(self):
+        return len(self.scores)
+
+    def __contains__(self, word):
+        return word in self.scores
+
+    def score(self, word):
+        """(similarity, relations, points) of guessing `word`."""
+        result = self.scores.get(word)
+        if result is None:
+            result = self.scores[word] = self.score_function(self.target, word)
+        return result
+
+    def hints(self, guessed, count=3):
+        """The `count` best scoring related words not guessed yet."""
+        # A copy, as other threads may be scoring guesses into the table
+        scores = list(self.scores.items())
+        candidates = [(points, similarity, word) for word, (similarity, relations, points) in scores
+                      if word not in guessed and word != self.target and any(relations.values())]
+        candidates.sort(key=lambda candidate: (-candidate[0], -candidate[1], candidate[2]))
+        return [word for points, similarity, word in candidates[:count]]
@@ -0,0 +1,108 @@
+from collections import deque
+from functools import lru_cache
+
+import numpy as np
+
+from wordnet_index import relation_index
+
+# Hypernym closures kept per process; a guess touches a few dozen synsets
+CLOSURE_CACHE = 1 << 15
+# Targets whose ancestor tables are kept, one per game in play
+TARGET_CACHE = 1 << 8
+
+
+class PathSimilarity:
+    """Synset.path_similarity() over the synset graph of a RelationIndex.
+
+    The path between two synsets goes up to a common ancestor, so it is the
+    smallest d1 + d2 over the ancestors both closures share, each closure
+    mapping the synset and its (instance) hypernyms to their distance in
+    hops. Verbs, adjectives and adverbs have no single root; as NLTK does,
+    a pair with one of them also meets at a fake root one hop above the
+    furthest ancestor of each side. Closures are computed once and kept in
+    an LRU cache, and a word's ancestor table is kept for the target, so a
+    guess is one vectorised min-plus pass over all pairs of synsets.
+    """
+
+    def __init__(self, index, cache_size=CLOSURE_CACHE):
+        self.index = index
+        self.parent_offsets = index.synsets['parent_offsets']
+        self.parent_ids = index.synsets['parent_ids']
+        self.needs_root = index.synsets['pos'] != ord('n')
+        self.closure = lru_cache(maxsize=cache_size)(self._closure)
+        self.table = lru_cache(maxsize=TARGET_CACHE)(self._table)
+
+    def _closure(self, synset):
+        # Breadth first, so the first visit of an ancestor is its distance
+        distances = {}
+        queue = deque([(synset, 0)])
+        while queue:
+            current, depth = queue.popleft()
+            if current in distances:
+                continue
+            distances[current] = depth
+            parents = self.parent_ids[self.parent_offsets[current]:self.parent_offsets[current + 1]]
+            queue.extend((parent, depth + 1) for parent in parents.tolist())
+        return (np.fromiter(distances, dtype=np.int64, count=len(distances)),
+                np.fromiter(distances.values(), dtype=np.float64, count=len(distances)))
+
+    def synsets(self, word):
+        return tuple(dict.fromkeys(self.index.word_synsets(word)))
+
+    def _table(self, word):
+        """The synsets of `word`, the sorted union of their ancestors, the
+        synsets x ancestors distance matrix (inf where not an ancestor) and
+        the distance of each synset to its furthest ancestor."""
+        synsets = self.synsets(word)
+        closures = [self.closure(synset) for synset in synsets]
+        ancestors = np.unique(np.concatenate([ids for ids, distances in closures])) if closures else \
+            np.empty(0, dtype=np.int64)
+        table = np.full((len(synsets), len(ancestors)), np.inf)
+        for row, (ids, distances) in enumerate(closures):
+            table[row, np.searchsorted(ancestors, ids)] = distances
+        heights = np.array([distances.max() for ids, distances in closures])
+        return np.array(synsets, dtype=np.int64), ancestors, table, heights
+
+    def distances(self, word1, word2):
+        """The shortest path distance between every synset of `word1` and
+        every synset of `word2` (inf where there is none)."""
+        synsets1, ancestors, table, heights1 = self.table(word1)
+        synsets2 = self.synsets(word2)
+        if not len(synsets1) or not synsets2:
+            return np.empty((len(synsets1), len(synsets2)))
+        closures = [self.closure(synset) for synset in synsets2]
+        lengths = np.array([len(ids) for ids, distances in closures])
+        ids = np.concatenate([ids for ids, distances in closures])
+        distances = np.concatenate([distances for ids, distances in closures])
+        heights2 = np.maximum.reduceat(distances, np.cumsum(lengths) - lengths)
+
+        # Every (synset of word1, ancestor of a synset of word2) meeting
+        # point, then the nearest one per synset of word2
+        columns = np.minimum(np.searchsorted(ancestors, ids), len(ancestors) - 1)
+        shared = ancestors[columns] == ids
+        sums = np.where(shared, table[:, columns] + distances, np.inf)
+        result = np.minimum.reduceat(sums, np.cumsum(lengths) - lengths, axis=1)
+
+        rooted = self.needs_root[synsets1][:, None] | self.needs_root[list(synsets2)][None, :]
+        through_root = heights1[:, None] + heights2[None, :] + 2
+        return np.where(rooted, np.minimum(result, through_root), result)
+
+    def similarity(self, word1, word2):
+        """The best path_similarity() between a synset of `word1` and one of
+        `word2`, 0.0 if either is not in WordNet, as the game's
+        calculate_similarity()."""
+        distances = self.distances(word1, word2)
+        if not distances.size:
+            return 0.0
+        return float(1.0 / (distances.min() + 1))
+
+
+_similarity = None
+
+
+def path_similarity():
+    """The process-wide PathSimilarity over relation_index()."""
+    global _similarity
+    if _similarity is None:
+        _similarity = PathSimilarity(relation_index())
+    return _similarity
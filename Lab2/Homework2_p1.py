@@ -1,19 +1,22 @@
-from transformers import AutoTokenizer
 from collections import defaultdict
 
+from bpe import BPEEncoder, train_merges
+from bpe_counts import count_words
+from bpe_pretokenize import load_pre_tokenizer
+
+# "builtin" is a GPT-2 compatible byte-level pre-tokenizer that needs no
+# download; "gpt2" uses the one from Hugging Face transformers
+PRE_TOKENIZER = "builtin"
+
 print("hi")
 
 corpus = ["The man saw a car in the park", "I saw the man park the car"]
 
-tokenizer = AutoTokenizer.from_pretrained("gpt2")
+pre_tokenize = load_pre_tokenizer(PRE_TOKENIZER)
 
-word_freqs = defaultdict(int)
-
-for text in corpus:
-    words_with_offsets = tokenizer.backend_tokenizer.pre_tokenizer.pre_tokenize_str(text)
-    new_words = [word for word, offset in words_with_offsets]
-    for word in new_words:
-        word_freqs[word] += 1
+# For corpora on disk, bpe_counts.count_files() counts in worker processes
+# and can checkpoint the table so training restarts without recounting
+word_freqs = count_words(corpus, pre_tokenize)
 
 print(word_freqs)
 
@@ -80,34 +83,20 @@ print(splits["The"])
 
 vocab_size = 25
 
-while len(vocab) < vocab_size:
-    pair_freqs = compute_pair_freqs(splits)
-    best_pair = ""
-    max_freq = None
-    for pair, freq in pair_freqs.items():
-        if max_freq is None or max_freq < freq:
-            best_pair = pair
-            max_freq = freq
-    splits = merge_pair(*best_pair, splits)
+# Same merges as recomputing compute_pair_freqs and merge_pair every
+# iteration, but only the words containing the merged pair are revisited
+for best_pair in train_merges(word_freqs, splits, vocab_size - len(vocab)):
     merges[best_pair] = best_pair[0] + best_pair[1]
     vocab.append(best_pair[0] + best_pair[1])
 
 print(merges)
 
+# Applies the merges by rank with a per-word cache instead of replaying
+# every merge over every word
+encoder = BPEEncoder(vocab, merges, pre_tokenize)
+
 def tokenize(text):
-    pre_tokenize_result = tokenizer._tokenizer.pre_tokenizer.pre_tokenize_str(text)
-    pre_tokenized_text = [word for word, offset in pre_tokenize_result]
-    splits = [[l for l in word] for word in pre_tokenized_text]
-    for pair, merge in merges.items():
-        for idx, split in enumerate(splits):
-            i = 0
-            while i < len(split) - 1:
-                if split[i] == pair[0] and split[i + 1] == pair[1]:
-                    split = split[:i] + [merge] + split[i + 2 :]
-                else:
-                    i += 1
-            splits[idx] = split
-
-    return sum(splits, [])
+    return encoder.tokenize(text)
 
 print(tokenize("He likes the car"))
+print(encoder.encode("The man saw the car"))
@@ -0,0 +1,168 @@
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from bpe import BPEEncoder, train_merges
+from bpe_corpus import encode_files, load_encoded
+from bpe_counts import count_files, count_words
+from bpe_io import load_bpe, save_bpe
+from bpe_pretokenize import gpt2_pre_tokenize
+
+# Targets on a single CPU core
+COLD_START_TARGET_MS = 100  # import, train and encode the homework corpus
+ENCODE_TARGET_MB_S = 1.0
+
+WORDS = ("the man saw a car in park I it is was for on with as his they at be this from have "
+         "or by one had not but what all were when we there can an your which their said if do "
+         "will each about how up out them then she many some so these would other into has more "
+         "her two like him see time could no make than first been its who now people my made "
+         "over did down only way find use may water long little very after words called just").split()
+
+COLD_START = """
+from bpe import BPEEncoder, train_merges
+from bpe_counts import count_words
+from bpe_pretokenize import gpt2_pre_tokenize
+corpus = ["The man saw a car in the park", "I saw the man park the car"]
+word_freqs = count_words(corpus, gpt2_pre_tokenize)
+vocab = ["<|endoftext|>"] + sorted({c for word in word_freqs for c in word})
+splits = {word: list(word) for word in word_freqs}
+merges = {pair: pair[0] + pair[1] for pair in train_merges(word_freqs, splits, 25 - len(vocab))}
+BPEEncoder(vocab + list(merges.values()), merges, gpt2_pre_tokenize).encode("The man saw the car")
+"""
+
+
+def make_text(count, seed=0):
+    rng = random.Random(seed)
+    sentences = []
+    for _ in range(count):
+        words = [rng.choice(WORDS) for _ in range(rng.randint(3, 20))]
+        if rng.random() < 0.2:
+            words.insert(rng.randrange(len(words)), str(rng.randint(0, 2025)))
+        sentences.append(' '.join(words).capitalize() + rng.choice('.,!?') + "\n")
+    return ''.join(sentences)
+
+
+def train_encoder(text, num_merges=2000):
+    word_freqs = count_words([text])
+    vocab = ["<|endoftext|>"] + sorted({c for word in word_freqs for c in word})
+    splits = {word: list(word) for word in word_freqs}
+    merges = {pair: pair[0] + pair[1] for pair in train_merges(word_freqs, splits, num_merges)}
+    return BPEEncoder(vocab + list(merges.values()), merges, gpt2_pre_tokenize)
+
+
+def benchmark_cold_start(runs=5):
+    def best_of(code):
+        times = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, '-c', code], check=True, cwd=Path(__file__).parent)
+            times.append((time.perf_counter() - start) * 1000)
+        return min(times)
+
+    # Interpreter startup is the same with any tokenizer, so it is left out
+    elapsed_ms = best_of(COLD_START) - best_of('pass')
+    print(f"cold start:           {elapsed_ms:10.1f} ms "
+          f"(target {COLD_START_TARGET_MS} ms: {'ok' if elapsed_ms <= COLD_START_TARGET_MS else 'MISSED'})")
+    return elapsed_ms
+
+
+def benchmark_pre_tokenizer(texts):
+    """Compares with the Hugging Face GPT-2 pre-tokenizer when it is installed."""
+    try:
+        from tokenizers.pre_tokenizers import ByteLevel
+    except ImportError:
+        print("pre-tokenizer check:  skipped (tokenizers is not installed)")
+        return None
+    reference = ByteLevel(add_prefix_space=False, trim_offsets=True, use_regex=True)
+    mismatches = sum(gpt2_pre_tokenize(text) != [word for word, offset in reference.pre_tokenize_str(text)]
+                     for text in texts)
+    print(f"pre-tokenizer check:  {mismatches} mismatches in {len(texts)} texts")
+    return mismatches
+
+
+def benchmark_encode(encoder, text):
+    size_mb = len(text.encode('utf-8')) / 2**20
+    start = time.perf_counter()
+    encoder.encode(text)
+    rate = size_mb / (time.perf_counter() - start)
+    print(f"encode:               {rate:10.1f} MB/s "
+          f"(target {ENCODE_TARGET_MB_S} MB/s: {'ok' if rate >= ENCODE_TARGET_MB_S else 'MISSED'})")
+    return rate
+
+
+def write_files(directory, files, sentences_per_file):
+    paths = []
+    for i in range(files):
+        path = os.path.join(directory, f'{i}.txt')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(make_text(sentences_per_file, seed=100 + i))
+        paths.append(path)
+    return paths
+
+
+def benchmark_count_files(files=8, sentences_per_file=20000, workers=None):
+    with tempfile.TemporaryDirectory() as directory:
+        paths = write_files(directory, files, sentences_per_file)
+        size_mb = sum(os.path.getsize(path) for path in paths) / 2**20
+
+        start = time.perf_counter()
+        count_words(Path(path).read_text(encoding='utf-8') for path in paths)
+        serial = size_mb / (time.perf_counter() - start)
+        checkpoint = os.path.join(directory, 'word_freqs.json')
+        start = time.perf_counter()
+        word_freqs = count_files(paths, workers=workers, checkpoint=checkpoint, progress=False)
+        rate = size_mb / (time.perf_counter() - start)
+        start = time.perf_counter()
+        count_files(paths, checkpoint=checkpoint, progress=False)
+        resume_ms = (time.perf_counter() - start) * 1000
+    print(f"count_files:          {rate:10.1f} MB/s with {workers or os.cpu_count()} workers "
+          f"(serial {serial:.1f} MB/s, {len(word_freqs)} words, resumed in {resume_ms:.0f} ms)")
+    return rate
+
+
+def benchmark_encode_files(encoder, files=8, sentences_per_file=20000, workers=None):
+    with tempfile.TemporaryDirectory() as directory:
+        paths = write_files(directory, files, sentences_per_file)
+        size_mb = sum(os.path.getsize(path) for path in paths) / 2**20
+
+        out = os.path.join(directory, 'corpus.bin')
+        start = time.perf_counter()
+        encode_files(paths, out, encoder, workers=workers, progress=False)
+        rate = size_mb / (time.perf_counter() - start)
+        ids, offsets = load_encoded(out)
+        print(f"encode_files:         {rate:10.1f} MB/s with {workers or os.cpu_count()} workers "
+              f"({len(ids)} {ids.dtype} IDs in {len(offsets) - 1} documents)")
+    return rate
+
+
+def benchmark_load(encoder, runs=5):
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'model.bpe')
+        save_bpe(encoder, path)
+        times = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            load_bpe(path)
+            times.append((time.perf_counter() - start) * 1000)
+        size_kb = os.path.getsize(path) / 1024
+    print(f"load_bpe:             {min(times):10.1f} ms for {len(encoder.pairs)} merges ({size_kb:.0f} KB)")
+    return min(times)
+
+
+if __name__ == "__main__":
+    benchmark_cold_start()
+    samples = [make_text(20, seed) for seed in range(200)]
+    samples += [path.read_text(encoding='utf-8') for path in Path(__file__).parent.parent.rglob('*.py')]
+    benchmark_pre_tokenizer(samples)
+
+    start = time.perf_counter()
+    encoder = train_encoder(make_text(50000))
+    print(f"train 2000 merges:    {time.perf_counter() - start:10.2f} s")
+    benchmark_encode(encoder, make_text(100000, seed=1))
+    benchmark_count_files()
+    benchmark_encode_files(encoder)
+    benchmark_load(encoder)
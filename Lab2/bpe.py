@@ -0,0 +1,218 @@
+import heapq
+from collections import defaultdict
+from functools import lru_cache
+from itertools import chain
+
+
+def train_merges(word_freqs, splits, num_merges):
+    """Learns up to `num_merges` merges and applies them to `splits` in place.
+
+    Gives the same merges, in the same order, as recomputing every pair
+    frequency and taking the first most frequent pair of the scan on each
+    iteration. Pair counts and the words each pair occurs in are kept up to
+    date instead, so a merge only revisits the words containing it, and the
+    best pair comes from a heap whose stale entries are skipped when popped.
+
+    Ties go to the pair occurring first in the scan order (word order of
+    `word_freqs`, then left to right). An occurrence is identified by its word
+    index and the character offset of its left symbol, which merges never
+    change, so that order stays comparable across iterations.
+    """
+    words = list(word_freqs)
+    freqs = [word_freqs[word] for word in words]
+    symbols = [list(splits[word]) for word in words]
+    starts = []
+    for split in symbols:
+        offsets = []
+        offset = 0
+        for symbol in split:
+            offsets.append(offset)
+            offset += len(symbol)
+        starts.append(offsets)
+
+    pair_counts = defaultdict(int)
+    # pair -> {word index: occurrences in that word}
+    pair_words = defaultdict(dict)
+    first = {}
+    for w, split in enumerate(symbols):
+        for i in range(len(split) - 1):
+            pair = (split[i], split[i + 1])
+            pair_counts[pair] += freqs[w]
+            pair_words[pair][w] = pair_words[pair].get(w, 0) + 1
+            first.setdefault(pair, (w, starts[w][i]))
+
+    heap = [(-count, first[pair], pair) for pair, count in pair_counts.items()]
+    heapq.heapify(heap)
+
+    def first_occurrence(pair, w):
+        split = symbols[w]
+        for i in range(len(split) - 1):
+            if split[i] == pair[0] and split[i + 1] == pair[1]:
+                return w, starts[w][i]
+
+    merges = []
+    while len(merges) < num_merges:
+        while heap:
+            count, key, pair = heapq.heappop(heap)
+            if pair_counts.get(pair) == -count and first.get(pair) == key:
+                break
+        else:
+            break
+        merges.append(pair)
+        a, b = pair
+        merged = a + b
+
+        affected = sorted(pair_words[pair])
+        # Smallest new occurrence of every pair whose count changed
+        touched = {}
+
+        def remove(old_pair, w, freq):
+            pair_counts[old_pair] -= freq
+            words = pair_words[old_pair]
+            words[w] -= 1
+            if not words[w]:
+                del words[w]
+            touched.setdefault(old_pair, None)
+
+        def add(new_pair, w, freq, start):
+            pair_counts[new_pair] += freq
+            words = pair_words[new_pair]
+            words[w] = words.get(w, 0) + 1
+            if touched.get(new_pair) is None:
+                touched[new_pair] = (w, start)
+
+        for w in affected:
+            split = symbols[w]
+            offsets = starts[w]
+            freq = freqs[w]
+            new_split = []
+            new_offsets = []
+            # Only the pairs around each merge site change; a site directly
+            # followed by another one leaves their shared pair to the next
+            n = len(split)
+            copied = 0
+            i = 0
+            while True:
+                try:
+                    i = split.index(a, i, n - 1)
+                except ValueError:
+                    break
+                if split[i + 1] != b:
+                    i += 1
+                    continue
+                new_split += split[copied:i]
+                new_offsets += offsets[copied:i]
+                if new_split:
+                    remove((split[i - 1], a), w, freq)
+                    add((new_split[-1], merged), w, freq, new_offsets[-1])
+                remove(pair, w, freq)
+                if i + 2 < n and not (i + 3 < n and split[i + 2] == a and split[i + 3] == b):
+                    remove((b, split[i + 2]), w, freq)
+                    add((merged, split[i + 2]), w, freq, offsets[i])
+                new_split.append(merged)
+                new_offsets.append(offsets[i])
+                i = copied = i + 2
+            new_split += split[copied:]
+            new_offsets += offsets[copied:]
+            symbols[w] = new_split
+            starts[w] = new_offsets
+
+        affected_set = set(affected)
+        for changed, new_first in touched.items():
+            if pair_counts[changed] <= 0:
+                del pair_counts[changed]
+                del pair_words[changed]
+                first.pop(changed, None)
+                continue
+            old_first = first.get(changed)
+            if old_first is not None and old_first[0] in affected_set:
+                # The old first occurrence may be gone: look again in its
+                # word, or in the first word still holding the pair
+                w = old_first[0] if old_first[0] in pair_words[changed] else min(pair_words[changed])
+                old_first = first_occurrence(changed, w)
+            if old_first is None:
+                first[changed] = new_first
+            else:
+                first[changed] = old_first if new_first is None else min(old_first, new_first)
+            heapq.heappush(heap, (-pair_counts[changed], first[changed], changed))
+
+    for word, split in zip(words, symbols):
+        splits[word] = split
+    return merges
+
+
+class BPEEncoder:
+    """Applies learned merges by rank instead of replaying the merge list.
+
+    `merges` maps pairs to merged tokens in the order they were learned. A
+    word is encoded by repeatedly merging every occurrence of its
+    lowest-ranked pair, skipping ranks below the last one applied, which is
+    exactly what replaying the merges in order does. Results are kept in an
+    LRU cache per pre-token.
+    """
+
+    def __init__(self, vocab, merges, pre_tokenize, cache_size=1 << 16):
+        self._setup(vocab, list(merges), list(merges.values()), pre_tokenize, cache_size)
+
+    @classmethod
+    def from_pairs(cls, vocab, pairs, merged, pre_tokenize, cache_size=1 << 16):
+        """Like the constructor, with the merges as parallel lists of pairs
+        and merged tokens, which saves building the dict."""
+        encoder = cls.__new__(cls)
+        encoder._setup(vocab, pairs, merged, pre_tokenize, cache_size)
+        return encoder
+
+    def _setup(self, vocab, pairs, merged, pre_tokenize, cache_size):
+        self.pre_tokenize = pre_tokenize
+        self.pairs = pairs
+        self.ranks = dict(zip(self.pairs, range(len(self.pairs))))
+        self.merged = merged
+        self.id_to_token = list(vocab)
+        self.token_to_id = dict(zip(self.id_to_token, range(len(self.id_to_token))))
+        # Merges that never made it into the vocabulary still need an ID
+        for token in self.merged:
+            if token not in self.token_to_id:
+                self.token_to_id[token] = len(self.id_to_token)
+                self.id_to_token.append(token)
+        self.split_word = lru_cache(maxsize=cache_size)(self._split_word)
+        self.encode_word = lru_cache(maxsize=cache_size)(self._encode_word)
+
+    def _split_word(self, word):
+        symbols = list(word)
+        last = -1
+        while len(symbols) > 1:
+            best = None
+            for pair in zip(symbols, symbols[1:]):
+                rank = self.ranks.get(pair)
+                if rank is not None and rank > last and (best is None or rank < best):
+                    best = rank
+            if best is None:
+                break
+            a, b = self.pairs[best]
+            merged = []
+            i = 0
+            while i < len(symbols):
+                if i < len(symbols) - 1 and symbols[i] == a and symbols[i + 1] == b:
+                    merged.append(self.merged[best])
+                    i += 2
+                else:
+                    merged.append(symbols[i])
+                    i += 1
+            symbols = merged
+            last = best
+        return tuple(symbols)
+
+    def _encode_word(self, word):
+        # Raises KeyError for symbols that are not in the vocabulary
+        return tuple(self.token_to_id[token] for token in self.split_word(word))
+
+    def tokenize(self, text):
+        """The token strings of `text`, as tokenize() in Homework2_p1 gives them."""
+        return list(chain.from_iterable(map(self.split_word, self.pre_tokenize(text))))
+
+    def encode(self, text):
+        """The token IDs of `text`."""
+        return list(chain.from_iterable(map(self.encode_word, self.pre_tokenize(text))))
+
+    def decode(self, ids):
+        return ''.join(self.id_to_token[i] for i in ids)
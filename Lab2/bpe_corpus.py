@@ -0,0 +1,73 @@
+import os
+import time
+
+import numpy as np
+
+from bpe import BPEEncoder
+from bpe_counts import map_in_order, read_pieces
+
+
+def id_dtype(vocab_size):
+    return np.uint16 if vocab_size <= 1 << 16 else np.uint32
+
+
+_encoder = None
+
+
+def _init_worker(vocab, merges, pre_tokenize):
+    global _encoder
+    _encoder = BPEEncoder(vocab, merges, pre_tokenize)
+
+
+def _encode_piece(text):
+    return np.array(_encoder.encode(text), dtype=id_dtype(len(_encoder.id_to_token)))
+
+
+def map_pieces(pieces, encoder, workers):
+    """Encodes (document, text) pieces in a process pool, in input order."""
+    init_args = (encoder.id_to_token, dict(zip(encoder.pairs, encoder.merged)), encoder.pre_tokenize)
+    return map_in_order(_encode_piece, pieces, workers, _init_worker, init_args)
+
+
+def encode_files(paths, out, encoder, workers=None, chunk_size=1 << 20, progress=True):
+    """Encodes every file in `paths` (one document each) into `out`.
+
+    `out` receives the token IDs of all documents back to back, as uint16
+    when the vocabulary fits and uint32 otherwise, and `out + '.idx'` the
+    offsets of every document (document i is ids[offsets[i]:offsets[i + 1]]).
+    Read both with load_encoded(). The encoder's pre_tokenize must be
+    picklable, like gpt2_pre_tokenize, for workers > 1.
+    """
+    paths = list(paths)
+    workers = workers or os.cpu_count() or 1
+    dtype = id_dtype(len(encoder.id_to_token))
+    pieces = ((document, text) for document, path in enumerate(paths)
+              for text in read_pieces(path, chunk_size))
+    lengths = np.zeros(len(paths), dtype=np.int64)
+
+    start = time.perf_counter()
+    with open(out, 'wb') as f:
+        for document, ids in map_pieces(pieces, encoder, workers):
+            ids.tofile(f)
+            lengths[document] += len(ids)
+    offsets = np.concatenate([[0], np.cumsum(lengths)])
+    with open(out + '.idx', 'wb') as f:
+        np.savez(f, offsets=offsets, dtype=np.array(np.dtype(dtype).name))
+    if progress:
+        size_mb = sum(os.path.getsize(path) for path in paths) / 2**20
+        elapsed = time.perf_counter() - start
+        print(f"Encoded {len(paths)} files ({size_mb:.1f} MB) into {offsets[-1]} tokens "
+              f"in {elapsed:.1f}s ({size_mb / elapsed:.1f} MB/s)")
+    return offsets
+
+
+def load_encoded(out, mmap=True):
+    """The (ids, offsets) written by encode_files(); ids is memory-mapped."""
+    with np.load(out + '.idx') as index:
+        offsets = index['offsets']
+        dtype = np.dtype(str(index['dtype']))
+    if mmap:
+        ids = np.memmap(out, dtype=dtype, mode='r') if offsets[-1] else np.empty(0, dtype=dtype)
+    else:
+        ids = np.fromfile(out, dtype=dtype)
+    return ids, offsets
@@ -0,0 +1,195 @@
+import heapq
+import json
+import os
+import re
+import time
+from collections import Counter, deque
+
+from bpe_pretokenize import gpt2_pre_tokenize
+
+# A whitespace run followed by a non-space character always ends in a
+# pre-token of its own (\s+(?!\S) stops one short of the end), so cutting
+# right before a newline that precedes a non-space character never changes
+# how either side is pre-tokenized. That holds for blank lines and trailing
+# spaces too; cutting after the newline would not.
+SAFE_CUT_RE = re.compile(r'\n(?=\S)')
+
+
+def safe_cut(text, start=0):
+    """The last position from `start` on where `text` can be split without
+    changing its pre-tokens, or 0 if there is none."""
+    end = len(text)
+    while True:
+        newline = text.rfind('\n', max(start, 1), end)
+        if newline < 1:
+            return 0
+        if SAFE_CUT_RE.match(text, newline):
+            return newline
+        end = newline
+
+
+def read_pieces(path, chunk_size=1 << 20):
+    """Yields the text of one file in pieces of about `chunk_size` characters
+    that pre-tokenize exactly like the whole file. Text with no newline
+    before a non-space character (one huge line) stays in one piece."""
+    buffer = ''
+    with open(path, encoding='utf-8') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            # A cut needs the character after the newline, so only the last
+            # character of the old buffer is looked at again
+            scanned = max(len(buffer) - 1, 0)
+            buffer += chunk
+            cut = safe_cut(buffer, scanned)
+            if cut:
+                yield buffer[:cut]
+                buffer = buffer[cut:]
+    if buffer:
+        yield buffer
+
+
+def map_in_order(function, items, workers, initializer=None, initargs=()):
+    """Applies `function` to the values of (key, value) items in a process
+    pool and yields (key, result) in input order.
+
+    At most 2 * workers items are in flight, so the input is never fully
+    held in memory. With one worker everything runs in this process.
+    """
+    if workers == 1:
+        if initializer is not None:
+            initializer(*initargs)
+        for key, value in items:
+            yield key, function(value)
+        return
+
+    # Imported here, as it would double the start-up time of the homework
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=initializer, initargs=initargs) as pool:
+        in_flight = deque()
+        for key, value in items:
+            in_flight.append((key, pool.submit(function, value)))
+            if len(in_flight) >= 2 * workers:
+                key, future = in_flight.popleft()
+                yield key, future.result()
+        while in_flight:
+            key, future = in_flight.popleft()
+            yield key, future.result()
+
+
+def count_words(texts, pre_tokenize=gpt2_pre_tokenize):
+    """Pre-token frequencies of in-memory texts, in first-occurrence order."""
+    word_freqs = Counter()
+    for text in texts:
+        word_freqs.update(pre_tokenize(text))
+    return word_freqs
+
+
+def cap_words(word_freqs, max_words):
+    """The `max_words` most frequent words of `word_freqs`, keeping their
+    order; ties at the cut go to the words seen first."""
+    if len(word_freqs) <= max_words:
+        return word_freqs
+    threshold = heapq.nlargest(max_words, word_freqs.values())[-1]
+    room = max_words - sum(freq > threshold for freq in word_freqs.values())
+    capped = Counter()
+    for word, freq in word_freqs.items():
+        if freq > threshold:
+            capped[word] = freq
+        elif freq == threshold and room > 0:
+            capped[word] = freq
+            room -= 1
+    return capped
+
+
+def save_word_freqs(path, word_freqs, done=()):
+    """Writes a frequency table and the files already counted into it.
+
+    The file is replaced atomically, so an interrupted run leaves the
+    previous checkpoint intact.
+    """
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'done': list(done), 'word_freqs': word_freqs}, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def load_word_freqs(path):
+    """The (word_freqs, done) saved by save_word_freqs()."""
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    return Counter(data['word_freqs']), data['done']
+
+
+_pre_tokenize = None
+
+
+def _init_worker(pre_tokenize):
+    global _pre_tokenize
+    _pre_tokenize = pre_tokenize
+
+
+def _count_piece(text):
+    return Counter(_pre_tokenize(text))
+
+
+def count_files(paths, pre_tokenize=gpt2_pre_tokenize, workers=None, chunk_size=1 << 20,
+                checkpoint=None, max_words=None, min_count=1, progress=True):
+    """Pre-token frequencies of every file in `paths`, for train_merges().
+
+    Files are read in pieces (see read_pieces), pre-tokenized in a process
+    pool and merged in input order, so the table has the same words in the
+    same order as count_words() over the whole texts. pre_tokenize must be
+    picklable for workers > 1.
+
+    With `checkpoint`, the table is saved there after every file and a
+    later call resumes after the files it already holds; once all files are
+    in, nothing is recounted. With `max_words`, the table is cut back to the
+    most frequent words whenever it doubles that size, which bounds memory
+    but undercounts rare words that return after being dropped. Words seen
+    fewer than `min_count` times are left out of the result.
+    """
+    # As strings, so they are saved in and compared with the checkpoint
+    paths = [os.fspath(path) for path in paths]
+    workers = workers or os.cpu_count() or 1
+    word_freqs, done = Counter(), []
+    if checkpoint is not None and os.path.exists(checkpoint):
+        word_freqs, done = load_word_freqs(checkpoint)
+    already = set(done)
+    todo = [path for path in paths if path not in already]
+    counted = set()
+
+    start = time.perf_counter()
+    pieces = ((path, text) for path in todo for text in read_pieces(path, chunk_size))
+    current = None
+    for path, counts in map_in_order(_count_piece, pieces, workers, _init_worker, (pre_tokenize,)):
+        if path != current:
+            if current is not None:
+                done.append(current)
+                counted.add(current)
+                if checkpoint is not None:
+                    save_word_freqs(checkpoint, word_freqs, done)
+            current = path
+        word_freqs.update(counts)
+        if max_words is not None and len(word_freqs) > 2 * max_words:
+            word_freqs = cap_words(word_freqs, max_words)
+    if current is not None:
+        done.append(current)
+        counted.add(current)
+    # Empty files produce no pieces but are done all the same
+    done += [path for path in todo if path not in counted]
+    if checkpoint is not None and todo:
+        save_word_freqs(checkpoint, word_freqs, done)
+
+    if max_words is not None:
+        word_freqs = cap_words(word_freqs, max_words)
+    if min_count > 1:
+        word_freqs = Counter({word: freq for word, freq in word_freqs.items() if freq >= min_count})
+    if progress and todo:
+        size_mb = sum(os.path.getsize(path) for path in todo) / 2**20
+        elapsed = time.perf_counter() - start
+        print(f"Counted {len(todo)} files ({size_mb:.1f} MB) into {len(word_freqs)} words "
+              f"in {elapsed:.1f}s ({size_mb / elapsed:.1f} MB/s)")
+    return word_freqs
@@ -0,0 +1,107 @@
+import json
+import struct
+from array import array
+from itertools import accumulate
+
+from bpe import BPEEncoder
+from bpe_pretokenize import load_pre_tokenizer
+
+MAGIC = b'DLBPE\x00\x00\x01'
+SEPARATOR = '\x00'
+
+
+def save_bpe(encoder, path, pre_tokenizer="builtin"):
+    """Writes the token table and the merges of `encoder` to `path`.
+
+    Layout: MAGIC, uint32 header length, JSON header, all tokens as one
+    UTF-8 string separated by NUL (or, if a token contains one, preceded by
+    the uint32 character length of every token) and the merges in rank order
+    as (left, right, merged) token IDs (int32). `pre_tokenizer` is the name
+    load_pre_tokenizer() gives the encoder's pre_tokenize.
+    """
+    tokens = encoder.id_to_token
+    separated = not any(SEPARATOR in token for token in tokens)
+    lengths = array('I', [] if separated else map(len, tokens))
+    text = (SEPARATOR if separated else '').join(tokens).encode('utf-8')
+    token_to_id = encoder.token_to_id
+    merges = array('i')
+    for (a, b), merged in zip(encoder.pairs, encoder.merged):
+        merges.extend((token_to_id[a], token_to_id[b], token_to_id[merged]))
+    header = json.dumps({'tokens': len(tokens), 'separated': separated, 'text_bytes': len(text),
+                         'merges': len(encoder.pairs), 'pre_tokenizer': pre_tokenizer}).encode('utf-8')
+    with open(path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<I', len(header)))
+        f.write(header)
+        f.write(lengths.tobytes())
+        f.write(text)
+        f.write(merges.tobytes())
+
+
+def load_bpe(path, pre_tokenize=None, cache_size=1 << 16):
+    """Rebuilds the BPEEncoder written by save_bpe() without retraining.
+
+    The pre-tokenizer named in the file is used unless `pre_tokenize` is given.
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError(f"{path} is not a BPE model file")
+    header_length, = struct.unpack_from('<I', data, len(MAGIC))
+    offset = len(MAGIC) + 4
+    header = json.loads(data[offset:offset + header_length])
+    offset += header_length
+
+    lengths = array('I')
+    if not header['separated']:
+        lengths.frombytes(data[offset:offset + 4 * header['tokens']])
+        offset += 4 * header['tokens']
+    text = data[offset:offset + header['text_bytes']].decode('utf-8')
+    offset += header['text_bytes']
+    merges = array('i')
+    merges.frombytes(data[offset:offset + 12 * header['merges']])
+
+    if header['separated']:
+        tokens = text.split(SEPARATOR) if header['tokens'] else []
+    else:
+        ends = list(accumulate(lengths))
+        tokens = [text[end - length:end] for end, length in zip(ends, lengths)]
+    token = tokens.__getitem__
+    pairs = list(zip(map(token, merges[0::3]), map(token, merges[1::3])))
+    if pre_tokenize is None:
+        pre_tokenize = load_pre_tokenizer(header['pre_tokenizer'])
+    return BPEEncoder.from_pairs(tokens, pairs, list(map(token, merges[2::3])), pre_tokenize, cache_size)
+
+
+def export_tokenizer_json(encoder, path, special_tokens=("<|endoftext|>",)):
+    """Writes `encoder` as a Hugging Face tokenizer.json with GPT-2's
+    byte-level pre-tokenizer and decoder, loadable with
+    tokenizers.Tokenizer.from_file() or PreTrainedTokenizerFast."""
+    byte_level = {"type": "ByteLevel", "add_prefix_space": False, "trim_offsets": True, "use_regex": True}
+    tokenizer = {
+        "version": "1.0",
+        "truncation": None,
+        "padding": None,
+        "added_tokens": [
+            {"id": encoder.token_to_id[token], "content": token, "single_word": False, "lstrip": False,
+             "rstrip": False, "normalized": True, "special": True}
+            for token in special_tokens if token in encoder.token_to_id
+        ],
+        "normalizer": None,
+        "pre_tokenizer": byte_level,
+        "post_processor": dict(byte_level, trim_offsets=False),
+        "decoder": byte_level,
+        "model": {
+            "type": "BPE",
+            "dropout": None,
+            "unk_token": None,
+            "continuing_subword_prefix": "",
+            "end_of_word_suffix": "",
+            "fuse_unk": False,
+            "byte_fallback": False,
+            "vocab": encoder.token_to_id,
+            "merges": [f"{a} {b}" for a, b in encoder.pairs],
+        },
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(tokenizer, f, ensure_ascii=False)
@@ -0,0 +1,71 @@
+import re
+from functools import lru_cache
+
+try:
+    import regex
+except ImportError:
+    regex = None
+
+if regex is not None:
+    GPT2_SPLIT_RE = regex.compile(r"""'s|'t|'re|'ve|'m|'ll|'d| ?\p{L}+| ?\p{N}+| ?[^\s\p{L}\p{N}]+|\s+(?!\S)|\s+""")
+else:
+    # re has no \p{L}/\p{N}: letters become [^\W\d_] and numbers \d, which
+    # only differs from GPT-2 on the rare numerals outside \d (like ½)
+    GPT2_SPLIT_RE = re.compile(r"""'s|'t|'re|'ve|'m|'ll|'d| ?[^\W\d_]+| ?\d+| ?(?:[^\s\w]|_)+|\s+(?!\S)|\s+""")
+
+# The same split for ASCII text, with explicit classes so the faster re
+# engine matches it exactly (re's \s would also take \x1c-\x1f)
+ASCII_SPLIT_RE = re.compile(r"""'s|'t|'re|'ve|'m|'ll|'d| ?[a-zA-Z]+| ?[0-9]+| ?[^\t\n\x0b\x0c\r a-zA-Z0-9]+"""
+                            r"""|[\t\n\x0b\x0c\r ]+(?![^\t\n\x0b\x0c\r ])|[\t\n\x0b\x0c\r ]+""")
+
+
+def bytes_to_unicode():
+    """GPT-2's map from every byte to a printable character (space -> 'Ġ')."""
+    bs = list(range(ord("!"), ord("~") + 1)) + list(range(ord("¡"), ord("¬") + 1)) + list(range(ord("®"), ord("ÿ") + 1))
+    cs = bs[:]
+    n = 0
+    for b in range(256):
+        if b not in bs:
+            bs.append(b)
+            cs.append(256 + n)
+            n += 1
+    return dict(zip(bs, map(chr, cs)))
+
+
+# Applied to the UTF-8 bytes of a piece decoded as latin-1, one char per byte
+BYTE_TABLE = {b: c for b, c in bytes_to_unicode().items()}
+
+
+@lru_cache(maxsize=1 << 16)
+def byte_level(piece):
+    return piece.encode('utf-8').decode('latin-1').translate(BYTE_TABLE)
+
+
+def gpt2_pre_tokenize(text):
+    """The pre-tokens of `text` as GPT-2's byte-level pre-tokenizer gives them."""
+    split_re = ASCII_SPLIT_RE if text.isascii() else GPT2_SPLIT_RE
+    return list(map(byte_level, split_re.findall(text)))
+
+
+def hf_pre_tokenizer(name="gpt2"):
+    """The pre-tokenizer of a Hugging Face tokenizer, as a text -> words function."""
+    from transformers import AutoTokenizer
+
+    pre_tokenizer = AutoTokenizer.from_pretrained(name).backend_tokenizer.pre_tokenizer
+
+    def pre_tokenize(text):
+        return [word for word, offset in pre_tokenizer.pre_tokenize_str(text)]
+
+    return pre_tokenize
+
+
+PRE_TOKENIZERS = {
+    'builtin': lambda: gpt2_pre_tokenize,
+    'gpt2': hf_pre_tokenizer,
+}
+
+
+def load_pre_tokenizer(name="builtin"):
+    if name not in PRE_TOKENIZERS:
+        raise ValueError(f"Unknown pre-tokenizer '{name}', expected one of {sorted(PRE_TOKENIZERS)}")
+    return PRE_TOKENIZERS[name]()
@@ -0,0 +1,35 @@
+from bpe import BPEEncoder, train_merges
+from bpe_corpus import encode_files, load_encoded
+from bpe_counts import count_words, read_pieces
+from bpe_pretokenize import gpt2_pre_tokenize
+from test_bpe_counts import make_prose
+
+
+def train_encoder(text, num_merges=200):
+    word_freqs = count_words([text])
+    vocab = sorted({c for word in word_freqs for c in word})
+    splits = {word: list(word) for word in word_freqs}
+    merges = {pair: pair[0] + pair[1] for pair in train_merges(word_freqs, splits, num_merges)}
+    return BPEEncoder(vocab + list(merges.values()), merges, gpt2_pre_tokenize)
+
+
+def test_encode_files_streams_blank_line_paragraphs(tmp_path):
+    texts = [make_prose(5000, seed) for seed in range(2)]
+    paths = []
+    for i, text in enumerate(texts):
+        path = tmp_path / f'{i}.txt'
+        path.write_text(text, encoding='utf-8')
+        paths.append(path)
+    encoder = train_encoder(texts[0])
+    chunk_size = 1 << 14
+
+    # Bounded pieces, so no worker gets a whole file
+    for path in paths:
+        assert max(len(piece) for piece in read_pieces(path, chunk_size)) <= 2 * chunk_size
+
+    for workers in (1, 2):
+        out = str(tmp_path / f'ids{workers}.bin')
+        encode_files(paths, out, encoder, workers=workers, chunk_size=chunk_size, progress=False)
+        ids, offsets = load_encoded(out)
+        for document, text in enumerate(texts):
+            assert ids[offsets[document]:offsets[document + 1]].tolist() == encoder.encode(text)
@@ -0,0 +1,66 @@
+import random
+from pathlib import Path
+
+from bpe_counts import count_files, count_words, load_word_freqs, read_pieces, safe_cut
+from bpe_pretokenize import gpt2_pre_tokenize
+
+WORDS = "the cat sat on a mat , and it was n't there 's 12 dogs".split()
+
+
+def make_prose(paragraphs, seed=0):
+    """Paragraphs separated by blank lines, with trailing spaces on some
+    lines, so there is no '\\S\\n\\S' anywhere."""
+    rng = random.Random(seed)
+    parts = []
+    for _ in range(paragraphs):
+        lines = [' '.join(rng.choice(WORDS) for _ in range(rng.randint(3, 12))) + ' ' * rng.randint(0, 2)
+                 for _ in range(rng.randint(1, 4))]
+        parts.append(' \n'.join(lines))
+    return '\n\n'.join(parts) + '\n'
+
+
+def test_safe_cut_keeps_pre_tokens():
+    rng = random.Random(1)
+    for _ in range(2000):
+        text = ''.join(rng.choice(['a', 'b', ' ', '\n', '\t', '\r', '.', "'s", '1']) for _ in range(12))
+        cut = safe_cut(text)
+        if cut:
+            assert gpt2_pre_tokenize(text[:cut]) + gpt2_pre_tokenize(text[cut:]) == gpt2_pre_tokenize(text)
+
+
+def test_read_pieces_cuts_blank_line_paragraphs(tmp_path):
+    text = make_prose(20000)
+    path = tmp_path / 'prose.txt'
+    path.write_text(text, encoding='utf-8')
+    chunk_size = 1 << 14
+
+    pieces = list(read_pieces(path, chunk_size))
+    assert ''.join(pieces) == text
+    assert len(pieces) >= len(text) // (2 * chunk_size)
+    assert max(len(piece) for piece in pieces) <= 2 * chunk_size
+
+    expected = count_words([text])
+    for workers in (1, 2):
+        counts = count_files([path], workers=workers, chunk_size=chunk_size, progress=False)
+        assert counts == expected
+        assert list(counts) == list(expected)
+
+
+def test_count_files_resumes_with_paths(tmp_path):
+    texts = [make_prose(50, seed) for seed in range(3)]
+    paths = []
+    for i, text in enumerate(texts):
+        path = tmp_path / f'{i}.txt'
+        path.write_text(text, encoding='utf-8')
+        paths.append(path)
+    checkpoint = str(tmp_path / 'counts.json')
+
+    count_files(paths[:2], workers=1, checkpoint=checkpoint, progress=False)
+    word_freqs, done = load_word_freqs(checkpoint)
+    assert done == [str(path) for path in paths[:2]]
+    assert word_freqs == count_words(texts[:2])
+
+    # The first two files are not counted again
+    counts = count_files([Path(path) for path in paths], workers=1, checkpoint=checkpoint, progress=False)
+    assert counts == count_words(texts)
+    assert load_word_freqs(checkpoint)[1] == [str(path) for path in paths]
@@ -0,0 +1,175 @@
+import importlib.util
+import os
+import random
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from ngram_corpus import SentenceEncoder, sentence_words
+from ngram_store import Vocabulary
+
+# Throughput targets on a single CPU core
+SCORE_MANY_TARGET = 20000  # sentences per second
+LOAD_TARGET_MS = 50  # memory-mapped load
+PREDICT_P99_TARGET_MS = 1.0  # predict_next at a 200k-word vocabulary
+
+WORDS = ("românia este o țară frumoasă din europa limba română vorbită în "
+         "bucurești capitala inteligența artificială programare calculator "
+         "știință istorie cultură munte râu oraș și sau dar pentru care").split()
+
+
+def load_model_module():
+    # n-gram.py is not a valid module name, so load it from its path
+    path = Path(__file__).with_name('n-gram.py')
+    spec = importlib.util.spec_from_file_location('ngram', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def make_sentences(count, seed=0):
+    rng = random.Random(seed)
+    return [' '.join(rng.choice(WORDS) for _ in range(rng.randint(3, 20))).capitalize() + '.'
+            for _ in range(count)]
+
+
+def make_model(n=4, documents=50, sentences_per_document=2000):
+    module = load_model_module()
+    model = module.RomanianNGramModel(n=n, k=0.1)
+    model.train_stream([' '.join(make_sentences(sentences_per_document, seed))
+                        for seed in range(documents)])
+    return model
+
+
+def benchmark_scoring(model, count=20000):
+    sentences = make_sentences(count, seed=12345)
+
+    start = time.perf_counter()
+    for sentence in sentences[:count // 20]:
+        model.sentence_probability(sentence)
+    serial_rate = (count // 20) / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    model.score_many(sentences)
+    batched_rate = count / (time.perf_counter() - start)
+
+    print(f"sentence_probability: {serial_rate:10.0f} sentences/s")
+    print(f"score_many:           {batched_rate:10.0f} sentences/s "
+          f"(target {SCORE_MANY_TARGET}: {'ok' if batched_rate >= SCORE_MANY_TARGET else 'MISSED'})")
+    return batched_rate
+
+
+def benchmark_lookup(model, count=20000):
+    rng = random.Random(7)
+    queries = [(rng.choice(WORDS), tuple(rng.choice(WORDS) for _ in range(model.n - 1)))
+               for _ in range(count)]
+    rates = {}
+    for label, smoothing in (("counts", None), ("finalized", "addk")):
+        model.backoff = None
+        if smoothing:
+            model.finalize(smoothing)
+        start = time.perf_counter()
+        for word, context in queries:
+            model.get_probability(word, context, model.n)
+        rates[label] = count / (time.perf_counter() - start)
+        print(f"get_probability ({label}): {rates[label]:10.0f} queries/s")
+    return rates
+
+
+def make_large_vocab_documents(vocab_size=200000, documents=40, words_per_document=50000, seed=0):
+    rng = np.random.default_rng(seed)
+    letters = np.array(list("abcdefghijklmnopqrstuvwxyzăâîșț"))
+    words = sorted({''.join(rng.choice(letters, rng.integers(3, 10))) for _ in range(vocab_size)})
+    # Zipf-like word frequencies, sentences of 5-20 words
+    weights = 1 / np.arange(1, len(words) + 1)
+    weights /= weights.sum()
+    result = []
+    for _ in range(documents):
+        ids = rng.choice(len(words), size=words_per_document, p=weights)
+        cuts = np.cumsum(rng.integers(5, 20, size=words_per_document // 5))
+        sentences = np.split(ids, cuts[cuts < len(ids)])
+        result.append(' '.join(' '.join(words[i] for i in s) + '.' for s in sentences if len(s)))
+    return result
+
+
+def benchmark_predict_next(queries=2000):
+    module = load_model_module()
+    model = module.RomanianNGramModel(n=4, k=0.1)
+    documents = make_large_vocab_documents()
+    model.train_stream(documents)
+    model.finalize()
+
+    rng = random.Random(3)
+    sample = documents[0].split()
+    latencies = []
+    for _ in range(queries):
+        i = rng.randrange(3, len(sample))
+        context = ' '.join(sample[i - 3:i])
+        prefix = sample[i][:rng.randint(0, 2)] or None
+        start = time.perf_counter()
+        model.predict_next(context, 5, prefix)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    p50, p99 = np.percentile(latencies, [50, 99])
+    print(f"predict_next:         p50 {p50:.3f} ms, p99 {p99:.3f} ms at |V|={len(model.vocabulary)} "
+          f"(target p99 {PREDICT_P99_TARGET_MS} ms: {'ok' if p99 <= PREDICT_P99_TARGET_MS else 'MISSED'})")
+    return p99
+
+
+def benchmark_tokenizer(megabytes=20):
+    text = ' '.join(make_sentences(2000, seed=5)) + ' Citat[12] aici. '
+    text *= max(1, int(megabytes * 2**20 / len(text.encode('utf-8'))))
+    size_mb = len(text.encode('utf-8')) / 2**20
+
+    # The list-building path tokenize() used before: split, findall per
+    # sentence, then intern the token list
+    start = time.perf_counter()
+    tokens = []
+    for words in sentence_words(text):
+        tokens.append('<START>')
+        tokens.extend(words)
+        tokens.append('<END>')
+    before = Vocabulary().encode(tokens)
+    before_rate = size_mb / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    after = SentenceEncoder(Vocabulary()).encode(text)
+    after_rate = size_mb / (time.perf_counter() - start)
+
+    assert np.array_equal(before, after)
+    print(f"tokenize to IDs:      {before_rate:10.1f} MB/s before, {after_rate:.1f} MB/s after")
+    return before_rate, after_rate
+
+
+def benchmark_pruning(model, targets_mb=(4, 2, 1, 0.5)):
+    heldout = make_sentences(2000, seed=999)
+    rows = model.pruning_report(heldout, targets_mb)
+    model.backoff = None
+    return rows
+
+
+def benchmark_load(model):
+    module = load_model_module()
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'model.bin')
+        model.save(path)
+        start = time.perf_counter()
+        module.RomanianNGramModel.load(path, mmap=True)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        size_mb = os.path.getsize(path) / 2**20
+
+    print(f"load(mmap=True):      {elapsed_ms:10.1f} ms for {size_mb:.1f} MB "
+          f"(target {LOAD_TARGET_MS} ms: {'ok' if elapsed_ms <= LOAD_TARGET_MS else 'MISSED'})")
+    return elapsed_ms
+
+
+if __name__ == "__main__":
+    benchmark_tokenizer()
+    model = make_model()
+    benchmark_scoring(model)
+    benchmark_lookup(model)
+    benchmark_load(model)
+    benchmark_pruning(model)
+    benchmark_predict_next()
@@ -1,8 +1,17 @@
-import requests
-from bs4 import BeautifulSoup
-import re
-from collections import defaultdict
 import math
+import os
+
+import numpy as np
+
+from ngram_backoff import BackoffTables, backoff_from_addk, build_backoff
+from ngram_complete import CompletionIndex
+from ngram_corpus import SentenceEncoder, iter_documents, sentence_tokens, text_words
+from ngram_fetch import WikipediaFetcher
+from ngram_io import (backoff_arrays, decode_vocabulary, encode_vocabulary, read_arpa,
+                      read_arrays, write_arpa, write_arrays)
+from ngram_parallel import update_parallel
+from ngram_prune import prune_tables, tables_nbytes
+from ngram_store import CountTable, Vocabulary, make_count_store
 
 WIKIPEDIA_URLS = [
     "https://ro.wikipedia.org/wiki/România",
@@ -14,44 +23,25 @@ WIKIPEDIA_URLS = [
 
 
 class RomanianNGramModel:
-    def __init__(self, n=3, k=0.1):
+    def __init__(self, n=3, k=0.1, backend="array", fetcher=None):
         self.n = n
         self.k = k
-        # Need 3 levels: ngram_size -> context -> word -> count
-        self.ngrams = defaultdict(lambda: defaultdict(lambda: defaultdict(int))) # {n: {context: total_count}}
-        self.context_counts = defaultdict(lambda: defaultdict(int))
-        self.vocabulary = set()
+        self.backend = backend
+        self.fetcher = fetcher or WikipediaFetcher()
+        # Tokens are interned to integer IDs; counts live in a pluggable store
+        # ("array": sorted NumPy tables, "dict": nested dicts)
+        self.vocabulary = Vocabulary()
+        self.counts = make_count_store(backend, n)
         self.corpus_size = 0
+        # Precomputed probability tables from finalize() or an ARPA file;
+        # when set they take precedence over the counts for scoring
+        self.backoff = None
+        # Built by predict_next() on first use
+        self.completion_index = None
 
     def extract_text_from_wikipedia(self, url):
         try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-            }
-            response = requests.get(url, headers=headers, timeout=10)
-            response.raise_for_status()
-
-            soup = BeautifulSoup(response.content, 'html.parser')
-            content = soup.find('div', {'id': 'mw-content-text'})
-
-            if not content:
-                print(f"WARNING: Could not find 'mw-content-text' div in {url}")
-                print(f"Page title: {soup.find('title').get_text() if soup.find('title') else 'No title'}")
-                return ""
-
-            paragraphs = content.find_all('p')
-            if not paragraphs:
-                print(f"WARNING: Found content div but no paragraphs in {url}")
-                return ""
-
-            text_parts = []
-            for p in paragraphs:
-                p_text = p.get_text()
-                p_text = ' '.join(p_text.split())
-                if p_text:
-                    text_parts.append(p_text)
-
-            text = ' '.join(text_parts)
+            text = self.fetcher.fetch_text(url)
 
             # DEBUG: Show how much text we got
             print(f"  Extracted {len(text)} characters, {len(text.split())} words")
@@ -61,60 +51,237 @@ class RomanianNGramModel:
             print(f"Error fetching {url}: {e}")
             return ""
 
-    def tokenize(self, text):
-        text = text.lower()
-        # Get rid of any citations
-        text = re.sub(r'\[\d+\]', '', text)
-        sentences = re.split(r'[.!?]+', text)
-
-        tokens = []
-        for sentence in sentences:
-            words = re.findall(r'[a-zăâîșțĂÂÎȘȚ]+', sentence)
-            if words:
-                tokens.append('<START>')
-                tokens.extend(words)
-                tokens.append('<END>')
+    def fetch_texts(self, urls):
+        """extract_text_from_wikipedia for many URLs concurrently, in order."""
+        return self.fetcher.map(self.extract_text_from_wikipedia, urls)
 
-        return tokens
+    def tokenize(self, text):
+        # Lowercases, drops citations and splits on [.!?]
+        return sentence_tokens(text)
 
     def train(self, urls):
         print("Fetching and processing Wikipedia articles...")
         all_tokens = []
 
-        for url in urls:
+        for url, text in zip(urls, self.fetch_texts(urls)):
             print(f"Processing: {url}")
-            text = self.extract_text_from_wikipedia(url)
             tokens = self.tokenize(text)
             all_tokens.extend(tokens)
 
-        self.corpus_size = len(all_tokens)
-        self.vocabulary = set(all_tokens)
+        self.vocabulary = Vocabulary()
+        self.counts = make_count_store(self.backend, self.n)
+        self.backoff = None
+        self.completion_index = None
+        ids = self.vocabulary.encode(all_tokens)
+        self.corpus_size = len(ids)
         print(f"\nCorpus statistics:")
         print(f"  Total tokens: {self.corpus_size}")
         print(f"  Vocabulary size: {len(self.vocabulary)}")
 
         for ngram_size in range(1, self.n + 1):
             print(f"Building {ngram_size}-grams...")
-            for i in range(len(all_tokens) - ngram_size + 1):
-                ngram = tuple(all_tokens[i:i + ngram_size])
+            self.counts.add_ngrams(ngram_size, ids)
 
-                if ngram_size == 1:
-                    context = ()
-                    word = ngram[0]
-                else:
-                    context = ngram[:-1]
-                    word = ngram[-1]
+        print("Training complete!\n")
 
-                self.ngrams[ngram_size][context][word] += 1
-                self.context_counts[ngram_size][context] += 1
+    def train_stream(self, sources, flush_tokens=1 << 20, workers=None):
+        """Trains from scratch on local files, directories or an iterable of documents.
 
-        print("Training complete!\n")
+        Unlike train(), n-grams never cross document boundaries.
+        """
+        self.vocabulary = Vocabulary()
+        self.counts = make_count_store(self.backend, self.n)
+        self.corpus_size = 0
+        self.update(sources, flush_tokens, workers)
+
+    def update(self, sources, flush_tokens=1 << 20, workers=None):
+        """Folds more documents into the counts without retraining.
+
+        Documents are tokenized sentence by sentence and counted every
+        `flush_tokens` tokens, so memory does not grow with the corpus.
+        With `workers` set, shards are counted in a process pool instead and
+        merged into the same counts.
+        """
+        self.backoff = None
+        self.completion_index = None
+        if workers is not None:
+            shards = update_parallel(self, sources, workers)
+            print(f"Processed {shards} shards: {self.corpus_size} tokens, "
+                  f"vocabulary size {len(self.vocabulary)}")
+            return
+
+        documents = 0
+        encoder = SentenceEncoder(self.vocabulary)
+        for chunks in iter_documents(sources):
+            documents += 1
+            # The last n-1 tokens of a flushed buffer are kept as the prefix of
+            # the next one, so n-grams spanning a flush are counted exactly once
+            pieces = []
+            size = 0
+            carried = 0
+            for ids in encoder.iter_encode(chunks):
+                pieces.append(ids)
+                size += len(ids)
+                if size >= flush_tokens:
+                    buffer = np.concatenate(pieces)
+                    self._count_ids(buffer, carried)
+                    pieces = [buffer[max(0, len(buffer) - (self.n - 1)):]]
+                    size = carried = len(pieces[0])
+            if size > carried:
+                self._count_ids(np.concatenate(pieces), carried)
+
+        print(f"Processed {documents} documents: {self.corpus_size} tokens, "
+              f"vocabulary size {len(self.vocabulary)}")
+
+    def _count_ids(self, ids, carried=0):
+        self.corpus_size += len(ids) - carried
+        for ngram_size in range(1, self.n + 1):
+            # Skip n-grams that lie entirely inside the carried prefix
+            self.counts.add_ngrams(ngram_size, ids[max(0, carried - ngram_size + 1):])
+
+    def finalize(self, smoothing="addk", **options):
+        """Precomputes probabilities and backoff weights into flat tables.
+
+        Afterwards every query is one binary search per order, without
+        recursion. "addk" gives exactly the same probabilities as the counts
+        and "katz" their normalized backoff form; "stupid" (alpha=) and
+        "kneser-ney" (discounts=) are the alternatives.
+        Training or update() drops the tables again.
+        """
+        self.backoff = build_backoff(smoothing, self.counts, self.n, len(self.vocabulary), **options)
+        return self
+
+    def prune(self, min_counts=None, top_n=None, target_mb=None, smoothing="kneser-ney"):
+        """Prunes the finalized tables and renormalizes their backoff weights.
+
+        min_counts drops rare n-grams (an int for every order >= 2, or a dict
+        by order), top_n keeps the most probable successors per context and
+        target_mb applies entropy-based pruning until the tables fit. The
+        model is finalized with `smoothing` first unless it already holds
+        normalized tables. Save with include_counts=False to ship it.
+        """
+        if self.backoff is None or self.backoff.floors:
+            self.finalize(smoothing)
+        counts = None
+        if min_counts is not None:
+            counts = {}
+            for ngram_size in self.backoff.keys:
+                table = self.counts.table(ngram_size)
+                if table is None or len(table) != len(self.backoff.probs[ngram_size]):
+                    raise ValueError("min_counts needs the counts the tables were finalized from")
+                counts[ngram_size] = table.counts
+        self.backoff = prune_tables(self.backoff, counts, min_counts, top_n, target_mb)
+        self.completion_index = None
+        return self
+
+    def pruning_report(self, heldout, targets_mb, smoothing="kneser-ney"):
+        """Prints size and held-out perplexity for every target size in MB."""
+        if self.backoff is None or self.backoff.floors:
+            self.finalize(smoothing)
+        if not isinstance(heldout, (str, os.PathLike)):
+            heldout = list(heldout)
+        full = self.backoff
+        rows = []
+        try:
+            for target in [None] + list(targets_mb):
+                self.backoff = full if target is None else prune_tables(full, target_mb=target)
+                rows.append({
+                    'target_mb': target,
+                    'size_mb': tables_nbytes(self.backoff) / 2**20,
+                    'ngrams': {order: len(p) for order, p in sorted(self.backoff.probs.items())},
+                    'perplexity': self.perplexity(heldout),
+                })
+        finally:
+            self.backoff = full
+
+        print(f"{'target MB':>10} {'size MB':>9} {'perplexity':>11}  n-grams per order")
+        for row in rows:
+            target = 'full' if row['target_mb'] is None else f"{row['target_mb']:g}"
+            ngrams = ' '.join(str(count) for count in row['ngrams'].values())
+            print(f"{target:>10} {row['size_mb']:9.2f} {row['perplexity']:11.2f}  {ngrams}")
+        return rows
+
+    def save(self, path, include_counts=True):
+        """Saves vocabulary, per-order sorted count tables and their prefix
+        totals (plus any backoff tables) in one binary file for load()."""
+        metadata = {'n': self.n, 'k': self.k, 'corpus_size': self.corpus_size}
+        arrays = {'vocabulary': encode_vocabulary(self.vocabulary.id_to_token)}
+        for ngram_size in range(1, self.n + 1 if include_counts else 1):
+            table = self.counts.table(ngram_size)
+            if table is not None:
+                arrays[f'order{ngram_size}.keys'] = table.keys
+                arrays[f'order{ngram_size}.counts'] = table.counts
+                arrays[f'order{ngram_size}.cumulative'] = table.cumulative
+        if self.backoff is not None:
+            metadata['unk_prob'] = self.backoff.unk_prob
+            arrays.update(backoff_arrays(self.backoff))
+        write_arrays(path, metadata, arrays)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """Loads a model written by save(), memory-mapping its tables by default."""
+        metadata, arrays = read_arrays(path, mmap)
+        model = cls(n=metadata['n'], k=metadata['k'], backend="array")
+        model.vocabulary = Vocabulary(decode_vocabulary(arrays['vocabulary']))
+        model.corpus_size = metadata['corpus_size']
+        for ngram_size in range(1, model.n + 1):
+            if f'order{ngram_size}.keys' in arrays:
+                model.counts.tables[ngram_size] = CountTable(arrays[f'order{ngram_size}.keys'],
+                                                             arrays[f'order{ngram_size}.counts'],
+                                                             arrays[f'order{ngram_size}.cumulative'])
+        if 'unk_prob' in metadata:
+            model.backoff = BackoffTables(model.n, metadata['unk_prob'])
+            for ngram_size in range(1, model.n + 1):
+                if f'backoff{ngram_size}.keys' in arrays:
+                    model.backoff.add_order(ngram_size, arrays[f'backoff{ngram_size}.keys'],
+                                            arrays[f'backoff{ngram_size}.probs'],
+                                            arrays[f'backoff{ngram_size}.backoffs'],
+                                            arrays.get(f'backoff{ngram_size}.floors'))
+        return model
+
+    def export_arpa(self, path):
+        """Writes the model in ARPA format.
+
+        Seen n-grams keep their probabilities; the mass the add-k estimate
+        reserves for unseen words becomes standard backoff weights.
+        """
+        tables = self.backoff
+        if tables is None or tables.floors:
+            # ARPA has no floors, so add-k is exported in its normalized form
+            tables = backoff_from_addk(self.counts, self.n, len(self.vocabulary))
+        write_arpa(path, self.vocabulary.id_to_token, tables)
+
+    @classmethod
+    def load_arpa(cls, path):
+        """Builds a scoring-only model from an ARPA file."""
+        vocabulary = Vocabulary()
+        tables = read_arpa(path, vocabulary, BackoffTables)
+        model = cls(n=tables.n)
+        model.vocabulary = vocabulary
+        model.backoff = tables
+        return model
+
+    def memory_report(self):
+        report = self.counts.memory_report()
+        print(f"Memory usage ({self.backend} backend):")
+        print(f"  Vocabulary: {len(self.vocabulary)} tokens, {self.vocabulary.nbytes() / 2**20:.2f} MB")
+        for ngram_size, stats in report.items():
+            print(f"  {ngram_size}-grams: {stats['ngrams']} entries, {stats['contexts']} contexts, "
+                  f"{stats['bytes'] / 2**20:.2f} MB")
+        return report
 
     def get_probability(self, word, context, ngram_size):
+        word_id = self.vocabulary.lookup(word)
+        context_ids = tuple(self.vocabulary.lookup(token) for token in context)
+        if self.backoff is not None:
+            return self.backoff.probability(word_id, context_ids[len(context_ids) - (ngram_size - 1):])
+        return self._get_probability(word_id, context_ids, ngram_size)
+
+    def _get_probability(self, word, context, ngram_size):
         # Try current n-gram size
-        if context in self.context_counts[ngram_size]:
-            word_count = self.ngrams[ngram_size][context].get(word, 0)
-            context_total = self.context_counts[ngram_size][context]
+        found = self.counts.lookup(ngram_size, context, word)
+        if found is not None:
+            word_count, context_total = found
             vocab_size = len(self.vocabulary)
 
             # Add-k smoothing
@@ -130,29 +297,80 @@ class RomanianNGramModel:
         if ngram_size > 1 and len(context) > 0:
             # Use shorter context
             shorter_context = context[1:]  # Remove first word
-            return self.get_probability(word, shorter_context, ngram_size - 1)
+            return self._get_probability(word, shorter_context, ngram_size - 1)
 
         # Fallback to unigram probability
         if ngram_size == 1 or len(context) == 0:
-            word_count = self.ngrams[1][()].get(word, 0)
-            total_count = self.context_counts[1][()]
+            word_count, total_count = self.counts.lookup(1, (), word) or (0, 0)
             vocab_size = len(self.vocabulary)
             return (word_count + self.k) / (total_count + self.k * vocab_size)
 
         return self.k / (self.k * len(self.vocabulary))  # Unknown word
 
-    def sentence_probability(self, sentence):
-        tokens = self.tokenize(sentence)
+    def predict_next(self, context, k=5, prefix=None):
+        """Returns the k most probable next words as (word, probability) pairs.
+
+        `context` is the text typed so far (or a sequence of tokens) and
+        `prefix` the start of the word being typed. Candidates come from the
+        pre-sorted successor lists of every backoff order, merged highest
+        order first and then ranked by the model probability. Call finalize()
+        first for low latency.
+        """
+        if self.completion_index is None:
+            self.completion_index = self._build_completion_index()
+        index = self.completion_index
+
+        if isinstance(context, str):
+            context = ['<START>'] + text_words(context)
+        context_ids = tuple(self.vocabulary.lookup(t) for t in context)[max(0, len(context) - (self.n - 1)):]
+        ranks = index.rank_range(prefix.lower()) if prefix else None
+
+        candidates = []
+        seen = set()
+        for ngram_size in range(len(context_ids) + 1, 0, -1):
+            history = context_ids[len(context_ids) - (ngram_size - 1):]
+            for word in index.candidates(ngram_size, history, k, ranks):
+                if word not in seen:
+                    seen.add(word)
+                    candidates.append(word)
+        if not candidates:
+            return []
+
+        width = self.n - 1
+        words = np.array(candidates, dtype=np.int32)
+        contexts = np.full((len(words), width), -1, dtype=np.int32)
+        if context_ids:
+            contexts[:, width - len(context_ids):] = context_ids
+        orders = np.full(len(words), len(context_ids) + 1)
+        if self.backoff is not None:
+            probabilities = self.backoff.probability_many(words, contexts, orders)
+        else:
+            probabilities = self._count_probabilities(words, contexts, orders)
+
+        best = np.argsort(-probabilities, kind='stable')[:k]
+        return [(self.vocabulary.id_to_token[words[i]], float(probabilities[i])) for i in best]
+
+    def _build_completion_index(self):
+        tables = {}
+        for ngram_size in range(1, self.n + 1):
+            table = self.counts.table(ngram_size)
+            if table is not None:
+                tables[ngram_size] = (table.keys, table.counts)
+            elif self.backoff is not None and ngram_size in self.backoff.keys:
+                tables[ngram_size] = (self.backoff.keys[ngram_size], self.backoff.probs[ngram_size])
+        return CompletionIndex(tables, self.vocabulary.id_to_token)
 
-        # Remove START and END tokens for processing
-        tokens = [t for t in tokens if t not in ['<START>', '<END>']]
+    def sentence_probability(self, sentence, verbose=False):
+        # The words of every sentence, without START and END tokens
+        tokens = text_words(sentence)
 
         if not tokens:
             return 0.0
 
         log_prob = 0.0
-        print(f"\nCalculating probability for: '{sentence}'")
-        print(f"Tokens: {tokens}\n")
+        if verbose:
+            print(f"\nCalculating probability for: '{sentence}'")
+            print(f"Tokens: {tokens}\n")
 
         # Add START token at beginning
         tokens = ['<START>'] + tokens
@@ -167,19 +385,124 @@ class RomanianNGramModel:
             prob = self.get_probability(word, context, len(context) + 1)
             log_prob += math.log(prob)
 
-            print(f"  P({word} | {' '.join(context)}) = {prob:.6f}")
+            if verbose:
+                print(f"  P({word} | {' '.join(context)}) = {prob:.6f}")
 
-        print(f"\nLog probability: {log_prob:.4f}")
-        print(f"Probability: {math.exp(log_prob):.2e}")
+        if verbose:
+            print(f"\nLog probability: {log_prob:.4f}")
+            print(f"Probability: {math.exp(log_prob):.2e}")
 
         return log_prob
 
+    def _score_queries(self, sentences):
+        """Builds one (context, word, order) query per scored token.
+
+        Contexts are right-aligned in n-1 columns, so backing off to a shorter
+        context just means reading fewer trailing columns.
+        """
+        start = np.array([self.vocabulary.lookup('<START>')], dtype=np.int32)
+        encoder = SentenceEncoder(self.vocabulary, add=False)
+        lengths = []
+        flat = []
+        for sentence in sentences:
+            words = encoder.encode_words(sentence)
+            lengths.append(len(words))
+            flat.append(start)
+            flat.append(words)
+
+        lengths = np.array(lengths, dtype=np.int64)
+        flat = np.concatenate(flat) if flat else np.empty(0, dtype=np.int32)
+        # Every token except the leading <START> of each sentence is scored
+        sentence_starts = np.cumsum(lengths + 1) - (lengths + 1)
+        positions = np.ones(len(flat), dtype=bool)
+        positions[sentence_starts] = False
+        positions = np.flatnonzero(positions)
+        offsets = positions - np.repeat(sentence_starts, lengths)
+
+        width = self.n - 1
+        contexts = np.full((len(positions), width), -1, dtype=np.int32)
+        for j in range(1, width + 1):
+            valid = offsets >= j
+            contexts[valid, width - j] = flat[positions[valid] - j]
+        orders = np.minimum(offsets, width) + 1
+        return flat[positions], contexts, orders, lengths
+
+    def score_many(self, sentences):
+        """Returns the log-probability of every sentence as a NumPy array.
+
+        Gives the same values as sentence_probability() (up to float rounding
+        of the summation), but resolves the lookups of all sentences one order
+        at a time instead of recursing per token.
+        """
+        return self._score_batch(sentences)[0]
+
+    def _score_batch(self, sentences):
+        words, contexts, orders, lengths = self._score_queries(sentences)
+        if self.backoff is not None:
+            probabilities = self.backoff.probability_many(words, contexts, orders)
+        else:
+            probabilities = self._count_probabilities(words, contexts, orders)
+
+        log_probs = np.zeros(len(lengths))
+        scored = lengths > 0
+        if scored.any():
+            ends = np.cumsum(lengths)[scored]
+            log_probs[scored] = np.add.reduceat(np.log(probabilities), ends - lengths[scored])
+        return log_probs, lengths
+
+    def _count_probabilities(self, words, contexts, orders):
+        vocab_size = len(self.vocabulary)
+        probabilities = np.zeros(len(words))
+        for ngram_size in range(self.n, 0, -1):
+            active = np.flatnonzero(orders == ngram_size)
+            if not len(active):
+                continue
+            word_counts, context_totals, found = self.counts.lookup_many(
+                ngram_size, contexts[active, self.n - ngram_size:], words[active])
+            probabilities[active] = np.where(
+                word_counts > 0,
+                (word_counts + 0.001) / (context_totals + 0.001 * vocab_size),
+                1 / (context_totals + vocab_size))
+            missing = active[~found]
+            if ngram_size > 1:
+                # Backoff to lower-order n-gram
+                orders[missing] = ngram_size - 1
+            else:
+                # Fallback to unigram probability of an empty model
+                probabilities[missing] = self.k / (self.k * vocab_size)
+        return probabilities
+
+    def perplexity(self, source, batch_size=10000):
+        """Perplexity over held-out sentences, one per line of a file (or an iterable)."""
+        if isinstance(source, (str, os.PathLike)):
+            with open(source, encoding='utf-8') as f:
+                return self.perplexity(iter(f), batch_size)
+
+        total_log_prob = 0.0
+        total_tokens = 0
+        batch = []
+        for sentence in source:
+            batch.append(sentence)
+            if len(batch) >= batch_size:
+                log_probs, lengths = self._score_batch(batch)
+                total_log_prob += log_probs.sum()
+                total_tokens += int(lengths.sum())
+                batch = []
+        if batch:
+            log_probs, lengths = self._score_batch(batch)
+            total_log_prob += log_probs.sum()
+            total_tokens += int(lengths.sum())
+
+        return math.exp(-total_log_prob / total_tokens) if total_tokens else float('inf')
+
 
 if __name__ == "__main__":
     print("Initializing the Romanian 4-gram Language Model")
 
     model = RomanianNGramModel(n=4, k=0.1)
     model.train(WIKIPEDIA_URLS)
+    model.finalize()
+    model.memory_report()
 
     test_sentences = [
         "România este o țară frumoasă",
@@ -193,7 +516,7 @@ if __name__ == "__main__":
     print("=" * 60)
 
     for sentence in test_sentences:
-        model.sentence_probability(sentence)
+        model.sentence_probability(sentence, verbose=True)
         print("\n" + "-" * 60)
 
     # Interactive mode
@@ -208,6 +531,6 @@ if __name__ == "__main__":
             if user_sentence.lower() in ['quit', 'exit', 'q']:
                 break
             if user_sentence:
-                model.sentence_probability(user_sentence)
+                model.sentence_probability(user_sentence, verbose=True)
     except KeyboardInterrupt:
         print("\n\nExiting...")
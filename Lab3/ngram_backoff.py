@@ -0,0 +1,302 @@
+import numpy as np
+
+from ngram_store import find_row, find_rows, reduce_table
+
+
+class BackoffTables:
+    """Normalized backoff model: per-order sorted n-grams with probabilities
+    and backoff weights, the same information an ARPA file holds.
+
+    P(w | h) = prob(h w) if h w is stored, else backoff(h) * P(w | h[1:]).
+    A history can instead carry a floor, returned directly for words it has
+    never been followed by (the add-k behaviour); 0 means "no floor".
+    """
+
+    def __init__(self, n, unk_prob):
+        self.n = n
+        self.unk_prob = unk_prob
+        self.keys = {}
+        self.probs = {}
+        self.backoffs = {}
+        self.floors = {}
+        self.packed = {}
+
+    def add_order(self, order, keys, probs, backoffs=None, floors=None):
+        self.keys[order] = keys
+        self.probs[order] = probs
+        self.backoffs[order] = np.ones(len(probs)) if backoffs is None else backoffs
+        if floors is not None:
+            self.floors[order] = floors
+        self.packed.pop(order, None)
+
+    def packed_keys(self, order):
+        """(radix, contexts, rows) int64 search keys for one order, or None.
+
+        `contexts` holds every distinct history packed in base radix (which
+        keeps the lexicographic order) and `rows` holds
+        group * radix + word, so a lookup is two searchsorted calls.
+        Computed on first use; only possible while both fit in 63 bits.
+        """
+        if order not in self.packed:
+            keys = self.keys[order]
+            radix = int(keys.max()) + 1 if keys.size else 1
+            self.packed[order] = None
+            if radix ** (order - 1) < 2 ** 63 and keys.shape[1] * radix < 2 ** 63:
+                starts = context_groups(keys)
+                histories = self._pack(keys[:-1, starts].T, radix)
+                groups = np.repeat(np.arange(len(starts), dtype=np.int64),
+                                   np.diff(np.append(starts, keys.shape[1])))
+                self.packed[order] = (radix, histories, groups * radix + keys[-1])
+        return self.packed[order]
+
+    @staticmethod
+    def _pack(rows, radix):
+        packed = np.zeros(len(rows), dtype=np.int64)
+        for j in range(rows.shape[1]):
+            packed = packed * radix + rows[:, j]
+        return packed
+
+    def find(self, order, row):
+        packed = self.packed_keys(order)
+        if packed is None:
+            return find_row(self.keys[order], row)
+        radix, histories, rows = packed
+        key = 0
+        for token in row[:-1]:
+            if not 0 <= token < radix:
+                return -1
+            key = key * radix + token
+        group = int(histories.searchsorted(np.int64(key)))
+        if group == len(histories) or histories[group] != key or not 0 <= row[-1] < radix:
+            return -1
+        key = group * radix + row[-1]
+        i = int(rows.searchsorted(np.int64(key)))
+        return i if i < len(rows) and rows[i] == key else -1
+
+    def find_many(self, order, rows):
+        packed = self.packed_keys(order)
+        if packed is None:
+            return find_rows(self.keys[order], rows)
+        radix, histories, packed_rows = packed
+        if not len(packed_rows):
+            return np.full(len(rows), -1, dtype=np.int64)
+        valid = np.all((rows >= 0) & (rows < radix), axis=1)
+        rows = np.where(valid[:, None], rows, 0)
+        keys = self._pack(rows[:, :-1], radix)
+        groups = np.minimum(histories.searchsorted(keys), len(histories) - 1)
+        valid &= histories[groups] == keys
+        keys = groups * radix + rows[:, -1]
+        pos = np.minimum(packed_rows.searchsorted(keys), len(packed_rows) - 1)
+        return np.where(valid & (packed_rows[pos] == keys), pos, -1)
+
+    def probability(self, word, context):
+        weight = 1.0
+        for order in range(len(context) + 1, 0, -1):
+            context = context[len(context) - (order - 1):]
+            i = self.find(order, context + (word,)) if order in self.keys else -1
+            if i >= 0:
+                return weight * float(self.probs[order][i])
+            if order > 1 and order - 1 in self.keys:
+                j = self.find(order - 1, context)
+                if j >= 0:
+                    if order - 1 in self.floors and self.floors[order - 1][j] > 0:
+                        return weight * float(self.floors[order - 1][j])
+                    weight *= float(self.backoffs[order - 1][j])
+        return weight * self.unk_prob
+
+    def probability_many(self, words, contexts, orders):
+        """Vectorized probability(); `contexts` are right-aligned in n-1 columns."""
+        width = contexts.shape[1]
+        probabilities = np.zeros(len(words))
+        weights = np.ones(len(words))
+        pending = np.ones(len(words), dtype=bool)
+        for order in range(self.n, 0, -1):
+            active = np.flatnonzero(pending & (orders >= order))
+            if not len(active) or order not in self.keys:
+                continue
+            history = contexts[active, width - (order - 1):] if order > 1 else contexts[active, :0]
+            found = self.find_many(order, np.column_stack((history, words[active])))
+            hit = found >= 0
+            probabilities[active[hit]] = weights[active[hit]] * self.probs[order][found[hit]]
+            pending[active[hit]] = False
+            if order > 1 and order - 1 in self.keys:
+                missed = active[~hit]
+                found = self.find_many(order - 1, history[~hit])
+                if order - 1 in self.floors:
+                    floors = np.where(found >= 0, self.floors[order - 1][found], 0.0)
+                    floored = floors > 0
+                    probabilities[missed[floored]] = weights[missed[floored]] * floors[floored]
+                    pending[missed[floored]] = False
+                    missed, found = missed[~floored], found[~floored]
+                weights[missed] *= np.where(found >= 0, self.backoffs[order - 1][found], 1.0)
+        probabilities[pending] = weights[pending] * self.unk_prob
+        return probabilities
+
+
+def context_groups(keys):
+    """Start index of every run of equal contexts (all but the last row)."""
+    if keys.shape[0] == 1:
+        return np.zeros(1, dtype=np.int64)
+    prefix = keys[:-1]
+    changed = np.any(prefix[:, 1:] != prefix[:, :-1], axis=0)
+    return np.flatnonzero(np.concatenate(([True], changed)))
+
+
+def history_rows(tables, order, group_starts):
+    """Rows of the order-1 table holding each context group's history."""
+    histories = tables.keys[order][:-1, group_starts].T
+    return find_rows(tables.keys[order - 1], histories)
+
+
+def group_totals(table):
+    """Context group starts and, per n-gram, the total count of its context."""
+    starts = context_groups(table.keys)
+    ends = np.append(starts[1:], len(table))
+    totals = table.cumulative[ends] - table.cumulative[starts]
+    return starts, np.repeat(totals, ends - starts)
+
+
+def lower_probabilities(tables, keys, n):
+    """P(w | h[1:]) under the orders built so far, for every column h w of keys."""
+    order = keys.shape[0]
+    right_aligned = np.full((keys.shape[1], n - 1), -1, dtype=np.int32)
+    right_aligned[:, n - order + 1:] = keys[1:-1].T
+    return tables.probability_many(keys[-1], right_aligned, np.full(keys.shape[1], order - 1))
+
+
+def backoff_from_addk(counts, n, vocab_size):
+    """Katz-style normalization of the model's add-k estimates.
+
+    Stored n-grams keep exactly the probability RomanianNGramModel gives them;
+    the mass reserved for unseen words is redistributed through backoff
+    weights instead of the flat 1 / (total + |V|) floor.
+    """
+    unigrams = counts.table(1)
+    total = int(unigrams.cumulative[-1]) if unigrams is not None else 0
+    tables = BackoffTables(n, 1 / (total + vocab_size) if total + vocab_size else 0.0)
+    for order in range(1, n + 1):
+        table = counts.table(order)
+        if table is None:
+            break
+        starts, context_totals = group_totals(table)
+        probs = (table.counts + 0.001) / (context_totals + 0.001 * vocab_size)
+        tables.add_order(order, table.keys, probs)
+        if order > 1:
+            left_over = 1.0 - np.add.reduceat(probs, starts)
+            lower_left_over = 1.0 - np.add.reduceat(lower_probabilities(tables, table.keys, n), starts)
+            weights = np.where(lower_left_over > 0,
+                               left_over / np.where(lower_left_over > 0, lower_left_over, 1.0), 1.0)
+            rows = history_rows(tables, order, starts)
+            tables.backoffs[order - 1][rows[rows >= 0]] = weights[rows >= 0]
+    return tables
+
+
+def addk_tables(counts, n, vocab_size):
+    """The model's own estimate, precomputed.
+
+    A seen context gives (c + 0.001) / (total + 0.001 |V|) for seen words and
+    a floor of 1 / (total + |V|) for the rest; unseen contexts back off.
+    """
+    unigrams = counts.table(1)
+    total = int(unigrams.cumulative[-1]) if unigrams is not None else 0
+    tables = BackoffTables(n, 1 / (total + vocab_size) if total + vocab_size else 0.0)
+    for order in range(1, n + 1):
+        table = counts.table(order)
+        if table is None:
+            break
+        starts, context_totals = group_totals(table)
+        tables.add_order(order, table.keys,
+                         (table.counts + 0.001) / (context_totals + 0.001 * vocab_size))
+        if order > 1:
+            rows = history_rows(tables, order, starts)
+            floors = np.zeros(len(tables.probs[order - 1]))
+            floors[rows[rows >= 0]] = 1 / (context_totals[starts][rows >= 0] + vocab_size)
+            tables.floors[order - 1] = floors
+    return tables
+
+
+def stupid_backoff_tables(counts, n, vocab_size, alpha=0.4):
+    """Stupid backoff (Brants et al., 2007): relative frequencies, times
+    `alpha` per backoff step. Scores are not normalized."""
+    unigrams = counts.table(1)
+    total = int(unigrams.cumulative[-1]) if unigrams is not None else 0
+    # Unknown words would otherwise score zero
+    tables = BackoffTables(n, 1 / (total + vocab_size) if total + vocab_size else 0.0)
+    for order in range(1, n + 1):
+        table = counts.table(order)
+        if table is None:
+            break
+        starts, context_totals = group_totals(table)
+        tables.add_order(order, table.keys, table.counts / context_totals)
+        if order > 1:
+            rows = history_rows(tables, order, starts)
+            tables.backoffs[order - 1][rows[rows >= 0]] = alpha
+    return tables
+
+
+def continuation_counts(counts, order, table):
+    """N1+(. h w) for every row of `table`, the number of distinct words
+    seen before h w. N-grams only ever seen at a document start keep their
+    raw count, as KenLM does for <s>-initial n-grams."""
+    higher = counts.table(order + 1)
+    result = np.zeros(len(table), dtype=np.int64)
+    if higher is not None:
+        suffixes, extensions = reduce_table(higher.keys[1:], np.ones(len(higher), dtype=np.int64))
+        rows = find_rows(table.keys, suffixes.T)
+        result[rows[rows >= 0]] = extensions[rows >= 0]
+    return np.where(result > 0, result, table.counts)
+
+
+def kn_discount(counts):
+    n1 = np.count_nonzero(counts == 1)
+    n2 = np.count_nonzero(counts == 2)
+    return n1 / (n1 + 2 * n2) if n1 and n2 else 0.5
+
+
+def kneser_ney_tables(counts, n, vocab_size, discounts=None):
+    """Interpolated Kneser-Ney, stored in backoff form.
+
+    Stored n-grams hold the fully interpolated probability and each history
+    h holds gamma(h) = D * N1+(h .) / c(h), so unseen words get
+    gamma(h) * P(w | h[1:]). Lower orders use continuation counts and the
+    unigrams interpolate with the uniform distribution over the vocabulary.
+    `discounts` maps order -> D, defaulting to n1 / (n1 + 2 n2).
+    """
+    discounts = dict(discounts or {})
+    tables = None
+    for order in range(1, n + 1):
+        table = counts.table(order)
+        if table is None:
+            break
+        kn_counts = table.counts if order == n else continuation_counts(counts, order, table)
+        discount = discounts.setdefault(order, kn_discount(kn_counts))
+        starts = context_groups(table.keys)
+        ends = np.append(starts[1:], len(table))
+        totals = np.add.reduceat(kn_counts, starts)
+        gammas = discount * (ends - starts) / totals
+        per_row = np.repeat(np.arange(len(starts)), ends - starts)
+        probs = np.maximum(kn_counts - discount, 0) / totals[per_row]
+
+        if order == 1:
+            tables = BackoffTables(n, gammas[0] / vocab_size)
+            tables.add_order(1, table.keys, probs + gammas[0] / vocab_size)
+        else:
+            probs += gammas[per_row] * lower_probabilities(tables, table.keys, n)
+            tables.add_order(order, table.keys, probs)
+            rows = history_rows(tables, order, starts)
+            tables.backoffs[order - 1][rows[rows >= 0]] = gammas[rows >= 0]
+    return tables or BackoffTables(n, 0.0)
+
+
+SMOOTHING = {
+    'addk': addk_tables,
+    'katz': backoff_from_addk,
+    'stupid': stupid_backoff_tables,
+    'kneser-ney': kneser_ney_tables,
+}
+
+
+def build_backoff(smoothing, counts, n, vocab_size, **options):
+    if smoothing not in SMOOTHING:
+        raise ValueError(f"Unknown smoothing '{smoothing}', expected one of {sorted(SMOOTHING)}")
+    return SMOOTHING[smoothing](counts, n, vocab_size, **options)
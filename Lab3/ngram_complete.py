@@ -0,0 +1,66 @@
+import bisect
+
+import numpy as np
+
+from ngram_backoff import context_groups
+from ngram_store import key_range
+
+SENTENCE_MARKERS = ('<START>', '<END>')
+
+
+class CompletionIndex:
+    """Successor lists of every context, pre-sorted by score, for top-k completion.
+
+    `tables` maps order -> (keys, scores) with keys sorted as in a CountTable;
+    scores are counts (or probabilities for count-less models).
+    """
+
+    def __init__(self, tables, tokens):
+        self.tables = tables
+        self.ranked = {}
+        for order, (keys, scores) in tables.items():
+            starts = context_groups(keys)
+            groups = np.repeat(np.arange(len(starts)), np.diff(np.append(starts, keys.shape[1])))
+            # Groups stay in place, so ranked[lo:hi] are the rows of the context
+            # at [lo, hi), best score first and ties by token ID
+            self.ranked[order] = np.lexsort((keys[-1], -np.asarray(scores), groups))
+
+        # Prefix filtering works on the alphabetical rank of each token
+        self.sorted_tokens = sorted(tokens)
+        rank = {token: i for i, token in enumerate(self.sorted_tokens)}
+        self.ranks = np.array([rank[t] for t in tokens], dtype=np.int64)
+        self.excluded = np.zeros(len(tokens), dtype=bool)
+        for i, token in enumerate(tokens):
+            self.excluded[i] = token in SENTENCE_MARKERS
+
+        if 1 in tables:
+            self.unigrams_by_rank = np.argsort(self.ranks[tables[1][0][0]], kind='stable')
+            self.unigram_ranks = self.ranks[tables[1][0][0]][self.unigrams_by_rank]
+
+    def rank_range(self, prefix):
+        """[lo, hi) of the alphabetical ranks of tokens starting with `prefix`."""
+        lo = bisect.bisect_left(self.sorted_tokens, prefix)
+        hi = bisect.bisect_left(self.sorted_tokens, prefix[:-1] + chr(ord(prefix[-1]) + 1))
+        return lo, hi
+
+    def candidates(self, order, context, k, ranks=None):
+        """Token IDs of the k best successors of `context` at one order."""
+        if order not in self.tables:
+            return []
+        keys, scores = self.tables[order]
+        if ranks is not None and order == 1:
+            lo, hi = np.searchsorted(self.unigram_ranks, ranks)
+            rows = self.unigrams_by_rank[lo:hi]
+            if len(rows) > k + len(SENTENCE_MARKERS):
+                best = np.argpartition(-np.asarray(scores)[rows], k + len(SENTENCE_MARKERS))
+                rows = rows[best[:k + len(SENTENCE_MARKERS)]]
+            rows = rows[np.lexsort((keys[-1][rows], -np.asarray(scores)[rows]))]
+        else:
+            lo, hi = key_range(keys, context)
+            rows = self.ranked[order][lo:hi]
+            if ranks is not None:
+                word_ranks = self.ranks[keys[-1][rows]]
+                rows = rows[(word_ranks >= ranks[0]) & (word_ranks < ranks[1])]
+            rows = rows[:k + len(SENTENCE_MARKERS)]
+        words = keys[-1][rows]
+        return words[~self.excluded[words]][:k].tolist()
@@ -0,0 +1,188 @@
+import os
+import re
+from itertools import chain
+from pathlib import Path
+
+import numpy as np
+
+CITATION_RE = re.compile(r'\[\d+\]')
+SENTENCE_SPLIT_RE = re.compile(r'[.!?]+')
+WORD_RE = re.compile(r'[a-zăâîșțĂÂÎȘȚ]+')
+# Words, and '' for every run of sentence terminators between them
+TOKEN_RE = re.compile(r'([a-zăâîșțĂÂÎȘȚ]+)|[.!?]+')
+FIRST_END_RE = re.compile(r'[a-zăâîșțĂÂÎȘȚ][^.!?]*[.!?]')
+START, END = '<START>', '<END>'
+
+
+def clean_text(text):
+    text = text.lower()
+    # Removing a citation can join the words around it, so it has to happen
+    # before tokenizing; most chunks have no '[' and skip the extra pass
+    if '[' in text:
+        text = CITATION_RE.sub('', text)
+    return text
+
+
+def sentence_words(text):
+    """Yields the word list of every non-empty sentence in `text`."""
+    for sentence in SENTENCE_SPLIT_RE.split(clean_text(text)):
+        words = WORD_RE.findall(sentence)
+        if words:
+            yield words
+
+
+def text_words(text):
+    """All words of `text` in order, ignoring sentence boundaries."""
+    return WORD_RE.findall(clean_text(text))
+
+
+def delimit(tokens, terminators, start, end):
+    """Wraps every sentence of the `tokens` array in start/end markers.
+
+    `terminators` flags the positions separating sentences; runs of them
+    and sentences without words produce nothing, as in sentence_words.
+    """
+    words = ~terminators
+    if not words.any():
+        return tokens[:0]
+    ends = terminators.copy()
+    ends[0] = False
+    ends[1:] &= words[:-1]
+    kept = words | ends
+    tokens = tokens[kept]
+    ends = ends[kept]
+    # Every sentence end becomes an end marker followed by the next start
+    result = np.repeat(tokens, np.where(ends, 2, 1))
+    marks = np.flatnonzero(ends) + np.arange(np.count_nonzero(ends))
+    result[marks] = end
+    result[marks + 1] = start
+    if ends[-1]:
+        result = result[:-1]
+    else:
+        result = np.append(result, np.array([end], dtype=result.dtype))
+    return np.concatenate([np.array([start], dtype=result.dtype), result])
+
+
+def sentence_tokens(text):
+    """sentence_words() flattened with <START>/<END> around every sentence."""
+    tokens = np.array(TOKEN_RE.findall(clean_text(text)), dtype=object)
+    return delimit(tokens, tokens == '', START, END).tolist()
+
+
+class SentenceEncoder(dict):
+    """Turns text into <START>/<END>-delimited token IDs of `vocabulary`.
+
+    Words and terminators never contain whitespace, so the cleaned text is
+    split on whitespace and every distinct piece ("românia", "europa.") is
+    regex-tokenized once and then served from this dict as a tuple of IDs,
+    -2 standing for a run of terminators. Pieces with unknown words are not
+    cached when add=False, so a growing vocabulary never leaves stale IDs.
+    """
+
+    def __init__(self, vocabulary, add=True, max_pieces=1 << 20):
+        super().__init__()
+        self.vocabulary = vocabulary
+        self.add = add
+        self.max_pieces = max_pieces
+
+    def __missing__(self, piece):
+        if self.add:
+            token_ids = tuple(self.vocabulary.add(t) if t else -2 for t in TOKEN_RE.findall(piece))
+        else:
+            token_ids = tuple(self.vocabulary.lookup(t) if t else -2 for t in TOKEN_RE.findall(piece))
+            if -1 in token_ids:
+                return token_ids
+        if len(self) >= self.max_pieces:
+            self.clear()
+        self[piece] = token_ids
+        return token_ids
+
+    def _ids(self, text):
+        return np.fromiter(chain.from_iterable(map(self.__getitem__, text.split())), dtype=np.int32)
+
+    def encode(self, text):
+        """Token IDs of `text` with every sentence between <START> and <END>.
+
+        The same tokens as sentence_words(), as a packed int32 array. With
+        add=True new tokens get IDs in first-occurrence order, exactly as
+        Vocabulary.encode() would for the <START>/<END> token list; otherwise
+        unknown tokens are -1.
+        """
+        text = clean_text(text)
+        if self.add and not (START in self.vocabulary and END in self.vocabulary):
+            if not WORD_RE.search(text):
+                return np.empty(0, dtype=np.int32)
+            # <START> comes before the first word and <END> first appears at
+            # the first terminator after a word
+            self.vocabulary.add(START)
+            match = FIRST_END_RE.search(text)
+            cut = match.end() if match else len(text)
+            head = self._ids(text[:cut])
+            self.vocabulary.add(END)
+            ids = np.concatenate([head, self._ids(text[cut:])])
+        else:
+            ids = self._ids(text)
+        return delimit(ids, ids == -2, self.vocabulary.lookup(START), self.vocabulary.lookup(END))
+
+    def encode_words(self, text):
+        """IDs of all words of `text`, ignoring sentence boundaries."""
+        ids = self._ids(clean_text(text))
+        return ids[ids != -2]
+
+    def iter_encode(self, chunks):
+        """Like encode() over a document given as a stream of text chunks:
+        yields one packed array of whole sentences per piece of the document."""
+        for piece in iter_pieces(chunks):
+            ids = self.encode(piece)
+            if len(ids):
+                yield ids
+
+
+def iter_pieces(chunks):
+    """Regroups a stream of text chunks into pieces holding whole sentences."""
+    buffer = ''
+    for chunk in chunks:
+        buffer += chunk
+        # Cutting right after a sentence terminator never changes tokenization:
+        # citations contain no terminators and empty sentences produce no tokens
+        cut = max(buffer.rfind('.'), buffer.rfind('!'), buffer.rfind('?')) + 1
+        if cut:
+            yield buffer[:cut]
+            buffer = buffer[cut:]
+    if buffer:
+        yield buffer
+
+
+def iter_sentences(chunks):
+    """Like sentence_words, but over a document given as a stream of text chunks."""
+    for piece in iter_pieces(chunks):
+        yield from sentence_words(piece)
+
+
+def read_chunks(path, chunk_size=1 << 20):
+    with open(path, encoding='utf-8') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+
+def iter_documents(sources, pattern='*.txt', chunk_size=1 << 20):
+    """Yields one chunk iterator per document.
+
+    `sources` is a path to a text file or a directory (every file matching
+    `pattern`, recursively, in sorted order), or an iterable mixing such paths
+    (as `pathlib.Path`) and document strings. Each file is one document.
+    """
+    if isinstance(sources, (str, os.PathLike)):
+        sources = [Path(sources)]
+    for source in sources:
+        if isinstance(source, str):
+            yield iter([source])
+        elif Path(source).is_dir():
+            for path in sorted(Path(source).rglob(pattern)):
+                if path.is_file():
+                    yield read_chunks(path, chunk_size)
+        else:
+            yield read_chunks(source, chunk_size)
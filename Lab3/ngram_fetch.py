@@ -0,0 +1,116 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'dl4nlp', 'wikipedia')
+
+
+def extract_paragraph_text(html, url):
+    """The whitespace-normalized text of every <p> in a Wikipedia article."""
+    soup = BeautifulSoup(html, 'html.parser')
+    content = soup.find('div', {'id': 'mw-content-text'})
+
+    if not content:
+        print(f"WARNING: Could not find 'mw-content-text' div in {url}")
+        print(f"Page title: {soup.find('title').get_text() if soup.find('title') else 'No title'}")
+        return ""
+
+    paragraphs = content.find_all('p')
+    if not paragraphs:
+        print(f"WARNING: Found content div but no paragraphs in {url}")
+        return ""
+
+    text_parts = []
+    for p in paragraphs:
+        p_text = ' '.join(p.get_text().split())
+        if p_text:
+            text_parts.append(p_text)
+
+    return ' '.join(text_parts)
+
+
+class WikipediaFetcher:
+    """Fetches article text with pooled keep-alive sessions, a bounded thread
+    pool and an on-disk cache of the parsed text keyed by URL.
+
+    Cached pages are revalidated with their ETag (If-None-Match); a 304 or an
+    unchanged ETag reuses the cached text without parsing any HTML. With
+    revalidate=False cached pages are used without any request.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_workers=8, timeout=10,
+                 headers=None, revalidate=True):
+        self.cache_dir = cache_dir
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.headers = dict(DEFAULT_HEADERS if headers is None else headers)
+        self.revalidate = revalidate
+        # Sessions are not thread-safe, so every worker thread keeps its own
+        self._local = threading.local()
+
+    def _session(self):
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=self.max_workers, pool_maxsize=self.max_workers)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            self._local.session = session
+        return session
+
+    def _cache_path(self, url):
+        return os.path.join(self.cache_dir, hashlib.sha256(url.encode('utf-8')).hexdigest() + '.json')
+
+    def _read_cache(self, url):
+        try:
+            with open(self._cache_path(url), encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return entry if entry.get('url') == url else None
+
+    def _write_cache(self, url, etag, text):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # Write then rename, so concurrent runs never see half a file
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump({'url': url, 'etag': etag, 'text': text}, f, ensure_ascii=False)
+        os.replace(tmp_path, self._cache_path(url))
+
+    def fetch_text(self, url):
+        """Returns the paragraph text of `url`; raises on HTTP errors."""
+        entry = self._read_cache(url)
+        if entry is not None and not self.revalidate:
+            return entry['text']
+
+        headers = dict(self.headers)
+        if entry is not None and entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        response = self._session().get(url, headers=headers, timeout=self.timeout)
+
+        etag = response.headers.get('ETag')
+        if entry is not None and (response.status_code == 304 or (etag and etag == entry.get('etag'))):
+            return entry['text']
+        response.raise_for_status()
+
+        text = extract_paragraph_text(response.content, url)
+        # An empty text is most likely a bad page; not caching it lets the
+        # next call try again, even with revalidate=False
+        if text:
+            self._write_cache(url, etag, text)
+        return text
+
+    def map(self, fn, urls):
+        """fn(url) for every URL on the thread pool, results in input order."""
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            return list(pool.map(fn, urls))
@@ -0,0 +1,169 @@
+import json
+import struct
+
+import numpy as np
+
+MAGIC = b'RNGRAM\x00\x01'
+ALIGN = 64
+
+# The model's sentence markers and their ARPA spelling
+ARPA_TOKENS = {'<START>': '<s>', '<END>': '</s>'}
+MODEL_TOKENS = {arpa: token for token, arpa in ARPA_TOKENS.items()}
+UNK = '<unk>'
+
+
+def _aligned(offset):
+    return (offset + ALIGN - 1) // ALIGN * ALIGN
+
+
+def write_arrays(path, metadata, arrays):
+    """Writes named arrays after a JSON header, each aligned to 64 bytes.
+
+    Layout: MAGIC, uint64 header length, header, padding, array data.
+    """
+    arrays = {name: np.ascontiguousarray(a) for name, a in arrays.items()}
+    layout = {}
+    offset = 0
+    for name, a in arrays.items():
+        offset = _aligned(offset)
+        layout[name] = {'dtype': a.dtype.str, 'shape': list(a.shape), 'offset': offset}
+        offset += a.nbytes
+    header = json.dumps({'metadata': metadata, 'arrays': layout}).encode('utf-8')
+    data_start = _aligned(len(MAGIC) + 8 + len(header))
+
+    with open(path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<Q', len(header)))
+        f.write(header)
+        for name, a in arrays.items():
+            f.write(b'\0' * (data_start + layout[name]['offset'] - f.tell()))
+            f.write(a.tobytes())
+
+
+def read_arrays(path, mmap=True):
+    """Reads a file written by write_arrays.
+
+    With mmap=True the arrays are read-only views of one shared numpy.memmap,
+    so processes loading the same file share its pages.
+    """
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a saved n-gram model")
+        (header_size,) = struct.unpack('<Q', f.read(8))
+        header = json.loads(f.read(header_size))
+    data_start = _aligned(len(MAGIC) + 8 + header_size)
+
+    if mmap:
+        buffer = np.memmap(path, dtype=np.uint8, mode='r')
+    else:
+        buffer = np.fromfile(path, dtype=np.uint8)
+
+    arrays = {}
+    for name, spec in header['arrays'].items():
+        dtype = np.dtype(spec['dtype'])
+        size = int(np.prod(spec['shape'], dtype=np.int64)) * dtype.itemsize
+        start = data_start + spec['offset']
+        arrays[name] = buffer[start:start + size].view(dtype).reshape(spec['shape'])
+    return header['metadata'], arrays
+
+
+def encode_vocabulary(tokens):
+    # Tokens never contain newlines (they are letter runs or <START>/<END>)
+    return np.frombuffer('\n'.join(tokens).encode('utf-8'), dtype=np.uint8)
+
+
+def decode_vocabulary(blob):
+    text = bytes(blob).decode('utf-8')
+    return text.split('\n') if text else []
+
+
+def _log10(values):
+    with np.errstate(divide='ignore'):
+        logs = np.log10(values)
+    # -99 is the usual ARPA stand-in for log10(0)
+    return np.where(np.isfinite(logs), logs, -99.0)
+
+
+def write_arpa(path, tokens, tables):
+    """Writes BackoffTables over `tokens` (ID -> string) as an ARPA file."""
+    names = [ARPA_TOKENS.get(t, t) for t in tokens]
+    orders = sorted(tables.keys)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('\n\\data\\\n')
+        for order in orders:
+            extra = 1 if order == 1 else 0
+            f.write(f"ngram {order}={len(tables.probs[order]) + extra}\n")
+        for order in orders:
+            f.write(f"\n\\{order}-grams:\n")
+            with_backoff = order < max(orders)
+            if order == 1:
+                f.write(f"{_log10(tables.unk_prob):.7f}\t{UNK}")
+                f.write("\t0.0000000\n" if with_backoff else "\n")
+            probs = _log10(tables.probs[order])
+            backoffs = _log10(tables.backoffs[order])
+            keys = tables.keys[order].T
+            for row, prob, backoff in zip(keys.tolist(), probs.tolist(), backoffs.tolist()):
+                line = f"{prob:.7f}\t{' '.join(names[i] for i in row)}"
+                if with_backoff:
+                    line += f"\t{backoff:.7f}"
+                f.write(line + '\n')
+        f.write('\n\\end\\\n')
+
+
+def read_arpa(path, vocabulary, tables_cls):
+    """Reads an ARPA file, interning its words into `vocabulary`.
+
+    Returns a `tables_cls` (BackoffTables) instance with sorted keys.
+    """
+    rows = {}
+    unk_prob = None
+    order = None
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('ngram '):
+                continue
+            if line.startswith('\\'):
+                if line.endswith('-grams:'):
+                    order = int(line[1:line.index('-')])
+                    rows[order] = ([], [], [])
+                elif line == '\\end\\':
+                    break
+                continue
+            if order is None:
+                continue
+            fields = line.split()
+            prob = 10 ** float(fields[0])
+            words = fields[1:1 + order]
+            backoff = 10 ** float(fields[1 + order]) if len(fields) > 1 + order else 1.0
+            if order == 1 and words[0] == UNK:
+                unk_prob = prob
+                continue
+            keys, probs, backoffs = rows[order]
+            keys.append([vocabulary.add(MODEL_TOKENS.get(w, w)) for w in words])
+            probs.append(prob)
+            backoffs.append(backoff)
+
+    n = max(rows) if rows else 0
+    if unk_prob is None:
+        # No <unk> entry: fall back to a uniform guess over the vocabulary
+        unk_prob = 1 / len(vocabulary) if len(vocabulary) else 0.0
+    tables = tables_cls(n, unk_prob)
+    for order, (keys, probs, backoffs) in sorted(rows.items()):
+        keys = np.array(keys, dtype=np.int32).reshape(len(keys), order).T
+        perm = np.lexsort(keys[::-1])
+        tables.add_order(order, np.ascontiguousarray(keys[:, perm]),
+                         np.array(probs)[perm], np.array(backoffs)[perm])
+    return tables
+
+
+def backoff_arrays(tables):
+    arrays = {}
+    for order in tables.keys:
+        arrays[f'backoff{order}.keys'] = tables.keys[order]
+        arrays[f'backoff{order}.probs'] = tables.probs[order]
+        arrays[f'backoff{order}.backoffs'] = tables.backoffs[order]
+        if order in tables.floors:
+            arrays[f'backoff{order}.floors'] = tables.floors[order]
+    return arrays
+
@@ -0,0 +1,128 @@
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from ngram_corpus import SentenceEncoder, iter_documents
+from ngram_store import Vocabulary, count_windows
+
+
+def iter_shards(sources, shard_chars=8 << 20):
+    """Yields (continues_document, text) shards of roughly `shard_chars` characters.
+
+    Documents are only cut right after a sentence terminator, so tokenizing
+    the shards one by one gives the same tokens as the whole document.
+    """
+    for chunks in iter_documents(sources):
+        buffer = ''
+        continues = False
+        for chunk in chunks:
+            buffer += chunk
+            if len(buffer) < shard_chars:
+                continue
+            cut = max(buffer.rfind('.'), buffer.rfind('!'), buffer.rfind('?')) + 1
+            if cut:
+                yield continues, buffer[:cut]
+                buffer = buffer[cut:]
+                continues = True
+        if buffer:
+            yield continues, buffer
+
+
+def count_shard(text, n):
+    """Tokenizes and counts one shard with shard-local token IDs.
+
+    Returns the local vocabulary, one (keys, counts) table per order, the
+    number of tokens and the first/last n-1 tokens for the boundary merge.
+    """
+    vocabulary = Vocabulary()
+    ids = SentenceEncoder(vocabulary).encode(text)
+    tables = {order: count_windows(ids, order) for order in range(1, n + 1)}
+    edge = n - 1
+    tokens = vocabulary.id_to_token
+    return {
+        'vocabulary': tokens,
+        'tables': tables,
+        'tokens': len(ids),
+        'head': [tokens[i] for i in ids[:edge]],
+        'tail': [tokens[i] for i in ids[len(ids) - edge:]] if edge else [],
+    }
+
+
+def boundary_windows(ids, carried, order):
+    """The order-`order` windows of `ids` that start before and end after `carried`."""
+    return ids[max(0, carried - order + 1):carried + order - 1]
+
+
+def map_shards(shards, n, workers):
+    """Counts shards in a process pool, yielding results in shard order.
+
+    At most 2 * workers shards are in flight, so the corpus is never fully
+    held in memory.
+    """
+    if workers == 1:
+        for continues, text in shards:
+            yield continues, count_shard(text, n)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        in_flight = deque()
+        for continues, text in shards:
+            in_flight.append((continues, pool.submit(count_shard, text, n)))
+            if len(in_flight) >= 2 * workers:
+                continues, future = in_flight.popleft()
+                yield continues, future.result()
+        while in_flight:
+            continues, future = in_flight.popleft()
+            yield continues, future.result()
+
+
+def default_workers():
+    return os.cpu_count() or 1
+
+
+def merge_shard(model, continues, result, carry):
+    """Folds one shard result into `model` and returns the new carry tokens.
+
+    `carry` holds the last n-1 tokens seen so far in the current document;
+    n-grams spanning the shard boundary are counted from carry + head.
+    """
+    n = model.n
+    vocabulary = model.vocabulary
+    mapping = np.fromiter((vocabulary.add(t) for t in result['vocabulary']), dtype=np.int32,
+                          count=len(result['vocabulary']))
+    for order, (keys, counts) in result['tables'].items():
+        model.counts.add_table(order, mapping[keys], counts)
+    model.corpus_size += result['tokens']
+
+    if not continues:
+        carry = []
+    if carry:
+        ids = vocabulary.encode(carry + result['head'])
+        for order in range(2, n + 1):
+            model.counts.add_ngrams(order, boundary_windows(ids, len(carry), order))
+
+    if result['tokens'] >= n - 1:
+        return result['tail']
+    carry = carry + result['head']
+    return carry[max(0, len(carry) - (n - 1)):]
+
+
+def update_parallel(model, sources, workers=None, shard_chars=8 << 20, progress=True):
+    """Counts `sources` into `model` with a pool of `workers` processes.
+
+    The result is identical to the serial RomanianNGramModel.update().
+    """
+    workers = workers or default_workers()
+    start = time.perf_counter()
+    carry = []
+    shards = 0
+    for continues, result in map_shards(iter_shards(sources, shard_chars), model.n, workers):
+        carry = merge_shard(model, continues, result, carry)
+        shards += 1
+        if progress:
+            print(f"  Shard {shards}: {result['tokens']} tokens, "
+                  f"{len(result['vocabulary'])} types ({time.perf_counter() - start:.1f}s)")
+    return shards
@@ -0,0 +1,146 @@
+import numpy as np
+
+from ngram_backoff import BackoffTables, context_groups, lower_probabilities
+
+
+def row_nbytes(order):
+    # keys, probability and backoff weight of one stored n-gram
+    return 4 * order + 8 + 8
+
+
+def tables_nbytes(tables):
+    return sum(len(tables.probs[order]) * row_nbytes(order) for order in tables.keys)
+
+
+def subset(tables, keep):
+    """A copy of `tables` holding only the rows with keep[order] set."""
+    result = BackoffTables(tables.n, tables.unk_prob)
+    for order in sorted(tables.keys):
+        mask = keep.get(order)
+        if mask is None:
+            mask = np.ones(len(tables.probs[order]), dtype=bool)
+        result.add_order(order, np.ascontiguousarray(tables.keys[order][:, mask]),
+                         np.array(tables.probs[order][mask]), np.array(tables.backoffs[order][mask]))
+    return result
+
+
+def renormalize(tables):
+    """Recomputes every backoff weight so each P(. | h) sums to one again:
+    backoff(h) = (1 - sum P(w | h)) / (1 - sum P(w | h[1:])) over stored h w."""
+    for order in sorted(tables.keys):
+        if order == 1:
+            continue
+        tables.backoffs[order - 1] = np.ones(len(tables.probs[order - 1]))
+        keys = tables.keys[order]
+        if not keys.shape[1]:
+            continue
+        starts = context_groups(keys)
+        seen = np.add.reduceat(tables.probs[order], starts)
+        lower = np.add.reduceat(lower_probabilities(tables, keys, tables.n), starts)
+        weights = np.where(1 - lower > 0, (1 - seen) / np.where(1 - lower > 0, 1 - lower, 1.0), 1.0)
+        rows = tables.find_many(order - 1, keys[:-1, starts].T)
+        tables.backoffs[order - 1][rows[rows >= 0]] = weights[rows >= 0]
+    return tables
+
+
+def protect_histories(tables, keep):
+    """Keeps every n-gram that is the history of a kept higher-order n-gram,
+    since its backoff weight has nowhere else to live. Works top-down."""
+    keep = dict(keep)
+    for order in sorted(tables.keys, reverse=True):
+        if order - 1 not in tables.keys or order - 1 == 1:
+            continue
+        kept = tables.keys[order][:-1, keep[order]]
+        rows = tables.find_many(order - 1, kept.T)
+        protected = keep[order - 1].copy()
+        protected[rows[rows >= 0]] = True
+        keep[order - 1] = protected
+    return keep
+
+
+def top_n_mask(tables, order, top_n):
+    """Rows among the top_n most probable successors of their context."""
+    keys = tables.keys[order]
+    starts = context_groups(keys)
+    groups = np.repeat(np.arange(len(starts)), np.diff(np.append(starts, keys.shape[1])))
+    ranked = np.lexsort((-tables.probs[order], groups))
+    rank_in_group = np.empty(len(ranked), dtype=np.int64)
+    rank_in_group[ranked] = np.arange(len(ranked)) - starts[groups[ranked]]
+    return rank_in_group < top_n
+
+
+def history_probabilities(tables, histories):
+    """P(h) for every column h of `histories`, by the chain rule."""
+    n = tables.n
+    result = np.ones(histories.shape[1])
+    for i in range(histories.shape[0]):
+        contexts = np.full((histories.shape[1], n - 1), -1, dtype=np.int32)
+        if i:
+            contexts[:, n - 1 - i:] = histories[:i].T
+        result *= tables.probability_many(histories[i], contexts, np.full(histories.shape[1], i + 1))
+    return result
+
+
+def entropy_scores(tables, order):
+    """Stolcke's relative-entropy increase from pruning each row of one order."""
+    keys = tables.keys[order]
+    probs = tables.probs[order]
+    starts = context_groups(keys)
+    sizes = np.diff(np.append(starts, keys.shape[1]))
+    lower = lower_probabilities(tables, keys, tables.n)
+    seen = np.repeat(np.add.reduceat(probs, starts), sizes)
+    lower_seen = np.repeat(np.add.reduceat(lower, starts), sizes)
+    left_over = np.maximum(1 - seen, 1e-12)
+    backoff = left_over / np.maximum(1 - lower_seen, 1e-12)
+    pruned_backoff = (left_over + probs) / np.maximum(1 - lower_seen + lower, 1e-12)
+    history = np.repeat(history_probabilities(tables, keys[:-1, starts]), sizes)
+    return -history * (probs * (np.log(pruned_backoff * lower) - np.log(probs))
+                       + left_over * (np.log(pruned_backoff) - np.log(backoff)))
+
+
+def prune_tables(tables, counts=None, min_counts=None, top_n=None, target_mb=None):
+    """Returns pruned, renormalized copies of normalized BackoffTables.
+
+    min_counts (int, or order -> int) needs the per-row `counts`
+    (order -> array); top_n keeps the most probable successors of every
+    context; target_mb drops the n-grams whose removal increases relative
+    entropy least until the tables fit. Unigrams are never pruned.
+    """
+    if isinstance(min_counts, int):
+        min_counts = {order: min_counts for order in tables.keys}
+    keep = {}
+    for order in tables.keys:
+        mask = np.ones(len(tables.probs[order]), dtype=bool)
+        if order > 1:
+            if min_counts and order in min_counts:
+                mask &= counts[order] >= min_counts[order]
+            if top_n is not None:
+                mask &= top_n_mask(tables, order, top_n)
+        keep[order] = mask
+
+    if target_mb is not None:
+        scores = {order: entropy_scores(tables, order) for order in tables.keys if order > 1}
+        target = target_mb * 2**20
+
+        def keep_above(threshold):
+            masks = {order: keep[order] & (scores[order] >= threshold) if order > 1 else keep[order]
+                     for order in keep}
+            return protect_histories(tables, masks)
+
+        def size(masks):
+            return sum(np.count_nonzero(mask) * row_nbytes(order) for order, mask in masks.items())
+
+        # Largest model under the target: the smallest threshold that fits
+        thresholds = np.unique(np.concatenate([s[keep[o]] for o, s in scores.items()] + [[np.inf]]))
+        lo, hi = 0, len(thresholds) - 1
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if size(keep_above(thresholds[mid])) <= target:
+                hi = mid
+            else:
+                lo = mid + 1
+        keep = keep_above(thresholds[lo])
+    else:
+        keep = protect_histories(tables, keep)
+
+    return renormalize(subset(tables, keep))
@@ -0,0 +1,343 @@
+import sys
+from collections import defaultdict
+
+import numpy as np
+
+
+class Vocabulary:
+    """Interns tokens to consecutive integer IDs (first occurrence order)."""
+
+    def __init__(self, tokens=()):
+        self.token_to_id = {}
+        self.id_to_token = []
+        for token in tokens:
+            self.add(token)
+
+    def add(self, token):
+        token_id = self.token_to_id.get(token)
+        if token_id is None:
+            token_id = len(self.id_to_token)
+            self.token_to_id[token] = token_id
+            self.id_to_token.append(token)
+        return token_id
+
+    def encode(self, tokens):
+        add = self.add
+        return np.fromiter((add(t) for t in tokens), dtype=np.int32)
+
+    def lookup(self, token):
+        # -1 never appears in a count table, so unknown tokens simply miss
+        return self.token_to_id.get(token, -1)
+
+    def nbytes(self):
+        size = sys.getsizeof(self.token_to_id) + sys.getsizeof(self.id_to_token)
+        size += sum(sys.getsizeof(t) for t in self.id_to_token)
+        return size
+
+    def __len__(self):
+        return len(self.id_to_token)
+
+    def __contains__(self, token):
+        return token in self.token_to_id
+
+    def __iter__(self):
+        return iter(self.id_to_token)
+
+
+def count_windows(ids, order):
+    """Counts every length-`order` window of `ids`.
+
+    Returns (keys, counts) where keys has shape (order, E), one row per
+    position, and the columns are sorted lexicographically.
+    """
+    ids = np.asarray(ids, dtype=np.int32)
+    if len(ids) < order:
+        return np.empty((order, 0), dtype=np.int32), np.empty(0, dtype=np.int64)
+    windows = np.lib.stride_tricks.sliding_window_view(ids, order).T
+    return reduce_table(windows, np.ones(windows.shape[1], dtype=np.int64))
+
+
+def reduce_table(keys, counts):
+    """Sorts (keys, counts) lexicographically and sums duplicate n-grams."""
+    if keys.shape[1] == 0:
+        return np.ascontiguousarray(keys, dtype=np.int32), np.asarray(counts, dtype=np.int64)
+    perm = np.lexsort(keys[::-1])
+    keys = keys[:, perm]
+    counts = counts[perm]
+    changed = np.any(keys[:, 1:] != keys[:, :-1], axis=0)
+    starts = np.flatnonzero(np.concatenate(([True], changed)))
+    return np.ascontiguousarray(keys[:, starts]), np.add.reduceat(counts, starts)
+
+
+def merge_tables(tables):
+    """Merges several (keys, counts) tables of the same order into one."""
+    tables = [t for t in tables if t[0].shape[1]]
+    if not tables:
+        return None
+    if len(tables) == 1:
+        return tables[0]
+    keys = np.concatenate([t[0] for t in tables], axis=1)
+    counts = np.concatenate([t[1] for t in tables])
+    return reduce_table(keys, counts)
+
+
+def batched_search(columns, queries, lo, hi, side='left'):
+    """Vectorized lexicographic searchsorted of many query rows at once.
+
+    `columns` are the sorted key rows to compare against, `queries` has one
+    column per key row, and every query is searched inside its own [lo, hi).
+    """
+    lo = lo.copy()
+    hi = hi.copy()
+    size = len(columns[0]) if len(columns) else 0
+    while True:
+        active = lo < hi
+        if not active.any():
+            return lo
+        mid = (lo + hi) // 2
+        probe = np.minimum(mid, max(size - 1, 0))
+        # -1: key < query, 1: key > query, 0: equal so far
+        cmp = np.zeros(len(lo), dtype=np.int8)
+        for j, column in enumerate(columns):
+            values = column[probe]
+            undecided = cmp == 0
+            cmp[undecided & (values < queries[:, j])] = -1
+            cmp[undecided & (values > queries[:, j])] = 1
+        go_right = active & ((cmp < 0) if side == 'left' else (cmp <= 0))
+        lo = np.where(go_right, mid + 1, lo)
+        hi = np.where(active & ~go_right, mid, hi)
+
+
+def key_range(keys, prefix):
+    """[lo, hi) of the columns of sorted `keys` that start with `prefix`."""
+    # Columns are sorted lexicographically, so once the first j tokens match,
+    # row j is sorted inside [lo, hi). Search with int32 scalars: a Python
+    # int makes NumPy cast the whole row
+    lo, hi = 0, keys.shape[1]
+    for j, token in enumerate(np.asarray(prefix, dtype=np.int32)):
+        column = keys[j, lo:hi]
+        lo, hi = (lo + int(column.searchsorted(token, 'left')),
+                  lo + int(column.searchsorted(token, 'right')))
+        if lo == hi:
+            break
+    return lo, hi
+
+
+def find_row(keys, row):
+    """Index of the column of sorted `keys` equal to `row`, or -1."""
+    lo, hi = key_range(keys, row)
+    return lo if lo < hi else -1
+
+
+def find_rows(keys, rows):
+    """Vectorized find_row: one index (or -1) per row of `rows`."""
+    m = len(rows)
+    size = keys.shape[1]
+    if size == 0:
+        return np.full(m, -1, dtype=np.int64)
+    pos = batched_search(list(keys), rows, np.zeros(m, dtype=np.int64),
+                         np.full(m, size, dtype=np.int64), 'left')
+    probe = np.minimum(pos, size - 1)
+    hit = (pos < size) & np.all(keys[:, probe] == rows.T, axis=0)
+    return np.where(hit, pos, -1)
+
+
+class CountTable:
+    """Sorted n-gram table of one order with prefix sums for context totals."""
+
+    def __init__(self, keys, counts, cumulative=None):
+        self.keys = keys
+        self.counts = counts
+        if cumulative is None:
+            cumulative = np.concatenate(([0], np.cumsum(counts)))
+        self.cumulative = cumulative
+
+    @property
+    def order(self):
+        return self.keys.shape[0]
+
+    def __len__(self):
+        return self.keys.shape[1]
+
+    def context_range(self, context):
+        return key_range(self.keys, context)
+
+    def lookup(self, context, word):
+        lo, hi = self.context_range(context)
+        if lo == hi:
+            return None
+        context_total = int(self.cumulative[hi] - self.cumulative[lo])
+        words = self.keys[-1, lo:hi]
+        i = int(words.searchsorted(np.int32(word)))
+        word_count = int(self.counts[lo + i]) if i < len(words) and words[i] == word else 0
+        return word_count, context_total
+
+    def lookup_many(self, contexts, words):
+        """Vectorized lookup: returns (word_counts, context_totals, found) arrays."""
+        m = len(words)
+        lo = np.zeros(m, dtype=np.int64)
+        hi = np.full(m, len(self), dtype=np.int64)
+        prefix = list(self.keys[:-1])
+        if prefix:
+            lo, hi = (batched_search(prefix, contexts, lo, hi, 'left'),
+                      batched_search(prefix, contexts, lo, hi, 'right'))
+        found = lo < hi
+        context_totals = self.cumulative[hi] - self.cumulative[lo]
+        pos = batched_search([self.keys[-1]], words[:, None], lo, hi, 'left')
+        hit = pos < hi
+        probe = np.minimum(pos, max(len(self) - 1, 0))
+        hit[hit] = self.keys[-1][probe[hit]] == words[hit]
+        word_counts = np.where(hit, self.counts[probe], 0)
+        return word_counts, context_totals, found
+
+    def num_contexts(self):
+        if len(self) == 0:
+            return 0
+        if self.order == 1:
+            return 1
+        prefix = self.keys[:-1]
+        return 1 + int(np.count_nonzero(np.any(prefix[:, 1:] != prefix[:, :-1], axis=0)))
+
+    def nbytes(self):
+        return self.keys.nbytes + self.counts.nbytes + self.cumulative.nbytes
+
+
+class ArrayCountStore:
+    """Array-backed count store: one sorted CountTable per order.
+
+    New counts are queued and merged into the table the next time it is read,
+    or as soon as the queue outgrows the table (so streaming updates stay
+    within a constant factor of the final table size).
+    """
+
+    def __init__(self, n, min_compact_entries=1 << 20):
+        self.n = n
+        self.min_compact_entries = min_compact_entries
+        self.tables = {}
+        self.pending = defaultdict(list)
+        self.pending_entries = defaultdict(int)
+
+    def add_ngrams(self, order, ids):
+        self.add_table(order, *count_windows(ids, order))
+
+    def add_table(self, order, keys, counts):
+        if keys.shape[1]:
+            self.pending[order].append((keys, counts))
+            self.pending_entries[order] += keys.shape[1]
+            current = self.tables.get(order)
+            if self.pending_entries[order] > max(self.min_compact_entries, len(current or ())):
+                self.table(order)
+
+    def table(self, order):
+        if self.pending.get(order):
+            current = self.tables.get(order)
+            tables = self.pending.pop(order)
+            self.pending_entries.pop(order)
+            if current is not None:
+                tables.insert(0, (current.keys, current.counts))
+            self.tables[order] = CountTable(*merge_tables(tables))
+        return self.tables.get(order)
+
+    def lookup(self, order, context, word):
+        """Returns (word_count, context_total), or None for an unseen context."""
+        table = self.table(order)
+        if table is None:
+            return None
+        return table.lookup(context, word)
+
+    def lookup_many(self, order, contexts, words):
+        """Batched lookup of `words` (m,) after `contexts` (m, order-1)."""
+        table = self.table(order)
+        if table is None:
+            zeros = np.zeros(len(words), dtype=np.int64)
+            return zeros, zeros, np.zeros(len(words), dtype=bool)
+        return table.lookup_many(contexts, words)
+
+    def memory_report(self):
+        report = {}
+        for order in range(1, self.n + 1):
+            table = self.table(order)
+            if table is None:
+                report[order] = {'ngrams': 0, 'contexts': 0, 'bytes': 0}
+            else:
+                report[order] = {'ngrams': len(table), 'contexts': table.num_contexts(),
+                                 'bytes': table.nbytes()}
+        return report
+
+
+class DictCountStore:
+    """The original nested-dict layout, keyed by token IDs."""
+
+    def __init__(self, n):
+        self.n = n
+        # ngram_size -> context -> word -> count
+        self.ngrams = defaultdict(lambda: defaultdict(lambda: defaultdict(int)))
+        self.context_counts = defaultdict(lambda: defaultdict(int))
+
+    def add_ngrams(self, order, ids):
+        ids = [int(i) for i in ids]
+        ngrams = self.ngrams[order]
+        context_counts = self.context_counts[order]
+        for i in range(len(ids) - order + 1):
+            context = tuple(ids[i:i + order - 1])
+            ngrams[context][ids[i + order - 1]] += 1
+            context_counts[context] += 1
+
+    def add_table(self, order, keys, counts):
+        ngrams = self.ngrams[order]
+        context_counts = self.context_counts[order]
+        for column, count in zip(keys.T.tolist(), counts.tolist()):
+            context = tuple(column[:-1])
+            ngrams[context][column[-1]] += count
+            context_counts[context] += count
+
+    def lookup(self, order, context, word):
+        context_counts = self.context_counts[order]
+        if context not in context_counts:
+            return None
+        return self.ngrams[order][context].get(word, 0), context_counts[context]
+
+    def table(self, order):
+        """The counts of one order as a sorted CountTable (None if empty)."""
+        rows = [context + (word,) for context, words in self.ngrams[order].items() for word in words]
+        if not rows:
+            return None
+        counts = [count for words in self.ngrams[order].values() for count in words.values()]
+        keys = np.array(rows, dtype=np.int32).reshape(len(rows), order).T
+        return CountTable(*reduce_table(keys, np.array(counts, dtype=np.int64)))
+
+    def lookup_many(self, order, contexts, words):
+        word_counts = np.zeros(len(words), dtype=np.int64)
+        context_totals = np.zeros(len(words), dtype=np.int64)
+        found = np.zeros(len(words), dtype=bool)
+        for i, (context, word) in enumerate(zip(contexts.tolist(), words.tolist())):
+            result = self.lookup(order, tuple(context), word)
+            if result is not None:
+                word_counts[i], context_totals[i] = result
+                found[i] = True
+        return word_counts, context_totals, found
+
+    def memory_report(self):
+        report = {}
+        for order in range(1, self.n + 1):
+            contexts = self.ngrams[order]
+            size = sys.getsizeof(contexts) + sys.getsizeof(self.context_counts[order])
+            entries = 0
+            for context, words in contexts.items():
+                size += sys.getsizeof(context) + sys.getsizeof(words)
+                size += sum(sys.getsizeof(w) + sys.getsizeof(c) for w, c in words.items())
+                entries += len(words)
+            report[order] = {'ngrams': entries, 'contexts': len(contexts), 'bytes': size}
+        return report
+
+
+COUNT_BACKENDS = {
+    'array': ArrayCountStore,
+    'dict': DictCountStore,
+}
+
+
+def make_count_store(backend, n):
+    if backend not in COUNT_BACKENDS:
+        raise ValueError(f"Unknown count backend '{backend}', expected one of {sorted(COUNT_BACKENDS)}")
+    return COUNT_BACKENDS[backend](n)
@@ -0,0 +1,113 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+import ngram_fetch
+from ngram_fetch import WikipediaFetcher
+
+ARTICLE = ('<html><body><div id="mw-content-text"><p>The  cat sat.</p><p>On the\nmat.</p>'
+           '</div></body></html>').encode('utf-8')
+BROKEN = b'<html><head><title>Error</title></head><body>Try again later</body></html>'
+
+
+class Handler(BaseHTTPRequestHandler):
+    """A local stand-in for Wikipedia: /article has an ETag, /broken has no
+    article content until `fixed` is set, and /status/<code> fails."""
+
+    def do_GET(self):
+        server = self.server
+        server.requests.append((self.path, self.headers.get('If-None-Match')))
+        if self.path == '/article':
+            if self.headers.get('If-None-Match') == server.etag:
+                self.send_response(304)
+                self.send_header('ETag', server.etag)
+                self.end_headers()
+                return
+            self.reply(200, ARTICLE, server.etag)
+        elif self.path == '/broken':
+            self.reply(200, ARTICLE if server.fixed else BROKEN)
+        elif self.path.startswith('/status/'):
+            self.reply(int(self.path.rsplit('/', 1)[1]), b'error')
+        else:
+            self.reply(404, b'not found')
+
+    def reply(self, status, body, etag=None):
+        self.send_response(status)
+        if etag:
+            self.send_header('ETag', etag)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.requests = []
+    server.etag = '"v1"'
+    server.fixed = False
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def parses(monkeypatch):
+    """The URLs extract_paragraph_text() is called on."""
+    calls = []
+    extract = ngram_fetch.extract_paragraph_text
+
+    def counting_extract(html, url):
+        calls.append(url)
+        return extract(html, url)
+
+    monkeypatch.setattr(ngram_fetch, 'extract_paragraph_text', counting_extract)
+    return calls
+
+
+def test_etag_revalidation_reuses_cached_text(server, parses, tmp_path):
+    fetcher = WikipediaFetcher(cache_dir=str(tmp_path))
+    url = server.url + '/article'
+    assert fetcher.fetch_text(url) == "The cat sat. On the mat."
+    assert fetcher.fetch_text(url) == "The cat sat. On the mat."
+    assert server.requests == [('/article', None), ('/article', '"v1"')]
+    assert parses == [url]
+
+    # A changed page is fetched and parsed again
+    server.etag = '"v2"'
+    assert fetcher.fetch_text(url) == "The cat sat. On the mat."
+    assert len(parses) == 2
+
+
+def test_no_revalidation_makes_no_request(server, parses, tmp_path):
+    url = server.url + '/article'
+    WikipediaFetcher(cache_dir=str(tmp_path)).fetch_text(url)
+    fetcher = WikipediaFetcher(cache_dir=str(tmp_path), revalidate=False)
+    assert fetcher.fetch_text(url) == "The cat sat. On the mat."
+    assert len(server.requests) == 1
+    assert parses == [url]
+
+
+@pytest.mark.parametrize('status', [404, 500, 503])
+def test_error_statuses_raise(server, tmp_path, status):
+    fetcher = WikipediaFetcher(cache_dir=str(tmp_path))
+    with pytest.raises(requests.HTTPError):
+        fetcher.fetch_text(f"{server.url}/status/{status}")
+    assert not list(tmp_path.iterdir())
+
+
+def test_empty_text_is_not_cached(server, tmp_path):
+    fetcher = WikipediaFetcher(cache_dir=str(tmp_path), revalidate=False)
+    url = server.url + '/broken'
+    assert fetcher.fetch_text(url) == ""
+    server.fixed = True
+    assert fetcher.fetch_text(url) == "The cat sat. On the mat."
+    assert len(server.requests) == 2